@@ -20,6 +20,13 @@ class AnalyticsFilters(BaseModel):
     study_type: str = "BOTH"  # INTERVENTIONAL, OBSERVATIONAL, BOTH
     date_range: Optional[List[str]] = None
     window: str = "6m"  # 3m, 6m, 1y, 2y
+    
+    def cache_key(self) -> tuple:
+        """Hashable tuple of all filter values"""
+        return tuple((name, tuple(value) if isinstance(value, list) else value) for name, value in self)
+    
+    def __hash__(self):
+        return hash(self.cache_key())
 
 class ChangeMetrics(BaseModel):
     baseline_value: float
@@ -180,7 +180,7 @@ async def get_competitive_density(
         density_data = advanced_analytics_service.calculate_advanced_competitive_density(df)
         
         return {
-            "competitive_density": density_data,
+            "competitive_density": density_data.to_dict('records'),
             "filters_applied": filters
         }
         
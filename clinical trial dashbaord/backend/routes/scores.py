@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException
+import pandas as pd
 from services.data_service import DataService
 
 router = APIRouter(prefix="/scores", tags=["scores"])
@@ -10,10 +11,16 @@ data_service = DataService()
 async def get_scores():
     """Get success scores for interventional trials"""
     try:
+        scores_df = data_service.scores_df
+        average_score = 0
+        if len(scores_df):
+            # Breakdowns without a total_score count as 0
+            total_scores = scores_df['total_score'].fillna(0) if 'total_score' in scores_df.columns else pd.Series(0.0, index=scores_df.index)
+            average_score = float(total_scores.mean())
         return {
             "scores": data_service.scores_data,
             "total_scores": len(data_service.scores_data),
-            "average_score": sum(score.get('total_score', 0) for score in data_service.scores_data) / len(data_service.scores_data) if data_service.scores_data else 0
+            "average_score": average_score
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading scores: {str(e)}")
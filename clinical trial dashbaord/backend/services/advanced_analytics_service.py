@@ -11,7 +11,7 @@ class AdvancedAnalyticsService:
     def __init__(self):
         self.external_data_service = ExternalDataService()
     
-    def calculate_comprehensive_whitespace_scores(self, df: pd.DataFrame) -> List[Dict]:
+    def calculate_comprehensive_whitespace_scores(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculate comprehensive whitespace scores using real burden and population data"""
         try:
             # Group by condition and country
@@ -26,124 +26,139 @@ class AdvancedAnalyticsService:
             # Get burden data for Parkinson's disease
             burden_data = self.external_data_service.get_combined_burden_data("Parkinson's disease")
             
-            whitespace_scores = []
-            for _, row in activity_data.iterrows():
-                condition = row['condition']
-                country = row['country']
-                
-                # Get burden data for this country
-                country_burden = self.external_data_service.get_burden_by_country(country, condition)
-                
-                # Get population for this country
-                population = self.external_data_service.get_population_by_country(country)
-                
-                # Calculate trial activity per 100k population
-                trial_activity_per_100k = (row['trial_count'] / population) * 100000 if population > 0 else 0
-                
-                # Calculate normalized scores (z-scores)
-                daly_score = country_burden['daly_per_100k']
-                activity_score = trial_activity_per_100k
-                
-                # Calculate whitespace score: z(DALY) - z(Activity)
-                # For now, use simple normalization, in production use proper z-score calculation
-                whitespace_score = daly_score - (activity_score / 100)
-                
-                # Calculate additional metrics
-                enrollment_feasibility = self._calculate_enrollment_feasibility_score(row['total_enrollment'], row['trial_count'])
-                quality_score = row['avg_quality_score'] if pd.notna(row['avg_quality_score']) else 0
-                
-                whitespace_scores.append({
-                    'condition': condition,
-                    'country': country,
-                    'region': country_burden['region'],
-                    'trial_count': row['trial_count'],
-                    'total_enrollment': row['total_enrollment'],
-                    'avg_quality_score': quality_score,
-                    'trial_activity_per_100k': trial_activity_per_100k,
-                    'burden_daly_per_100k': country_burden['daly_per_100k'],
-                    'burden_prevalence_per_100k': country_burden['prevalence_per_100k'],
-                    'population': population,
-                    'whitespace_score': whitespace_score,
-                    'enrollment_feasibility_score': enrollment_feasibility,
-                    'composite_score': (whitespace_score * 0.6) + (enrollment_feasibility * 0.3) + (quality_score * 0.1)
-                })
+            # Look up burden in one batch per condition and population once per distinct country
+            burden_batches = [
+                self.external_data_service.get_burden_by_countries(group['country'].tolist(), condition).set_axis(group.index)
+                for condition, group in activity_data.groupby('condition', sort=False)
+            ]
+            burden = (
+                pd.concat(burden_batches).reindex(activity_data.index) if burden_batches
+                else self.external_data_service.get_burden_by_countries([])
+            )
+            country_population = {
+                country: self.external_data_service.get_population_by_country(country)
+                for country in activity_data['country'].unique()
+            }
+            
+            whitespace_scores = activity_data
+            whitespace_scores['region'] = burden['region']
+            whitespace_scores['population'] = whitespace_scores['country'].map(country_population)
+            whitespace_scores['burden_daly_per_100k'] = burden['daly_per_100k']
+            whitespace_scores['burden_prevalence_per_100k'] = burden['prevalence_per_100k']
+            
+            # Calculate trial activity per 100k population
+            population = whitespace_scores['population']
+            whitespace_scores['trial_activity_per_100k'] = np.where(
+                population > 0, whitespace_scores['trial_count'] / population.where(population > 0, 1) * 100000, 0
+            )
+            
+            # Calculate whitespace score: z(DALY) - z(Activity)
+            # For now, use simple normalization, in production use proper z-score calculation
+            whitespace_scores['whitespace_score'] = (
+                whitespace_scores['burden_daly_per_100k'] - whitespace_scores['trial_activity_per_100k'] / 100
+            )
+            
+            # Calculate additional metrics
+            whitespace_scores['enrollment_feasibility_score'] = [
+                self._calculate_enrollment_feasibility_score(enrollment, count)
+                for enrollment, count in zip(whitespace_scores['total_enrollment'], whitespace_scores['trial_count'])
+            ]
+            whitespace_scores['avg_quality_score'] = whitespace_scores['avg_quality_score'].fillna(0)
+            whitespace_scores['composite_score'] = (
+                whitespace_scores['whitespace_score'] * 0.6 +
+                whitespace_scores['enrollment_feasibility_score'] * 0.3 +
+                whitespace_scores['avg_quality_score'] * 0.1
+            )
             
             # Sort by composite score (higher = bigger opportunity)
-            whitespace_scores.sort(key=lambda x: x['composite_score'], reverse=True)
+            whitespace_scores = whitespace_scores[[
+                'condition', 'country', 'region', 'trial_count', 'total_enrollment', 'avg_quality_score',
+                'trial_activity_per_100k', 'burden_daly_per_100k', 'burden_prevalence_per_100k', 'population',
+                'whitespace_score', 'enrollment_feasibility_score', 'composite_score'
+            ]].sort_values('composite_score', ascending=False, kind='stable')
             
-            return whitespace_scores[:20]  # Top 20 opportunities
+            return whitespace_scores.head(20).reset_index(drop=True)  # Top 20 opportunities
             
         except Exception as e:
             print(f"Error calculating comprehensive whitespace scores: {e}")
-            return []
+            return pd.DataFrame()
     
-    def calculate_advanced_competitive_density(self, df: pd.DataFrame) -> List[Dict]:
+    def calculate_advanced_competitive_density(self, df: pd.DataFrame) -> pd.DataFrame:
         """Calculate advanced competitive density with market concentration analysis"""
         try:
+            group_keys = ['moa', 'phases', 'conditions']
+            
             # Group by MoA, phase, and condition
-            density_data = df.groupby(['moa', 'phases', 'conditions']).agg({
+            density_data = df.groupby(group_keys).agg({
                 'nctId': 'count',
                 'leadSponsor': 'nunique',
                 'total_quality_score': 'mean',
                 'enrollmentCount': 'sum'
-            }).reset_index()
+            })
+            density_data['group_size'] = df.groupby(group_keys).size()
+            density_data = density_data.reset_index()
+            
+            density_data.columns = ['moa', 'phase', 'condition', 'trial_count', 'sponsor_count', 'avg_quality_score', 'total_enrollment', 'group_size']
+            
+            # Only groups with 2+ trials
+            density_data = density_data[density_data['trial_count'] >= 2]
+            if len(density_data) == 0:
+                return pd.DataFrame()
+            
+            # Sponsor counts for every group in one pass, largest first within each group
+            sponsor_counts = df.groupby(group_keys + ['leadSponsor']).size().reset_index(name='sponsor_trials')
+            sponsor_counts.columns = ['moa', 'phase', 'condition', 'leadSponsor', 'sponsor_trials']
+            sponsor_counts = sponsor_counts.sort_values(
+                ['moa', 'phase', 'condition', 'sponsor_trials'], ascending=[True, True, True, False], kind='stable'
+            )
+            sponsor_counts = sponsor_counts.merge(density_data[['moa', 'phase', 'condition', 'group_size']], on=['moa', 'phase', 'condition'])
             
-            density_data.columns = ['moa', 'phase', 'condition', 'trial_count', 'sponsor_count', 'avg_quality_score', 'total_enrollment']
-            
-            # Calculate advanced metrics for each group
-            advanced_density = []
-            for _, row in density_data.iterrows():
-                if row['trial_count'] >= 2:  # Only groups with 2+ trials
-                    # Get detailed sponsor analysis for this group
-                    group_df = df[
-                        (df['moa'] == row['moa']) & 
-                        (df['phases'] == row['phase']) & 
-                        (df['conditions'] == row['condition'])
-                    ]
-                    
-                    sponsor_counts = group_df['leadSponsor'].value_counts()
-                    total_trials = len(group_df)
-                    
-                    # Calculate HHI
-                    hhi = sum((count / total_trials * 100) ** 2 for count in sponsor_counts)
-                    
-                    # Calculate concentration ratio (top 4 sponsors)
-                    top_4_concentration = sum(sponsor_counts.head(4)) / total_trials * 100
-                    
-                    # Calculate sponsor diversity index (1 - HHI/10000)
-                    diversity_index = 1 - (hhi / 10000)
-                    
-                    # Calculate market maturity score
-                    market_maturity = self._calculate_market_maturity_score(
-                        row['trial_count'], 
-                        row['sponsor_count'], 
-                        row['avg_quality_score']
-                    )
-                    
-                    advanced_density.append({
-                        'moa': row['moa'],
-                        'phase': row['phase'],
-                        'condition': row['condition'],
-                        'trial_count': row['trial_count'],
-                        'sponsor_count': row['sponsor_count'],
-                        'total_enrollment': row['total_enrollment'],
-                        'avg_quality_score': row['avg_quality_score'],
-                        'hhi_score': hhi,
-                        'top_4_concentration': top_4_concentration,
-                        'diversity_index': diversity_index,
-                        'market_maturity': market_maturity,
-                        'competition_level': self._classify_competition_level(hhi, diversity_index),
-                        'opportunity_score': self._calculate_opportunity_score(hhi, diversity_index, market_maturity)
-                    })
+            # Calculate HHI and concentration ratio (top 4 sponsors)
+            sponsor_counts['share_sq'] = (sponsor_counts['sponsor_trials'] / sponsor_counts['group_size'] * 100) ** 2
+            sponsor_counts['top_4'] = sponsor_counts['sponsor_trials'].where(
+                sponsor_counts.groupby(['moa', 'phase', 'condition']).cumcount() < 4, 0
+            )
+            concentration = sponsor_counts.groupby(['moa', 'phase', 'condition']).agg(
+                hhi_score=('share_sq', 'sum'),
+                top_4_trials=('top_4', 'sum')
+            ).reset_index()
+            
+            advanced_density = density_data.merge(concentration, on=['moa', 'phase', 'condition'], how='left')
+            advanced_density['hhi_score'] = advanced_density['hhi_score'].fillna(0)
+            advanced_density['top_4_concentration'] = advanced_density['top_4_trials'].fillna(0) / advanced_density['group_size'] * 100
+            
+            # Calculate sponsor diversity index (1 - HHI/10000)
+            advanced_density['diversity_index'] = 1 - (advanced_density['hhi_score'] / 10000)
+            
+            # Calculate market maturity score
+            advanced_density['market_maturity'] = [
+                self._calculate_market_maturity_score(trial_count, sponsor_count, avg_quality)
+                for trial_count, sponsor_count, avg_quality in zip(
+                    advanced_density['trial_count'], advanced_density['sponsor_count'], advanced_density['avg_quality_score']
+                )
+            ]
+            advanced_density['competition_level'] = [
+                self._classify_competition_level(hhi, diversity)
+                for hhi, diversity in zip(advanced_density['hhi_score'], advanced_density['diversity_index'])
+            ]
+            advanced_density['opportunity_score'] = [
+                self._calculate_opportunity_score(hhi, diversity, maturity)
+                for hhi, diversity, maturity in zip(
+                    advanced_density['hhi_score'], advanced_density['diversity_index'], advanced_density['market_maturity']
+                )
+            ]
             
             # Sort by opportunity score (higher = better opportunity)
-            advanced_density.sort(key=lambda x: x['opportunity_score'], reverse=True)
+            advanced_density = advanced_density[[
+                'moa', 'phase', 'condition', 'trial_count', 'sponsor_count', 'total_enrollment', 'avg_quality_score',
+                'hhi_score', 'top_4_concentration', 'diversity_index', 'market_maturity', 'competition_level', 'opportunity_score'
+            ]].sort_values('opportunity_score', ascending=False, kind='stable')
             
-            return advanced_density[:20]  # Top 20 opportunities
+            return advanced_density.head(20).reset_index(drop=True)  # Top 20 opportunities
             
         except Exception as e:
             print(f"Error calculating advanced competitive density: {e}")
-            return []
+            return pd.DataFrame()
     
     def calculate_comprehensive_enrollment_feasibility(self, df: pd.DataFrame) -> Dict:
         """Calculate comprehensive enrollment feasibility metrics"""
@@ -173,46 +188,29 @@ class AdvancedAnalyticsService:
             completed_df['sites'] = 1
             completed_df['per_site_rate'] = completed_df['monthly_enrollment'] / completed_df['sites']
             
-            # Calculate comprehensive metrics
-            median_rate = completed_df['per_site_rate'].median()
-            mean_rate = completed_df['per_site_rate'].mean()
+            # Calculate comprehensive metrics in a single pass over per_site_rate
+            rate_stats = completed_df['per_site_rate'].describe()
+            median_rate = rate_stats['50%']
+            mean_rate = rate_stats['mean']
             
             # Calculate by phase
-            phase_metrics = {}
-            for phase in completed_df['phases'].unique():
-                phase_data = completed_df[completed_df['phases'] == phase]
-                if len(phase_data) > 0:
-                    phase_metrics[phase] = {
-                        'median_rate': float(phase_data['per_site_rate'].median()),
-                        'mean_rate': float(phase_data['per_site_rate'].mean()),
-                        'trial_count': len(phase_data),
-                        'avg_enrollment': float(phase_data['enrollmentCount'].mean())
-                    }
+            phase_metrics = self._group_rate_metrics(completed_df, 'phases')
             
             # Calculate by MoA (if available)
             moa_metrics = {}
             if 'moa' in completed_df.columns:
-                for moa in completed_df['moa'].unique():
-                    if moa != 'Unknown':
-                        moa_data = completed_df[completed_df['moa'] == moa]
-                        if len(moa_data) > 0:
-                            moa_metrics[moa] = {
-                                'median_rate': float(moa_data['per_site_rate'].median()),
-                                'mean_rate': float(moa_data['per_site_rate'].mean()),
-                                'trial_count': len(moa_data),
-                                'avg_enrollment': float(moa_data['enrollmentCount'].mean())
-                            }
+                moa_metrics = self._group_rate_metrics(completed_df[completed_df['moa'] != 'Unknown'], 'moa')
             
             return {
                 "median_enroll_rate_per_site_per_month": float(median_rate) if not pd.isna(median_rate) else 0,
                 "mean_enroll_rate_per_site_per_month": float(mean_rate) if not pd.isna(mean_rate) else 0,
                 "total_completed_trials": len(completed_df),
                 "enrollment_stats": {
-                    "min_rate": float(completed_df['per_site_rate'].min()) if len(completed_df) > 0 else 0,
-                    "max_rate": float(completed_df['per_site_rate'].max()) if len(completed_df) > 0 else 0,
-                    "std_rate": float(completed_df['per_site_rate'].std()) if len(completed_df) > 0 else 0,
-                    "q25_rate": float(completed_df['per_site_rate'].quantile(0.25)) if len(completed_df) > 0 else 0,
-                    "q75_rate": float(completed_df['per_site_rate'].quantile(0.75)) if len(completed_df) > 0 else 0
+                    "min_rate": float(rate_stats['min']),
+                    "max_rate": float(rate_stats['max']),
+                    "std_rate": float(rate_stats['std']),
+                    "q25_rate": float(rate_stats['25%']),
+                    "q75_rate": float(rate_stats['75%'])
                 },
                 "phase_metrics": phase_metrics,
                 "moa_metrics": moa_metrics,
@@ -223,6 +221,24 @@ class AdvancedAnalyticsService:
             print(f"Error calculating comprehensive enrollment feasibility: {e}")
             return self._get_default_enrollment_metrics()
     
+    def _group_rate_metrics(self, completed_df: pd.DataFrame, column: str) -> Dict:
+        """Aggregate per-site enrollment rate metrics for each value of a column"""
+        grouped = completed_df.groupby(column, sort=False).agg(
+            median_rate=('per_site_rate', 'median'),
+            mean_rate=('per_site_rate', 'mean'),
+            trial_count=('per_site_rate', 'size'),
+            avg_enrollment=('enrollmentCount', 'mean')
+        )
+        return {
+            key: {
+                'median_rate': float(row.median_rate),
+                'mean_rate': float(row.mean_rate),
+                'trial_count': int(row.trial_count),
+                'avg_enrollment': float(row.avg_enrollment)
+            }
+            for key, row in zip(grouped.index, grouped.itertuples(index=False))
+        }
+    
     def generate_advanced_strategic_recommendations(self, df: pd.DataFrame) -> Dict:
         """Generate advanced strategic recommendations based on comprehensive analysis"""
         try:
@@ -341,65 +357,65 @@ class AdvancedAnalyticsService:
             "recruitment_efficiency_score": 0
         }
     
-    def _generate_now_recommendations(self, whitespace_data: List, density_data: List, feasibility_data: Dict) -> List[Dict]:
+    def _generate_now_recommendations(self, whitespace_data: pd.DataFrame, density_data: pd.DataFrame, feasibility_data: Dict) -> List[Dict]:
         """Generate immediate action recommendations"""
-        recommendations = []
+        if len(whitespace_data) == 0:
+            return []
         
         # High whitespace + low competition + good feasibility
-        for item in whitespace_data[:5]:
-            if item['composite_score'] > 0.5 and item['enrollment_feasibility_score'] > 0.6:
-                recommendations.append({
-                    "title": f"{item['condition']} in {item['country']}",
-                    "why": [
-                        f"High whitespace score: {item['whitespace_score']:.2f}",
-                        f"Low trial activity: {item['trial_activity_per_100k']:.1f} per 100k",
-                        f"Good enrollment feasibility: {item['enrollment_feasibility_score']:.1f}"
-                    ],
-                    "confidence": min(0.95, item['composite_score']),
-                    "priority": "High",
-                    "estimated_timeline": "6-12 months"
-                })
+        candidates = whitespace_data.nlargest(5, 'composite_score')
+        candidates = candidates[(candidates['composite_score'] > 0.5) & (candidates['enrollment_feasibility_score'] > 0.6)].head(3)
         
-        return recommendations[:3]  # Top 3
+        return [{
+            "title": f"{item['condition']} in {item['country']}",
+            "why": [
+                f"High whitespace score: {item['whitespace_score']:.2f}",
+                f"Low trial activity: {item['trial_activity_per_100k']:.1f} per 100k",
+                f"Good enrollment feasibility: {item['enrollment_feasibility_score']:.1f}"
+            ],
+            "confidence": min(0.95, item['composite_score']),
+            "priority": "High",
+            "estimated_timeline": "6-12 months"
+        } for item in candidates.to_dict('records')]  # Top 3
     
-    def _generate_next_recommendations(self, whitespace_data: List, density_data: List, feasibility_data: Dict) -> List[Dict]:
+    def _generate_next_recommendations(self, whitespace_data: pd.DataFrame, density_data: pd.DataFrame, feasibility_data: Dict) -> List[Dict]:
         """Generate medium-term recommendations"""
-        recommendations = []
+        if len(density_data) == 0:
+            return []
         
         # Moderate whitespace + emerging markets
-        for item in density_data[:5]:
-            if item['opportunity_score'] > 0.6 and item['market_maturity'] < 0.7:
-                recommendations.append({
-                    "title": f"{item['moa']} in {item['phase']} for {item['condition']}",
-                    "why": [
-                        f"Emerging market: {item['market_maturity']:.1f} maturity",
-                        f"Good opportunity score: {item['opportunity_score']:.1f}",
-                        f"Moderate competition: {item['competition_level']}"
-                    ],
-                    "confidence": item['opportunity_score'],
-                    "priority": "Medium",
-                    "estimated_timeline": "12-24 months"
-                })
+        candidates = density_data.nlargest(5, 'opportunity_score')
+        candidates = candidates[(candidates['opportunity_score'] > 0.6) & (candidates['market_maturity'] < 0.7)].head(3)
         
-        return recommendations[:3]  # Top 3
+        return [{
+            "title": f"{item['moa']} in {item['phase']} for {item['condition']}",
+            "why": [
+                f"Emerging market: {item['market_maturity']:.1f} maturity",
+                f"Good opportunity score: {item['opportunity_score']:.1f}",
+                f"Moderate competition: {item['competition_level']}"
+            ],
+            "confidence": item['opportunity_score'],
+            "priority": "Medium",
+            "estimated_timeline": "12-24 months"
+        } for item in candidates.to_dict('records')]  # Top 3
     
-    def _generate_watch_recommendations(self, whitespace_data: List, density_data: List, feasibility_data: Dict) -> List[Dict]:
+    def _generate_watch_recommendations(self, whitespace_data: pd.DataFrame, density_data: pd.DataFrame, feasibility_data: Dict) -> List[Dict]:
         """Generate long-term monitoring recommendations"""
-        recommendations = []
+        if len(density_data) == 0:
+            return []
         
         # High potential but high risk
-        for item in density_data[5:10]:
-            if item['opportunity_score'] > 0.4 and item['hhi_score'] > 2000:
-                recommendations.append({
-                    "title": f"Monitor {item['moa']} market consolidation",
-                    "why": [
-                        f"High concentration: HHI {item['hhi_score']:.0f}",
-                        f"Potential disruption: {item['opportunity_score']:.1f} score",
-                        f"Market evolution needed"
-                    ],
-                    "confidence": item['opportunity_score'] * 0.8,
-                    "priority": "Monitor",
-                    "estimated_timeline": "24+ months"
-                })
+        candidates = density_data.nlargest(10, 'opportunity_score').iloc[5:10]
+        candidates = candidates[(candidates['opportunity_score'] > 0.4) & (candidates['hhi_score'] > 2000)].head(3)
         
-        return recommendations[:3]  # Top 3
+        return [{
+            "title": f"Monitor {item['moa']} market consolidation",
+            "why": [
+                f"High concentration: HHI {item['hhi_score']:.0f}",
+                f"Potential disruption: {item['opportunity_score']:.1f} score",
+                f"Market evolution needed"
+            ],
+            "confidence": item['opportunity_score'] * 0.8,
+            "priority": "Monitor",
+            "estimated_timeline": "24+ months"
+        } for item in candidates.to_dict('records')]  # Top 3
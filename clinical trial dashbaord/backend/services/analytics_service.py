@@ -1,16 +1,45 @@
+import re
+import copy
+import logging
 import pandas as pd
 import numpy as np
 from typing import Dict, List
-from datetime import datetime, timedelta
+from functools import lru_cache
+from datetime import date, datetime
 from utils.statistics import calculate_change_metrics, split_data_by_period, get_time_window_days
 from utils.ai_annotations import create_annotation_object
 from models.schemas import AnalyticsFilters
 
+log = logging.getLogger(__name__)
+
+# Treatment categories in priority order - first matching category wins
+_TREATMENT_CATEGORIES = {
+    'device': ('Device/Technology', ['electrode', 'brain', 'pet', 'mri', 'ct', 'imaging', 'detection']),
+    'assistive': ('Assistive Devices', ['shoe', 'cane', 'assistive']),
+    'physical': ('Physical Therapy', ['physiotherapy', 'rehabilitation', 'stretching', 'exercise']),
+    'neuromod': ('Neuromodulation', ['tdcs', 'stimulation', 'neurostimulation']),
+    'pharma': ('Pharmaceutical', ['ly03017', 'hydroxychloroquine', 'hcq', 'drug', 'medication', 'pill']),
+    'lifestyle': ('Lifestyle/Diet', ['diet', 'plant-based', 'nutrition', 'lifestyle']),
+    'control': ('Control/Placebo', ['sham', 'placebo', 'control']),
+}
+
+# Anchored lookaheads are tried in order, so the first category with a keyword anywhere in the text wins
+_TREATMENT_CAT_RE = re.compile(
+    '^(?:' + '|'.join(
+        f"(?=.*?(?P<{key}>{'|'.join(map(re.escape, words))}))"
+        for key, (_, words) in _TREATMENT_CATEGORIES.items()
+    ) + ')',
+    re.IGNORECASE | re.DOTALL
+)
+_TREATMENT_CAT_LABELS = {key: label for key, (label, _) in _TREATMENT_CATEGORIES.items()}
+
 class AnalyticsService:
     """Service for handling analytics calculations and data aggregation"""
     
     def __init__(self, data_service):
         self.data_service = data_service
+        # Per-instance LRU of aggregate results keyed on (filters, data version, day)
+        self._aggregate_cached = lru_cache(maxsize=64)(self._aggregate_analytics_data)
     
     def clean_conditions(self, conditions_series: pd.Series) -> pd.Series:
         """Clean and consolidate condition names, especially Parkinson variations"""
@@ -57,83 +86,85 @@ class AnalyticsService:
         
         return sponsors_series.apply(clean_sponsor)
     
-    def filter_data_by_cohort(self, filters: AnalyticsFilters) -> pd.DataFrame:
-        """Filter data based on analytics filters"""
+    def build_cohort_mask(self, filters: AnalyticsFilters):
+        """Build a boolean cohort mask over the analytics source frame"""
         # Use optimized interventional data if available, otherwise fall back to full dataset
         if hasattr(self.data_service, 'optimized_interventional_df') and self.data_service.optimized_interventional_df is not None:
-            filtered_df = self.data_service.optimized_interventional_df.copy()
+            source_df = self.data_service.optimized_interventional_df
         else:
-            filtered_df = self.data_service.df.copy()
+            source_df = self.data_service.df
         
-        # Convert date columns to datetime
-        if 'startDate' in filtered_df.columns:
-            filtered_df['startDate'] = pd.to_datetime(filtered_df['startDate'], errors='coerce')
-        if 'completionDate' in filtered_df.columns:
-            filtered_df['completionDate'] = pd.to_datetime(filtered_df['completionDate'], errors='coerce')
+        # Start dates are parsed once at load time by the data service
+        start_dates = self.data_service.trial_start_dates if 'startDate' in source_df.columns else None
+        
+        # Build one combined mask so only the final subset is materialized
+        mask = np.ones(len(source_df), dtype=bool)
         
         # Filter by phases
         if filters.phases:
-            filtered_df = filtered_df[filtered_df['phases'].isin(filters.phases)]
+            mask &= source_df['phases'].isin(filters.phases).to_numpy()
         
         # Filter by statuses
         if filters.statuses:
-            filtered_df = filtered_df[filtered_df['overallStatus'].isin(filters.statuses)]
+            mask &= source_df['overallStatus'].isin(filters.statuses).to_numpy()
         
         # Filter by countries
         if filters.countries:
-            filtered_df = filtered_df[filtered_df['country'].isin(filters.countries)]
+            mask &= source_df['country'].isin(filters.countries).to_numpy()
         
         # Filter by therapeutic areas/conditions
         if filters.therapeutic_areas:
-            condition_mask = filtered_df['conditions'].fillna('').str.contains('|'.join(filters.therapeutic_areas), case=False, na=False)
-            filtered_df = filtered_df[condition_mask]
+            mask &= source_df['conditions'].fillna('').str.contains('|'.join(filters.therapeutic_areas), case=False, na=False).to_numpy()
         
         # Filter by date range
         if filters.date_range and len(filters.date_range) == 2:
-            start_date = pd.to_datetime(filters.date_range[0])
-            end_date = pd.to_datetime(filters.date_range[1])
-            filtered_df = filtered_df[
-                (filtered_df['startDate'] >= start_date) &
-                (filtered_df['startDate'] <= end_date)
-            ]
+            date_mask = np.zeros(len(source_df), dtype=bool)
+            date_mask[self.data_service.slice_by_date(filters.date_range[0], filters.date_range[1])] = True
+            mask &= date_mask
+        
+        return source_df, start_dates, mask
+    
+    def _materialize_cohort(self, source_df: pd.DataFrame, start_dates: pd.Series, mask: np.ndarray) -> pd.DataFrame:
+        """Copy only the masked rows, with date columns converted to datetime"""
+        filtered_df = source_df.loc[mask].copy()
+        if start_dates is not None:
+            filtered_df['startDate'] = start_dates[mask]
+        if 'completionDate' in filtered_df.columns:
+            filtered_df['completionDate'] = pd.to_datetime(filtered_df['completionDate'], errors='coerce')
         
         return filtered_df
     
     def aggregate_analytics_data(self, filters: AnalyticsFilters) -> Dict:
         """Aggregate analytics data based on filters"""
+        # Every reload bumps the data version, which covers both the full and interventional frames.
+        # Callers get their own copy so mutating a response cannot leak into later cache hits
+        result = self._aggregate_cached(filters, self.data_service.data_version, date.today())
+        return copy.deepcopy(result)
+    
+    def _aggregate_analytics_data(self, filters: AnalyticsFilters, data_version: int, as_of: date) -> Dict:
+        """Aggregate analytics data based on filters (uncached)"""
         # Filter data
-        filtered_df = self.filter_data_by_cohort(filters)
-        print(f"Filtered data: {len(filtered_df)} rows")
+        source_df, start_dates, cohort_mask = self.build_cohort_mask(filters)
+        filtered_df = self._materialize_cohort(source_df, start_dates, cohort_mask)
+        log.debug("Filtered data: %d rows", len(filtered_df))
         
         # Split data into current and baseline periods
         current_data, baseline_data, current_start, baseline_start = split_data_by_period(filtered_df, filters.window)
-        print(f"Current data: {len(current_data)} rows, Baseline data: {len(baseline_data)} rows")
+        log.debug("Current data: %d rows, Baseline data: %d rows", len(current_data), len(baseline_data))
         
         # Calculate metrics
         metrics = {}
         
         # Total trials: count of trials in the past 5 years (consistent baseline metric)
-        # This will be the same regardless of the selected time window
-        current_date = datetime.now()
-        five_years_ago = current_date - timedelta(days=5*365)  # 5 years ago
-        ten_years_ago = current_date - timedelta(days=10*365)  # 10 years ago (baseline)
-        
-        # Filter to only include trials with valid start dates
-        valid_dates_df = filtered_df[filtered_df['startDate'].notna()].copy()
-        
-        # Current period: trials in the past 5 years (simplified logic)
-        current_total_trials = valid_dates_df[valid_dates_df['startDate'] >= five_years_ago]
-        
-        # Baseline period: trials from 10 years ago to 5 years ago (simplified logic)
-        baseline_total_trials = valid_dates_df[
-            (valid_dates_df['startDate'] >= ten_years_ago) & 
-            (valid_dates_df['startDate'] < five_years_ago)
-        ]
+        # This will be the same regardless of the selected time window - membership is precomputed daily
+        past_5y_mask, five_to_ten_y_mask = self.data_service.get_time_buckets()
+        current_total_trials = int((cohort_mask & past_5y_mask).sum())
+        baseline_total_trials = int((cohort_mask & five_to_ten_y_mask).sum())
         
         total_trials_metric = {
-            "current_value": len(current_total_trials),
-            "baseline_value": len(baseline_total_trials),
-            "delta_pct": ((len(current_total_trials) - len(baseline_total_trials)) / len(baseline_total_trials) * 100) if len(baseline_total_trials) > 0 else 0,
+            "current_value": current_total_trials,
+            "baseline_value": baseline_total_trials,
+            "delta_pct": ((current_total_trials - baseline_total_trials) / baseline_total_trials * 100) if baseline_total_trials > 0 else 0,
             "p_value": 1.0,
             "confidence": "Moderate confidence"
         }
@@ -157,21 +188,21 @@ class AnalyticsService:
                 self.data_service.optimized_quality_scores_cache
             )
         
-        # Debug quality scores
-        print(f"Quality scores cache size: {len(self.data_service.optimized_quality_scores_cache)}")
-        print(f"Filtered data size: {len(filtered_df)}")
-        print(f"Valid dates in filtered data: {filtered_df['startDate'].notna().sum()}")
-        print(f"Total trials (past 5 years): {len(current_total_trials)}")
-        print(f"Baseline trials (5-10 years ago): {len(baseline_total_trials)}")
-        print(f"Current data size: {len(current_data)}")
-        print(f"Five years ago date: {five_years_ago}")
-        print(f"Ten years ago date: {ten_years_ago}")
-        if len(current_data) > 0:
-            sample_nct = current_data.iloc[0]['nctId']
-            print(f"Sample NCT ID: {sample_nct}")
-            print(f"Quality score for sample: {self.data_service.optimized_quality_scores_cache.get(str(sample_nct), 'Not found')}")
-            if 'total_quality_score' in current_data.columns:
-                print(f"Direct quality score from CSV: {current_data.iloc[0]['total_quality_score']}")
+        # Debug quality scores - the column scans and lookups only run when debug logging is on
+        if log.isEnabledFor(logging.DEBUG):
+            quality_cache = self.data_service.optimized_quality_scores_cache
+            log.debug("Quality scores cache size: %d", len(quality_cache))
+            log.debug("Filtered data size: %d", len(filtered_df))
+            log.debug("Valid dates in filtered data: %d", filtered_df['startDate'].notna().sum())
+            log.debug("Total trials (past 5 years): %d", current_total_trials)
+            log.debug("Baseline trials (5-10 years ago): %d", baseline_total_trials)
+            log.debug("Current data size: %d", len(current_data))
+            if len(current_data) > 0:
+                sample_nct = current_data.iloc[0]['nctId']
+                log.debug("Sample NCT ID: %s", sample_nct)
+                log.debug("Quality score for sample: %s", quality_cache.get(str(sample_nct), 'Not found'))
+                if 'total_quality_score' in current_data.columns:
+                    log.debug("Direct quality score from CSV: %s", current_data.iloc[0]['total_quality_score'])
         
         # Monthly trial starts with enrollment data
         monthly_data = current_data.groupby(
@@ -202,7 +233,8 @@ class AnalyticsService:
         monthly_starts = monthly_starts[['month', 'count', 'avg_enrollment', 'total_enrollment', 'late_stage_count']]
         
         # Status transitions
-        status_transitions = current_data.groupby('overallStatus').size().to_dict()
+        status_values, status_counts = self._count_values(current_data['overallStatus'])
+        status_transitions = dict(zip(status_values, status_counts.tolist()))
         
         # Geographic distribution - handle missing quality score column
         geo_distribution = current_data.groupby('country').agg({
@@ -218,8 +250,8 @@ class AnalyticsService:
             geo_distribution['avg_quality'] = 0
         
         # Phase distribution
-        phase_timeline = current_data.groupby('phases').size().reset_index(name='count')
-        phase_timeline = phase_timeline[phase_timeline['phases'].notna()]
+        phase_values, phase_counts = self._count_values(current_data['phases'])
+        phase_timeline = pd.DataFrame({'phases': phase_values, 'count': phase_counts})
         
         # Clean conditions and sponsors
         current_data = current_data.copy()
@@ -230,7 +262,7 @@ class AnalyticsService:
         top_conditions = current_data['conditions_cleaned'].value_counts().head(10).to_dict()
         top_sponsors = current_data['sponsors_cleaned'].value_counts().head(10).to_dict()
         top_treatments = current_data['interventions'].value_counts().head(10).to_dict()
-        top_treatment_categories = self.group_treatments_by_category(top_treatments)
+        top_treatment_categories = self.categorize_treatments(current_data['interventions'])
         
         return {
             "metrics": metrics,
@@ -252,6 +284,12 @@ class AnalyticsService:
             }
         }
     
+    def _count_values(self, series: pd.Series):
+        """Count occurrences of each non-null value (sorted) with factorize + bincount"""
+        codes, uniques = pd.factorize(series, sort=True)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        return list(uniques), counts
+    
     def generate_annotations(self, filters: AnalyticsFilters, limit: int = 5) -> List[Dict]:
         """Generate AI annotations for analytics insights"""
         # Get aggregated data
@@ -269,46 +307,11 @@ class AnalyticsService:
         
         return annotations[:limit]
 
-    def categorize_treatment(self, treatment: str) -> str:
-        """Categorize treatment into meaningful groups"""
-        treatment_lower = treatment.lower()
-        
-        # Device/Technology categories
-        if any(word in treatment_lower for word in ['electrode', 'brain', 'pet', 'mri', 'ct', 'imaging', 'detection']):
-            return 'Device/Technology'
-        elif any(word in treatment_lower for word in ['shoe', 'cane', 'assistive']):
-            return 'Assistive Devices'
-        
-        # Therapy categories
-        elif any(word in treatment_lower for word in ['physiotherapy', 'rehabilitation', 'stretching', 'exercise']):
-            return 'Physical Therapy'
-        elif any(word in treatment_lower for word in ['tDCS', 'stimulation', 'neurostimulation']):
-            return 'Neuromodulation'
-        
-        # Pharmaceutical categories
-        elif any(word in treatment_lower for word in ['ly03017', 'hydroxychloroquine', 'hcq', 'drug', 'medication', 'pill']):
-            return 'Pharmaceutical'
-        
-        # Lifestyle/Diet categories
-        elif any(word in treatment_lower for word in ['diet', 'plant-based', 'nutrition', 'lifestyle']):
-            return 'Lifestyle/Diet'
-        
-        # Placebo/Control categories
-        elif any(word in treatment_lower for word in ['sham', 'placebo', 'control']):
-            return 'Control/Placebo'
-        
-        # Default category
-        else:
-            return 'Other'
-    
-    def group_treatments_by_category(self, treatments_dict: dict) -> dict:
-        """Group treatments by category and sum their counts"""
-        categories = {}
-        
-        for treatment, count in treatments_dict.items():
-            category = self.categorize_treatment(treatment)
-            if category not in categories:
-                categories[category] = 0
-            categories[category] += count
-        
-        return categories
+    def categorize_treatments(self, treatments: pd.Series) -> dict:
+        """Count treatment categories across all rows in one vectorized pass"""
+        extracted = treatments.dropna().astype(str).str.extract(_TREATMENT_CAT_RE)
+        if extracted.empty:
+            return {}
+        matched = extracted.notna()
+        categories = matched.idxmax(axis=1).map(_TREATMENT_CAT_LABELS).where(matched.any(axis=1), 'Other')
+        return categories.value_counts().to_dict()
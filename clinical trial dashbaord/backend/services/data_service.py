@@ -1,16 +1,70 @@
 import pandas as pd
+import numpy as np
 import json
 import os
-from typing import Dict, Optional
-from utils.data_processing import preprocess_data
+import sys
+from datetime import date, datetime, timedelta
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from utils.data_processing import preprocess_data, optimize_dtypes
+
+# Column dtype hints for the trials CSV - phases/overallStatus are rewritten by preprocess_data.
+# nctId is held as a contiguous Arrow string array (it is never missing, so no pd.NA reaches JSON)
+TRIALS_CSV_DTYPES = {
+    'nctId': 'string[pyarrow]',
+    'studyType': 'category',
+}
+
+class QualityScoreTable(Mapping):
+    """Read-only nctId -> score dict view backed by a float DataFrame indexed by nctId"""
+    
+    def __init__(self, nct_ids, **score_columns):
+        frame = pd.DataFrame(
+            {name: np.asarray(values, dtype='float64') for name, values in score_columns.items()},
+            # Interned keys share storage with other copies of the same id and compare by identity first
+            index=pd.Index([sys.intern(nct_id) for nct_id in nct_ids], name='nctId', dtype=object)
+        )
+        # Later rows win for duplicated ids, same as building a dict
+        self._frame = frame[~frame.index.duplicated(keep='last')]
+        self._columns = list(self._frame.columns)
+        self._values = self._frame.to_numpy()
+    
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Get the underlying score DataFrame"""
+        return self._frame
+    
+    def __getitem__(self, nct_id) -> Dict:
+        pos = self._frame.index.get_loc(nct_id)
+        return dict(zip(self._columns, self._values[pos].tolist()))
+    
+    def __contains__(self, nct_id) -> bool:
+        return nct_id in self._frame.index
+    
+    def __iter__(self):
+        return iter(self._frame.index)
+    
+    def __len__(self) -> int:
+        return len(self._frame)
 
 class DataService:
     """Singleton service for managing clinical trial data"""
     
     _instance = None
     _df = None
+    _optimized_interventional_df = None
     _quality_scores_cache = {}
     _scores_data = []
+    _scores_df = pd.DataFrame()
+    _trial_start_dates = pd.Series([], dtype='datetime64[ns]')
+    _trial_start_np = np.array([], dtype='datetime64[ns]')
+    _sort_idx_by_start = np.array([], dtype=np.intp)
+    _sorted_starts = np.array([], dtype='datetime64[ns]')
+    _time_buckets_date = None
+    _data_version = 0  # Bumped whenever the trial frames are (re)loaded
+    _nct_index = pd.Index([], dtype=object)
     
     def __new__(cls):
         if cls._instance is None:
@@ -25,97 +79,176 @@ class DataService:
     def _load_data(self):
         """Load and preprocess all data"""
         print("Loading clinical trials data...")
-        try:
-            # Load the original CSV that contains both interventional and observational trials
-            print("Loading original CSV with all trial types...")
-            self._df = pd.read_csv("../data/parkinson_trials_2010_cleaned.csv", low_memory=False)
-            print(f"Raw CSV loaded: {len(self._df)} rows, {len(self._df.columns)} columns")
-            
-            # Preprocess data once
-            self._df = preprocess_data(self._df)
-            print(f"Loaded and preprocessed {len(self._df)} trials")
+        self._data_version += 1
+        # The side files don't depend on the main CSV - read them concurrently while it is
+        # parsed (the C parser and file I/O release the GIL)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            quality_scores_future = executor.submit(self._read_quality_scores)
+            standardized_future = executor.submit(self._read_standardized_interventional)
+            breakdowns_future = executor.submit(self._read_score_breakdowns)
             
-            # Load pre-calculated quality scores
-            print("Loading pre-calculated quality scores...")
             try:
-                with open("../data/quality_scores.json", "r") as f:
-                    self._quality_scores_cache = json.load(f)
-                print(f"✅ Loaded {len(self._quality_scores_cache)} pre-calculated quality scores")
-            except FileNotFoundError:
-                print("⚠️  No pre-calculated scores found.")
-                self._quality_scores_cache = {}
-            except Exception as e:
-                print(f"❌ Error loading quality scores: {e}")
-                self._quality_scores_cache = {}
+                # Load the original CSV that contains both interventional and observational trials
+                print("Loading original CSV with all trial types...")
+                self._df = self._read_trials_csv("../data/parkinson_trials_2010_cleaned.csv")
+                print(f"Raw CSV loaded: {len(self._df)} rows, {len(self._df.columns)} columns")
                 
-            # Load optimized interventional trials CSV
-            try:
-                self._optimized_interventional_df = pd.read_csv("../data/interventional_trials_with_scores_standardized.csv")
-                print("✅ Loaded optimized interventional trials")
+                # Preprocess data once
+                self._df = optimize_dtypes(preprocess_data(self._df))
+                print(f"Loaded and preprocessed {len(self._df)} trials")
+                
+                # Hash index over nctId for O(1) single-trial lookups
+                self._nct_index = pd.Index(self._df['nctId'], dtype=object)
                 
-                # Create optimized quality scores cache for interventional trials
-                self._optimized_quality_scores_cache = {}
-                for _, row in self._optimized_interventional_df.iterrows():
-                    nct_id = str(row['nctId'])
-                    if pd.notna(row['total_quality_score']):
-                        self._optimized_quality_scores_cache[nct_id] = {
-                            'total_score': float(row['total_quality_score']),
-                            'quality_score': float(row['quality_score']) if pd.notna(row['quality_score']) else 0.0
-                        }
-                print("✅ Created optimized quality scores cache for", len(self._optimized_quality_scores_cache), "trials")
-            except FileNotFoundError:
-                print("⚠️ Standardized interventional trials file not found, using original file")
-                self._optimized_interventional_df = self._df[self._df['studyType'] == 'INTERVENTIONAL'].copy()
-                self._optimized_quality_scores_cache = self._quality_scores_cache
+                # Pre-calculated quality scores
+                self._quality_scores_cache = quality_scores_future.result()
                     
-        except Exception as e:
-            print(f"Error loading data: {e}")
-            import traceback
-            traceback.print_exc()
-            self._df = pd.DataFrame()
+                # Optimized interventional trials CSV
+                try:
+                    self._optimized_interventional_df = standardized_future.result()
+                    print("✅ Loaded optimized interventional trials")
+                    
+                    # Create optimized quality scores cache for interventional trials
+                    scored = self._optimized_interventional_df[self._optimized_interventional_df['total_quality_score'].notna()]
+                    self._optimized_quality_scores_cache = QualityScoreTable(
+                        scored['nctId'].astype(str).to_numpy(),
+                        total_score=scored['total_quality_score'],
+                        quality_score=scored['quality_score'].fillna(0.0)
+                    )
+                    print("✅ Created optimized quality scores cache for", len(self._optimized_quality_scores_cache), "trials")
+                except FileNotFoundError:
+                    print("⚠️ Standardized interventional trials file not found, using original file")
+                    # Positional index into the shared frame - downstream code only reads this subset
+                    self._interventional_idx = np.flatnonzero(self._df['studyType'].to_numpy() == 'INTERVENTIONAL')
+                    self._optimized_interventional_df = self._df.iloc[self._interventional_idx]
+                    self._optimized_quality_scores_cache = self._quality_scores_cache
+                
+                self._index_trial_start_dates()
+                        
+            except Exception as e:
+                print(f"Error loading data: {e}")
+                import traceback
+                traceback.print_exc()
+                self._df = pd.DataFrame()
+            
+            # Detailed breakdowns for success scores
+            self._scores_data = breakdowns_future.result()
+        self._scores_df = self._build_scores_frame(self._scores_data)
         
-        # Load detailed breakdowns for success scores
+        self._reset_lookup_caches()
+    
+    def _read_quality_scores(self) -> Dict:
+        """Read pre-calculated quality scores (empty dict when unavailable)"""
+        print("Loading pre-calculated quality scores...")
+        try:
+            with open("../data/quality_scores.json", "r") as f:
+                quality_scores = json.load(f)
+            # row_hash is the scorer's change-detection bookkeeping, not part of the served score
+            for entry in quality_scores.values():
+                entry.pop('row_hash', None)
+            print(f"✅ Loaded {len(quality_scores)} pre-calculated quality scores")
+            return quality_scores
+        except FileNotFoundError:
+            print("⚠️  No pre-calculated scores found.")
+        except Exception as e:
+            print(f"❌ Error loading quality scores: {e}")
+        return {}
+    
+    def _read_standardized_interventional(self) -> pd.DataFrame:
+        """Read the standardized interventional trials CSV (raises FileNotFoundError when missing)"""
+        csv_path = "../data/interventional_trials_with_scores_standardized.csv"
+        parquet_path = "../data/interventional_trials_with_scores_standardized.parquet"
+        # standardize_locations.py writes a Parquet copy alongside the CSV - use it unless it is stale
+        if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path):
+            try:
+                # Parquet hands back missing strings as None; match the CSV reader's NaN
+                return optimize_dtypes(pd.read_parquet(parquet_path).fillna(np.nan))
+            except Exception as e:
+                print(f"⚠️  Could not read standardized Parquet ({e}), using CSV")
+        return optimize_dtypes(pd.read_csv(csv_path))
+    
+    def _read_score_breakdowns(self) -> list:
+        """Read detailed breakdowns for success scores (empty list when unavailable)"""
         print("Loading detailed breakdowns for success scores...")
         try:
-            self._scores_data = []
+            scores_data = []
             with open("../data/detailed_breakdowns.jsonl", "r") as f:
                 for line in f:
-                    self._scores_data.append(json.loads(line.strip()))
-            print(f"✅ Loaded {len(self._scores_data)} detailed breakdowns")
+                    scores_data.append(json.loads(line.strip()))
+            print(f"✅ Loaded {len(scores_data)} detailed breakdowns")
+            return scores_data
         except FileNotFoundError:
             print("⚠️  No detailed breakdowns found.")
-            self._scores_data = []
         except Exception as e:
             print(f"❌ Error loading detailed breakdowns: {e}")
-            self._scores_data = []
+        return []
+    
+    def _build_scores_frame(self, scores_data: list) -> pd.DataFrame:
+        """Flatten detailed breakdowns into a frame indexed by nct_id"""
+        if not scores_data:
+            return pd.DataFrame()
+        scores_df = pd.json_normalize(scores_data)
+        if 'nct_id' in scores_df.columns:
+            scores_df = scores_df.set_index('nct_id')
+        return scores_df
+    
+    def _reset_lookup_caches(self):
+        """Create fresh LRU caches for single-trial lookups (called on every data load)"""
+        self._cached_trial_lookup = lru_cache(maxsize=4096)(self._lookup_trial)
+        self._cached_quality_lookup = lru_cache(maxsize=4096)(self._lookup_quality_score)
     
-    def _load_optimized_interventional_data(self):
-        """Load optimized interventional trials data for faster queries"""
+    def _index_trial_start_dates(self):
+        """Parse start dates of the analytics frame once for date-window lookups"""
+        frame = self._optimized_interventional_df if self._optimized_interventional_df is not None else self._df
+        self._trial_start_dates = pd.to_datetime(frame['startDate'], errors='coerce')
+        self._trial_start_np = self._trial_start_dates.to_numpy(dtype='datetime64[ns]')
+        self._time_buckets_date = None
+        
+        # Sorted start dates (NaT last) so date windows are a binary search instead of a full scan
+        self._sort_idx_by_start = np.argsort(self._trial_start_np, kind='stable')
+        self._sorted_starts = self._trial_start_np[self._sort_idx_by_start]
+    
+    def _rebuild_time_buckets(self):
+        """Compute past-5-year and 5-10-year start date membership masks"""
+        # Cutoffs keep the time of day, as the per-request filter did: a trial starting exactly
+        # 5*365 days ago is already outside the past 5 years. Start dates carry no time, so
+        # the masks stay valid for the rest of the day
+        now = datetime.now()
+        five_years_ago = np.datetime64(now - timedelta(days=5*365), 'ns')
+        ten_years_ago = np.datetime64(now - timedelta(days=10*365), 'ns')
+        # NaT compares False, so trials without a start date fall in neither bucket
+        self._mask_past5y = self._trial_start_np >= five_years_ago
+        self._mask_5to10y = (self._trial_start_np >= ten_years_ago) & (self._trial_start_np < five_years_ago)
+        self._time_buckets_date = now.date()
+    
+    def get_time_buckets(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get (past 5 years, 5-10 years ago) masks, rebuilt when the day changes"""
+        if self._time_buckets_date != date.today():
+            self._rebuild_time_buckets()
+        return self._mask_past5y, self._mask_5to10y
+    
+    def slice_by_date(self, start, end) -> np.ndarray:
+        """Get positional indices of analytics rows with start date in [start, end]"""
+        lo = np.searchsorted(self._sorted_starts, np.datetime64(pd.Timestamp(start), 'ns'), side='left')
+        hi = np.searchsorted(self._sorted_starts, np.datetime64(pd.Timestamp(end), 'ns'), side='right')
+        return self._sort_idx_by_start[lo:hi]
+    
+    def _read_trials_csv(self, path: str) -> pd.DataFrame:
+        """Read a trials CSV with the pyarrow engine, falling back to the default parser"""
         try:
-            optimized_path = "../data/interventional_trials_with_scores.csv"
-            if os.path.exists(optimized_path):
-                print("Loading optimized interventional trials CSV...")
-                self._optimized_interventional_df = pd.read_csv(optimized_path, low_memory=False)
-                self._optimized_interventional_df = preprocess_data(self._optimized_interventional_df)
-                print(f"✅ Loaded {len(self._optimized_interventional_df)} optimized interventional trials")
-                
-                # Create optimized quality scores cache
-                self._optimized_quality_scores_cache = {}
-                for _, trial in self._optimized_interventional_df.iterrows():
-                    nct_id = str(trial['nctId']).strip()
-                    self._optimized_quality_scores_cache[nct_id] = {
-                        'base_score': trial.get('quality_score', 0),
-                        'total_score': trial.get('total_quality_score', 0)
-                    }
-                print(f"✅ Created optimized quality scores cache for {len(self._optimized_quality_scores_cache)} trials")
-            else:
-                print("⚠️  Optimized interventional CSV not found, will use full dataset for all queries")
-                self._optimized_interventional_df = None
-                self._optimized_quality_scores_cache = {}
+            return pd.read_csv(path, engine='pyarrow', dtype=TRIALS_CSV_DTYPES)
+        except FileNotFoundError:
+            raise
         except Exception as e:
-            print(f"❌ Error loading optimized interventional data: {e}")
-            self._optimized_interventional_df = None
-            self._optimized_quality_scores_cache = {}
+            print(f"⚠️  pyarrow CSV engine unavailable ({e}), using default parser")
+            # Without pyarrow the Arrow string dtype is unavailable too - use Python-backed strings
+            dtypes = {col: ('string' if dtype == 'string[pyarrow]' else dtype) for col, dtype in TRIALS_CSV_DTYPES.items()}
+            return pd.read_csv(path, low_memory=False, dtype=dtypes)
+    
+    @property
+    def data_version(self) -> int:
+        """Counter identifying the currently loaded data (changes on every reload)"""
+        return self._data_version
     
     @property
     def df(self) -> pd.DataFrame:
@@ -127,6 +260,11 @@ class DataService:
         """Get the optimized interventional dataframe"""
         return self._optimized_interventional_df
     
+    @property
+    def trial_start_dates(self) -> pd.Series:
+        """Get the parsed start dates of the analytics frame"""
+        return self._trial_start_dates
+    
     @property
     def quality_scores_cache(self) -> Dict:
         """Get the quality scores cache"""
@@ -142,16 +280,35 @@ class DataService:
         """Get the scores data"""
         return self._scores_data
     
+    @property
+    def scores_df(self) -> pd.DataFrame:
+        """Get detailed breakdowns as a DataFrame indexed by nct_id"""
+        return self._scores_df
+    
     def get_trial_by_nct_id(self, nct_id: str) -> Optional[Dict]:
-        """Get a specific trial by NCT ID"""
-        trial = self._df[self._df['nctId'] == nct_id]
-        if len(trial) > 0:
-            return trial.iloc[0].to_dict()
-        return None
+        """Get a specific trial by NCT ID (cached - treat the result as read-only)"""
+        return self._cached_trial_lookup(nct_id)
+    
+    def _lookup_trial(self, nct_id: str) -> Optional[Dict]:
+        """Resolve a trial row through the nctId hash index"""
+        try:
+            pos = self._nct_index.get_loc(nct_id)
+        except KeyError:
+            return None
+        
+        # Duplicated ids give a slice or boolean mask - keep the first match
+        if isinstance(pos, slice):
+            pos = pos.start
+        elif isinstance(pos, np.ndarray):
+            pos = int(pos.argmax())
+        return self._df.iloc[pos].to_dict()
     
     def get_quality_score(self, nct_id: str) -> Dict:
-        """Get quality score for a specific trial"""
-        nct_id_str = str(nct_id).strip()
+        """Get quality score for a specific trial (cached - treat the result as read-only)"""
+        return self._cached_quality_lookup(sys.intern(str(nct_id).strip()))
+    
+    def _lookup_quality_score(self, nct_id_str: str) -> Dict:
+        """Resolve a quality score from the pre-calculated cache"""
         if nct_id_str in self._quality_scores_cache:
             return self._quality_scores_cache[nct_id_str]
         else:
@@ -4,8 +4,68 @@ import json
 import os
 from typing import Dict, List, Optional
 from datetime import datetime
+from functools import lru_cache
 import time
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    orjson = None
+
+# Map countries to burden regions
+COUNTRY_TO_REGION = {
+    "United States": "United States",
+    "Canada": "United States",  # Group with US for burden data
+    "United Kingdom": "Europe",
+    "Germany": "Europe",
+    "France": "Europe",
+    "Italy": "Europe",
+    "Spain": "Europe",
+    "Netherlands": "Europe",
+    "Belgium": "Europe",
+    "Switzerland": "Europe",
+    "Sweden": "Europe",
+    "Norway": "Europe",
+    "Denmark": "Europe",
+    "Finland": "Europe",
+    "Australia": "Asia",  # Group with Asia for burden data
+    "Japan": "Asia",
+    "South Korea": "Asia",
+    "China": "Asia",
+    "India": "Asia",
+    "Brazil": "Latin America",
+    "Mexico": "Latin America",
+    "Argentina": "Latin America",
+    "South Africa": "Africa",
+    "Israel": "Asia"
+}
+
+DEFAULT_BURDEN_REGION = "United States"
+
+BURDEN_DEFAULTS = {
+    "daly_per_100k": 0.5,
+    "prevalence_per_100k": 0.2,
+    "incidence_per_100k": 0.01,
+    "mortality_per_100k": 0.006
+}
+
+def _read_json_file(path: str) -> Dict:
+    """Read a JSON cache file, using orjson when available"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def _write_json_file(path: str, data: Dict):
+    """Write a JSON cache file, using orjson when available"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
 class ExternalDataService:
     """Service for fetching external data from WHO, IHME, UN, and World Bank"""
     
@@ -13,6 +73,14 @@ class ExternalDataService:
         self.cache_dir = "../data/external"
         self.ensure_cache_directory()
         
+        # In-process caches over the on-disk JSON - the data is static per (condition, year)
+        self._ihme_cache = lru_cache(maxsize=128)(self._load_ihme_burden_data)
+        self._who_cache = lru_cache(maxsize=128)(self._load_who_burden_data)
+        self._un_population_cache = lru_cache(maxsize=128)(self._load_un_population_data)
+        self._world_bank_population_cache = lru_cache(maxsize=128)(self._load_world_bank_population_data)
+        self._region_burden_cache = lru_cache(maxsize=32)(self._build_region_burden_df)
+        self._population_table_cache = lru_cache(maxsize=16)(self._build_population_table)
+        
     def ensure_cache_directory(self):
         """Ensure the external data cache directory exists"""
         os.makedirs(self.cache_dir, exist_ok=True)
@@ -21,15 +89,17 @@ class ExternalDataService:
     
     def fetch_ihme_burden_data(self, condition: str = "Parkinson's disease", year: int = 2020) -> Dict:
         """Fetch burden data from IHME Global Burden of Disease"""
+        return self._ihme_cache(condition, year)
+    
+    def _load_ihme_burden_data(self, condition: str, year: int) -> Dict:
+        """Load IHME burden data from the disk cache, building it on first use"""
         cache_file = f"{self.cache_dir}/burden/ihme_{condition.lower().replace(' ', '_')}_{year}.json"
         
-        # Check cache first
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
+        # Check cache first - a missing or unreadable file falls through to rebuilding it
+        try:
+            return _read_json_file(cache_file)
+        except (OSError, ValueError):
+            pass
         
         try:
             # IHME GBD Results Tool API endpoint
@@ -75,8 +145,7 @@ class ExternalDataService:
             }
             
             # Cache the data
-            with open(cache_file, 'w') as f:
-                json.dump(burden_data, f, indent=2)
+            _write_json_file(cache_file, burden_data)
             
             return burden_data
             
@@ -87,15 +156,17 @@ class ExternalDataService:
     
     def fetch_who_burden_data(self, condition: str = "Parkinson's disease") -> Dict:
         """Fetch burden data from WHO Global Health Observatory"""
+        return self._who_cache(condition)
+    
+    def _load_who_burden_data(self, condition: str) -> Dict:
+        """Load WHO burden data from the disk cache, building it on first use"""
         cache_file = f"{self.cache_dir}/burden/who_{condition.lower().replace(' ', '_')}.json"
         
-        # Check cache first
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
+        # Check cache first - a missing or unreadable file falls through to rebuilding it
+        try:
+            return _read_json_file(cache_file)
+        except (OSError, ValueError):
+            pass
         
         try:
             # WHO GHO API endpoint
@@ -136,8 +207,7 @@ class ExternalDataService:
             }
             
             # Cache the data
-            with open(cache_file, 'w') as f:
-                json.dump(who_data, f, indent=2)
+            _write_json_file(cache_file, who_data)
             
             return who_data
             
@@ -147,15 +217,17 @@ class ExternalDataService:
     
     def fetch_un_population_data(self, year: int = 2020) -> Dict:
         """Fetch population data from UN World Population Prospects"""
+        return self._un_population_cache(year)
+    
+    def _load_un_population_data(self, year: int) -> Dict:
+        """Load UN population data from the disk cache, building it on first use"""
         cache_file = f"{self.cache_dir}/population/un_population_{year}.json"
         
-        # Check cache first
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
+        # Check cache first - a missing or unreadable file falls through to rebuilding it
+        try:
+            return _read_json_file(cache_file)
+        except (OSError, ValueError):
+            pass
         
         try:
             # UN WPP data (simplified for now)
@@ -266,8 +338,7 @@ class ExternalDataService:
             }
             
             # Cache the data
-            with open(cache_file, 'w') as f:
-                json.dump(population_data, f, indent=2)
+            _write_json_file(cache_file, population_data)
             
             return population_data
             
@@ -277,27 +348,29 @@ class ExternalDataService:
     
     def fetch_world_bank_population_data(self, year: int = 2020) -> Dict:
         """Fetch population data from World Bank"""
+        return self._world_bank_population_cache(year)
+    
+    def _load_world_bank_population_data(self, year: int) -> Dict:
+        """Load World Bank population data from the disk cache, building it on first use"""
         cache_file = f"{self.cache_dir}/population/worldbank_population_{year}.json"
         
-        # Check cache first
-        if os.path.exists(cache_file):
-            try:
-                with open(cache_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
+        # Check cache first - a missing or unreadable file falls through to rebuilding it
+        try:
+            return _read_json_file(cache_file)
+        except (OSError, ValueError):
+            pass
         
         try:
             # World Bank API endpoint
             # For now, we'll use the same data as UN
             # In production, you'd use the actual World Bank API
             
-            wb_data = self.fetch_un_population_data(year)
+            # Copy so the cached UN data is not modified
+            wb_data = dict(self.fetch_un_population_data(year))
             wb_data["source"] = "World Bank"
             
             # Cache the data
-            with open(cache_file, 'w') as f:
-                json.dump(wb_data, f, indent=2)
+            _write_json_file(cache_file, wb_data)
             
             return wb_data
             
@@ -347,61 +420,36 @@ class ExternalDataService:
             "regions": {}
         }
         
-        # Merge region data, prioritizing IHME
-        all_regions = set(ihme_data.get("regions", {}).keys()) | set(who_data.get("regions", {}).keys())
+        # Merge region data, prioritizing IHME; WHO only backfills DALY and prevalence
+        burden_columns = list(BURDEN_DEFAULTS)
+        ihme_df = pd.DataFrame.from_dict(ihme_data.get("regions", {}), orient='index').reindex(columns=burden_columns)
+        who_df = pd.DataFrame.from_dict(who_data.get("regions", {}), orient='index').reindex(
+            columns=["daly_per_100k", "prevalence_per_100k"]
+        )
         
-        for region in all_regions:
-            ihme_region = ihme_data.get("regions", {}).get(region, {})
-            who_region = who_data.get("regions", {}).get(region, {})
-            
-            combined_data["regions"][region] = {
-                "daly_per_100k": ihme_region.get("daly_per_100k", who_region.get("daly_per_100k", 0.5)),
-                "prevalence_per_100k": ihme_region.get("prevalence_per_100k", who_region.get("prevalence_per_100k", 0.2)),
-                "incidence_per_100k": ihme_region.get("incidence_per_100k", 0.01),
-                "mortality_per_100k": ihme_region.get("mortality_per_100k", 0.006)
-            }
+        combined = ihme_df.combine_first(who_df)[burden_columns].fillna(BURDEN_DEFAULTS)
+        combined_data["regions"] = combined.to_dict(orient='index')
         
         return combined_data
     
     def get_population_by_country(self, country: str, year: int = 2020) -> int:
         """Get population for a specific country"""
+        return self._population_table_cache(year).get(country, 1000000)  # Default fallback
+    
+    def _build_population_table(self, year: int) -> Dict[str, int]:
+        """Build a country -> population table from the UN data for a year"""
         population_data = self.fetch_un_population_data(year)
-        country_data = population_data.get("regions", {}).get(country, {})
-        return country_data.get("population", 1000000)  # Default fallback
+        return {
+            country: country_data.get("population", 1000000)
+            for country, country_data in population_data.get("regions", {}).items()
+        }
     
     def get_burden_by_country(self, country: str, condition: str = "Parkinson's disease") -> Dict:
         """Get burden data for a specific country"""
         burden_data = self.get_combined_burden_data(condition)
         
-        # Map countries to regions
-        country_to_region = {
-            "United States": "United States",
-            "Canada": "United States",  # Group with US for burden data
-            "United Kingdom": "Europe",
-            "Germany": "Europe",
-            "France": "Europe",
-            "Italy": "Europe",
-            "Spain": "Europe",
-            "Netherlands": "Europe",
-            "Belgium": "Europe",
-            "Switzerland": "Europe",
-            "Sweden": "Europe",
-            "Norway": "Europe",
-            "Denmark": "Europe",
-            "Finland": "Europe",
-            "Australia": "Asia",  # Group with Asia for burden data
-            "Japan": "Asia",
-            "South Korea": "Asia",
-            "China": "Asia",
-            "India": "Asia",
-            "Brazil": "Latin America",
-            "Mexico": "Latin America",
-            "Argentina": "Latin America",
-            "South Africa": "Africa",
-            "Israel": "Asia"
-        }
         
-        region = country_to_region.get(country, "United States")
+        region = COUNTRY_TO_REGION.get(country, DEFAULT_BURDEN_REGION)
         region_data = burden_data.get("regions", {}).get(region, {})
         
         return {
@@ -412,3 +460,17 @@ class ExternalDataService:
             "incidence_per_100k": region_data.get("incidence_per_100k", 0.01),
             "mortality_per_100k": region_data.get("mortality_per_100k", 0.006)
         }
+    
+    def _build_region_burden_df(self, condition: str) -> pd.DataFrame:
+        """Build a region-indexed table of burden metrics for a condition"""
+        regions = self.get_combined_burden_data(condition).get("regions", {})
+        return pd.DataFrame.from_dict(regions, orient='index', columns=list(BURDEN_DEFAULTS))
+    
+    def get_burden_by_countries(self, countries: List[str], condition: str = "Parkinson's disease") -> pd.DataFrame:
+        """Get burden data for many countries at once (one row per entry of countries, in order)"""
+        # Same region mapping and metric defaults as get_burden_by_country
+        regions = pd.Series(countries, dtype=object).map(COUNTRY_TO_REGION).fillna(DEFAULT_BURDEN_REGION)
+        result = self._region_burden_cache(condition).reindex(regions.to_numpy()).fillna(BURDEN_DEFAULTS)
+        result.insert(0, 'region', regions.to_numpy())
+        result.insert(0, 'country', countries)
+        return result.reset_index(drop=True)
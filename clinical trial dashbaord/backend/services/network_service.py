@@ -1,268 +1,382 @@
 import pandas as pd
 import json
-import re
+import sys
 from typing import Dict, List, Set, Tuple, Optional
-from datetime import datetime, timedelta
-from collections import defaultdict, Counter
+from datetime import date, datetime, timedelta
+from collections import defaultdict, Counter, OrderedDict
 import numpy as np
+import heapq
+from operator import itemgetter
+from itertools import chain
 from difflib import SequenceMatcher
+from types import MappingProxyType
+from collections.abc import Mapping
+from functools import lru_cache
+
+try:
+    from rapidfuzz import process
+    from rapidfuzz.distance import JaroWinkler
+except ImportError:  # rapidfuzz is optional; fall back to the pure-Python implementation
+    process = None
+    JaroWinkler = None
+
+# Canonical organization aliases (lowercase alias -> canonical name), frozen at import
+_CANONICAL_ALIASES = MappingProxyType({
+    # Universities
+    'ucsf': 'University of California, San Francisco',
+    'univ. calif. san fran': 'University of California, San Francisco',
+    'uc san francisco': 'University of California, San Francisco',
+    'harvard': 'Harvard University',
+    'stanford': 'Stanford University',
+    'yale': 'Yale University',
+    'upenn': 'University of Pennsylvania',
+    'univ. of pennsylvania': 'University of Pennsylvania',
+    'columbia': 'Columbia University',
+    'uoft': 'University of Toronto',
+    'univ. of toronto': 'University of Toronto',
+    'univ. of melbourne': 'University of Melbourne',
+    'univ. of sydney': 'University of Sydney',
+    'ucl': 'University College London',
+    'univ. college london': 'University College London',
+    'imperial': 'Imperial College London',
+    'imperial college': 'Imperial College London',
+    'oxford university': 'University of Oxford',
+    'cambridge university': 'University of Cambridge',
+    'sjtu': 'Shanghai Jiao Tong University',
+    'pku': 'Peking University',
+    'beijing university': 'Peking University',
+    'thu': 'Tsinghua University',
+    'tsinghua': 'Tsinghua University',
+    'sysu': 'Sun Yat-sen University',
+    'sun yat sen univ': 'Sun Yat-sen University',
+    'snu': 'Seoul National University',
+    'utokyo': 'University of Tokyo',
+    'kyoto univ': 'Kyoto University',
+    'nus': 'National University of Singapore',
+    'ubc': 'University of British Columbia',
+    
+    # Hospitals and Medical Centers
+    'mgh': 'Massachusetts General Hospital',
+    'mass general hospital': 'Massachusetts General Hospital',
+    'mayo': 'Mayo Clinic',
+    'mayo foundation': 'Mayo Clinic',
+    'cleveland clinic foundation': 'Cleveland Clinic',
+    'fred hutch': 'Fred Hutchinson Cancer Research Center',
+    'dana farber': 'Dana-Farber Cancer Institute',
+    'mskcc': 'Memorial Sloan Kettering Cancer Center',
+    'sloan kettering': 'Memorial Sloan Kettering Cancer Center',
+    'charite': 'Charité - Universitätsmedizin Berlin',
+    'charite berlin': 'Charité - Universitätsmedizin Berlin',
+    
+    # Government/Research Institutes
+    'nci': 'National Cancer Institute (NCI)',
+    'nih nci': 'National Cancer Institute (NCI)',
+    'natl cancer institute': 'National Cancer Institute (NCI)',
+    'nih': 'National Institutes of Health (NIH)',
+    'u.s. nih': 'National Institutes of Health (NIH)',
+    'inserm': 'Institut National de la Santé et de la Recherche Médicale',
+    'karolinska institute': 'Karolinska Institutet',
+    
+    # Pharmaceutical Companies
+    'roche': 'F. Hoffmann-La Roche AG',
+    'hoffmann-la roche': 'F. Hoffmann-La Roche AG',
+    'roche ag': 'F. Hoffmann-La Roche AG',
+    'novartis': 'Novartis AG',
+    'novartis pharmaceuticals': 'Novartis AG',
+    'pfizer': 'Pfizer Inc.',
+    'pfizer incorporated': 'Pfizer Inc.',
+    'gsk': 'GlaxoSmithKline plc',
+    'glaxo': 'GlaxoSmithKline plc',
+    'glaxosmithkline': 'GlaxoSmithKline plc',
+    'glaxo smith kline': 'GlaxoSmithKline plc',
+    'astrazeneca': 'AstraZeneca plc',
+    'astra zeneca': 'AstraZeneca plc',
+    'sanofi-aventis': 'Sanofi',
+    'aventis': 'Sanofi',
+    'merck': 'Merck & Co., Inc.',
+    'msd': 'Merck & Co., Inc.',
+    'merck sharp & dohme': 'Merck & Co., Inc.',
+    'j&j': 'Johnson & Johnson',
+    'janssen': 'Johnson & Johnson',
+    'janssen pharmaceuticals': 'Johnson & Johnson',
+    'lilly': 'Eli Lilly and Company',
+    'eli lilly': 'Eli Lilly and Company',
+    
+    # Common NIH institutes
+    'national institutes of health (nih)': 'National Institutes of Health (NIH)',
+    'national institute of neurological disorders and stroke (ninds)': 'National Institute of Neurological Disorders and Stroke (NINDS)',
+    'national institute on aging (nia)': 'National Institute on Aging (NIA)',
+    'national institute of diabetes and digestive and kidney diseases (niddk)': 'National Institute of Diabetes and Digestive and Kidney Diseases (NIDDK)',
+    'national institute of allergy and infectious diseases (niaid)': 'National Institute of Allergy and Infectious Diseases (NIAID)',
+    'national center for advancing translational sciences (ncats)': 'National Center for Advancing Translational Sciences (NCATS)',
+    'national institute for biomedical imaging and bioengineering (nibib)': 'National Institute for Biomedical Imaging and Bioengineering (NIBIB)',
+    'eunice kennedy shriver national institute of child health and human development (nichd)': 'Eunice Kennedy Shriver National Institute of Child Health and Human Development (NICHD)',
+    'national institute on deafness and other communication disorders (nidcd)': 'National Institute on Deafness and Other Communication Disorders (NIDCD)',
+    
+    # Parkinson's organizations
+    "michael j. fox foundation for parkinson's research": "Michael J. Fox Foundation for Parkinson's Research",
+    "parkinson's uk": "Parkinson's UK",
+    'parkinson society canada': 'Parkinson Society Canada',
+    'the parkinson study group': 'The Parkinson Study Group',
+    
+    # Major universities
+    'university of california, los angeles': 'University of California, Los Angeles',
+    'university of california, san francisco': 'University of California, San Francisco',
+    'university of california, san diego': 'University of California, San Diego',
+    'duke university': 'Duke University',
+    'stanford university': 'Stanford University',
+    'harvard medical school (hms and hsdm)': 'Harvard Medical School',
+    'yale university': 'Yale University',
+    'northwestern university': 'Northwestern University',
+    'university of chicago': 'University of Chicago',
+    'university of michigan': 'University of Michigan',
+    'university of minnesota': 'University of Minnesota',
+    'emory university': 'Emory University',
+    'university of pittsburgh': 'University of Pittsburgh',
+    'washington university school of medicine': 'Washington University School of Medicine',
+    'rush university medical center': 'Rush University Medical Center',
+    'rush university': 'Rush University',
+    'case western reserve university': 'Case Western Reserve University',
+    'purdue university': 'Purdue University',
+    'university of cincinnati': 'University of Cincinnati',
+    'university of utah': 'University of Utah',
+    'university of florida': 'University of Florida',
+    'university of alabama at birmingham': 'University of Alabama at Birmingham',
+    'university of kentucky': 'University of Kentucky',
+    'university of tennessee, knoxville': 'The University of Tennessee, Knoxville',
+    'university of idaho': 'University of Idaho',
+    'university of rochester': 'University of Rochester',
+    'university of castilla-la mancha': 'University of Castilla-La Mancha',
+    'university of milano bicocca': 'University of Milano Bicocca',
+    'university of bologna': 'University of Bologna',
+    'universidad autonoma de san luis potosí': 'Universidad Autonoma de San Luis Potosí',
+    'mcgill university': 'McGill University',
+    'ottawa hospital research institute': 'Ottawa Hospital Research Institute',
+    'university of south florida': 'University of South Florida',
+    'university of illinois at chicago': 'University of Illinois at Chicago',
+    'university at buffalo': 'University at Buffalo',
+    'oregon health and science university': 'Oregon Health and Science University',
+    'cedars-sinai medical center': 'Cedars-Sinai Medical Center',
+    'arizona state university': 'Arizona State University',
+    'augusta university': 'Augusta University',
+    'albany medical college': 'Albany Medical College',
+    'beth israel deaconess medical center': 'Beth Israel Deaconess Medical Center',
+    'johns hopkins university': 'Johns Hopkins University',
+    'wake forest university': 'Wake Forest University',
+    'centre for addiction and mental health': 'Centre for Addiction and Mental Health',
+    'banner health': 'Banner Health',
+    'massachusetts general hospital': 'Massachusetts General Hospital',
+    'mayo clinic': 'Mayo Clinic',
+    
+    # Pharmaceutical companies
+    'sanofi': 'Sanofi',
+    'medtronic': 'Medtronic',
+    'boston scientific corporation': 'Boston Scientific Corporation',
+    'highland instruments, inc.': 'Highland Instruments, Inc.',
+    'oryon cell therapies': 'Oryon Cell Therapies',
+    'nebraska neuroscience alliance': 'Nebraska Neuroscience Alliance',
+    'sage bionetworks': 'Sage Bionetworks',
+    'tfs trial form support': 'TFS Trial Form Support',
+    'shanghai icell biotechnology co., ltd, shanghai, china': 'Shanghai iCELL Biotechnology Co., Ltd',
+    'gateway institute for brain research': 'Gateway Institute for Brain Research',
+    'nova southeastern university': 'Nova Southeastern University',
+    'colorado state university': 'Colorado State University',
+    'region stockholm': 'Region Stockholm',
+    'teachers college, columbia university': 'Teachers College, Columbia University',
+    'drug safety and effectiveness network, canada': 'Drug Safety and Effectiveness Network, Canada',
+    'canadian institutes of health research (cihr)': 'Canadian Institutes of Health Research (CIHR)',
+    'marie curie hospice, belfast': 'Marie Curie Hospice, Belfast',
+    'nks olaviken alderspsykiatriske sykehus': 'NKS Olaviken Alderspsykiatriske sykehus',
+    'university hospital, caen': 'University Hospital, Caen',
+    'university hospital, grenoble': 'University Hospital, Grenoble',
+    'taipei medical university shuang ho hospital': 'Taipei Medical University Shuang Ho Hospital',
+    'st. joseph\'s hospital and medical center, phoenix': "St. Joseph's Hospital and Medical Center, Phoenix",
+    'spectrum dynamics': 'Spectrum Dynamics',
+    'new york institute of technology': 'New York Institute of Technology',
+    'university of delaware': 'University of Delaware',
+    'cyto therapeutics pty limited': 'Cyto Therapeutics Pty Limited',
+    'university of bergen': 'University of Bergen',
+    'neuralight': 'NeuraLight',
+    'zeng changhao': 'Zeng Changhao',
+    'abbvie': 'AbbVie Inc.',
+    'abbott laboratories': 'AbbVie Inc.',
+    'bayer': 'Bayer AG',
+    'bayer healthcare': 'Bayer AG',
+    'amgen': 'Amgen Inc.',
+    'bms': 'Bristol Myers Squibb',
+    'bristol-myers squibb': 'Bristol Myers Squibb',
+    'bristol myers': 'Bristol Myers Squibb',
+    'genentech': 'Genentech, Inc.',
+    'genentech usa': 'Genentech, Inc.',
+})
+
+# Series form of the aliases for vectorized column lookups: names.str.lower().map(CANONICAL_ALIASES_SERIES)
+CANONICAL_ALIASES_SERIES = pd.Series(dict(_CANONICAL_ALIASES))
+
+# Edge weighting mode parameters (read-only)
+_WEIGHTING_CONFIGS = MappingProxyType({
+    "fresh_collaborations": {
+        "decay_rate": 0.99,
+        "recency_boost_factor": 1.0,
+        "boost_cutoff_months": 6,
+        "min_edge_weight_to_show": 1.4
+    },
+    "established_network": {
+        "decay_rate": 0.985,
+        "recency_boost_factor": 0.4,
+        "boost_cutoff_months": 3,
+        "min_edge_weight_to_show": 1.0
+    },
+    "only_recent": {
+        "decay_rate": 0.97,
+        "recency_boost_factor": 1.2,
+        "boost_cutoff_months": 12,  # Default to 12 months
+        "min_edge_weight_to_show": 1.6
+    }
+})
+
+# Trial columns read when building the network, with the default used when a column is absent
+# (startDate is parsed separately, once for the whole column)
+NETWORK_TRIAL_COLUMNS = {
+    'nctId': '',
+    'leadSponsor': '',
+    'collaborators': '',
+    'officials': '',
+    'phases': '',
+    'conditions': '',
+    'country': 'Unknown',
+    'briefTitle': '',
+    'overallStatus': '',
+}
+
+# Trial columns read for investigator rankings
+INVESTIGATOR_TRIAL_COLUMNS = {
+    'nctId': '',
+    'officials': '',
+    'phases': '',
+    'briefTitle': '',
+}
 
 class NetworkService:
     """Service for building and managing collaboration networks from clinical trial data"""
     
     def __init__(self):
         self.canonical_aliases = self._load_canonical_aliases()
+        self._alias_keys = list(self.canonical_aliases.keys())
+        self._alias_vals = list(self.canonical_aliases.values())
+        self._alias_trie = self._build_alias_trie(self._alias_keys)
+        self._alias_lengths = np.array([len(alias) for alias in self._alias_keys], dtype=np.int64)
         self.entity_cache = {}
-        self.graph_cache = {}
-        self.normalize_cache = {}
+        self.graph_cache = OrderedDict()
+        self.normalize_cache = {}  # lowercased name -> canonical name, filled in bulk
+        self._normalize_lowered = lru_cache(maxsize=None)(self._resolve_normalized_name)
+        self._filter_mask_cache = {}
         
-    def _load_canonical_aliases(self) -> Dict[str, str]:
+    def _load_canonical_aliases(self) -> Mapping[str, str]:
         """Load canonical organization aliases"""
-        return {
-            # Universities
-            'ucsf': 'University of California, San Francisco',
-            'univ. calif. san fran': 'University of California, San Francisco',
-            'uc san francisco': 'University of California, San Francisco',
-            'harvard': 'Harvard University',
-            'stanford': 'Stanford University',
-            'yale': 'Yale University',
-            'upenn': 'University of Pennsylvania',
-            'univ. of pennsylvania': 'University of Pennsylvania',
-            'columbia': 'Columbia University',
-            'uoft': 'University of Toronto',
-            'univ. of toronto': 'University of Toronto',
-            'univ. of melbourne': 'University of Melbourne',
-            'univ. of sydney': 'University of Sydney',
-            'ucl': 'University College London',
-            'univ. college london': 'University College London',
-            'imperial': 'Imperial College London',
-            'imperial college': 'Imperial College London',
-            'oxford university': 'University of Oxford',
-            'cambridge university': 'University of Cambridge',
-            'sjtu': 'Shanghai Jiao Tong University',
-            'pku': 'Peking University',
-            'beijing university': 'Peking University',
-            'thu': 'Tsinghua University',
-            'tsinghua': 'Tsinghua University',
-            'sysu': 'Sun Yat-sen University',
-            'sun yat sen univ': 'Sun Yat-sen University',
-            'snu': 'Seoul National University',
-            'utokyo': 'University of Tokyo',
-            'kyoto univ': 'Kyoto University',
-            'nus': 'National University of Singapore',
-            'ubc': 'University of British Columbia',
-            
-            # Hospitals and Medical Centers
-            'mgh': 'Massachusetts General Hospital',
-            'mass general hospital': 'Massachusetts General Hospital',
-            'mayo': 'Mayo Clinic',
-            'mayo foundation': 'Mayo Clinic',
-            'cleveland clinic foundation': 'Cleveland Clinic',
-            'fred hutch': 'Fred Hutchinson Cancer Research Center',
-            'dana farber': 'Dana-Farber Cancer Institute',
-            'mskcc': 'Memorial Sloan Kettering Cancer Center',
-            'sloan kettering': 'Memorial Sloan Kettering Cancer Center',
-            'charite': 'Charité - Universitätsmedizin Berlin',
-            'charite berlin': 'Charité - Universitätsmedizin Berlin',
-            
-            # Government/Research Institutes
-            'nci': 'National Cancer Institute (NCI)',
-            'nih nci': 'National Cancer Institute (NCI)',
-            'natl cancer institute': 'National Cancer Institute (NCI)',
-            'nih': 'National Institutes of Health (NIH)',
-            'u.s. nih': 'National Institutes of Health (NIH)',
-            'inserm': 'Institut National de la Santé et de la Recherche Médicale',
-            'karolinska institute': 'Karolinska Institutet',
-            
-            # Pharmaceutical Companies
-            'roche': 'F. Hoffmann-La Roche AG',
-            'hoffmann-la roche': 'F. Hoffmann-La Roche AG',
-            'roche ag': 'F. Hoffmann-La Roche AG',
-            'novartis': 'Novartis AG',
-            'novartis pharmaceuticals': 'Novartis AG',
-            'pfizer': 'Pfizer Inc.',
-            'pfizer incorporated': 'Pfizer Inc.',
-            'gsk': 'GlaxoSmithKline plc',
-            'glaxo': 'GlaxoSmithKline plc',
-            'glaxosmithkline': 'GlaxoSmithKline plc',
-            'glaxo smith kline': 'GlaxoSmithKline plc',
-            'astrazeneca': 'AstraZeneca plc',
-            'astra zeneca': 'AstraZeneca plc',
-            'sanofi-aventis': 'Sanofi',
-            'aventis': 'Sanofi',
-            'merck': 'Merck & Co., Inc.',
-            'msd': 'Merck & Co., Inc.',
-            'merck sharp & dohme': 'Merck & Co., Inc.',
-            'j&j': 'Johnson & Johnson',
-            'janssen': 'Johnson & Johnson',
-            'janssen pharmaceuticals': 'Johnson & Johnson',
-            'lilly': 'Eli Lilly and Company',
-            'eli lilly': 'Eli Lilly and Company',
-            
-            # Common NIH institutes
-            'national institutes of health (nih)': 'National Institutes of Health (NIH)',
-            'national institute of neurological disorders and stroke (ninds)': 'National Institute of Neurological Disorders and Stroke (NINDS)',
-            'national institute on aging (nia)': 'National Institute on Aging (NIA)',
-            'national institute of diabetes and digestive and kidney diseases (niddk)': 'National Institute of Diabetes and Digestive and Kidney Diseases (NIDDK)',
-            'national institute of allergy and infectious diseases (niaid)': 'National Institute of Allergy and Infectious Diseases (NIAID)',
-            'national center for advancing translational sciences (ncats)': 'National Center for Advancing Translational Sciences (NCATS)',
-            'national institute for biomedical imaging and bioengineering (nibib)': 'National Institute for Biomedical Imaging and Bioengineering (NIBIB)',
-            'eunice kennedy shriver national institute of child health and human development (nichd)': 'Eunice Kennedy Shriver National Institute of Child Health and Human Development (NICHD)',
-            'national institute on deafness and other communication disorders (nidcd)': 'National Institute on Deafness and Other Communication Disorders (NIDCD)',
-            
-            # Parkinson's organizations
-            "michael j. fox foundation for parkinson's research": "Michael J. Fox Foundation for Parkinson's Research",
-            "parkinson's uk": "Parkinson's UK",
-            'parkinson society canada': 'Parkinson Society Canada',
-            'the parkinson study group': 'The Parkinson Study Group',
-            
-            # Major universities
-            'university of california, los angeles': 'University of California, Los Angeles',
-            'university of california, san francisco': 'University of California, San Francisco',
-            'university of california, san diego': 'University of California, San Diego',
-            'duke university': 'Duke University',
-            'stanford university': 'Stanford University',
-            'harvard medical school (hms and hsdm)': 'Harvard Medical School',
-            'yale university': 'Yale University',
-            'northwestern university': 'Northwestern University',
-            'university of chicago': 'University of Chicago',
-            'university of michigan': 'University of Michigan',
-            'university of minnesota': 'University of Minnesota',
-            'emory university': 'Emory University',
-            'university of pittsburgh': 'University of Pittsburgh',
-            'washington university school of medicine': 'Washington University School of Medicine',
-            'rush university medical center': 'Rush University Medical Center',
-            'rush university': 'Rush University',
-            'case western reserve university': 'Case Western Reserve University',
-            'purdue university': 'Purdue University',
-            'university of cincinnati': 'University of Cincinnati',
-            'university of utah': 'University of Utah',
-            'university of florida': 'University of Florida',
-            'university of alabama at birmingham': 'University of Alabama at Birmingham',
-            'university of kentucky': 'University of Kentucky',
-            'university of tennessee, knoxville': 'The University of Tennessee, Knoxville',
-            'university of idaho': 'University of Idaho',
-            'university of rochester': 'University of Rochester',
-            'university of castilla-la mancha': 'University of Castilla-La Mancha',
-            'university of milano bicocca': 'University of Milano Bicocca',
-            'university of bologna': 'University of Bologna',
-            'universidad autonoma de san luis potosí': 'Universidad Autonoma de San Luis Potosí',
-            'mcgill university': 'McGill University',
-            'ottawa hospital research institute': 'Ottawa Hospital Research Institute',
-            'university of south florida': 'University of South Florida',
-            'university of illinois at chicago': 'University of Illinois at Chicago',
-            'university at buffalo': 'University at Buffalo',
-            'oregon health and science university': 'Oregon Health and Science University',
-            'cedars-sinai medical center': 'Cedars-Sinai Medical Center',
-            'arizona state university': 'Arizona State University',
-            'augusta university': 'Augusta University',
-            'albany medical college': 'Albany Medical College',
-            'beth israel deaconess medical center': 'Beth Israel Deaconess Medical Center',
-            'johns hopkins university': 'Johns Hopkins University',
-            'wake forest university': 'Wake Forest University',
-            'centre for addiction and mental health': 'Centre for Addiction and Mental Health',
-            'banner health': 'Banner Health',
-            'massachusetts general hospital': 'Massachusetts General Hospital',
-            'mayo clinic': 'Mayo Clinic',
-            
-            # Pharmaceutical companies
-            'sanofi': 'Sanofi',
-            'medtronic': 'Medtronic',
-            'boston scientific corporation': 'Boston Scientific Corporation',
-            'highland instruments, inc.': 'Highland Instruments, Inc.',
-            'oryon cell therapies': 'Oryon Cell Therapies',
-            'nebraska neuroscience alliance': 'Nebraska Neuroscience Alliance',
-            'sage bionetworks': 'Sage Bionetworks',
-            'tfs trial form support': 'TFS Trial Form Support',
-            'shanghai icell biotechnology co., ltd, shanghai, china': 'Shanghai iCELL Biotechnology Co., Ltd',
-            'gateway institute for brain research': 'Gateway Institute for Brain Research',
-            'nova southeastern university': 'Nova Southeastern University',
-            'colorado state university': 'Colorado State University',
-            'region stockholm': 'Region Stockholm',
-            'teachers college, columbia university': 'Teachers College, Columbia University',
-            'drug safety and effectiveness network, canada': 'Drug Safety and Effectiveness Network, Canada',
-            'canadian institutes of health research (cihr)': 'Canadian Institutes of Health Research (CIHR)',
-            'marie curie hospice, belfast': 'Marie Curie Hospice, Belfast',
-            'nks olaviken alderspsykiatriske sykehus': 'NKS Olaviken Alderspsykiatriske sykehus',
-            'university hospital, caen': 'University Hospital, Caen',
-            'university hospital, grenoble': 'University Hospital, Grenoble',
-            'taipei medical university shuang ho hospital': 'Taipei Medical University Shuang Ho Hospital',
-            'st. joseph\'s hospital and medical center, phoenix': "St. Joseph's Hospital and Medical Center, Phoenix",
-            'spectrum dynamics': 'Spectrum Dynamics',
-            'new york institute of technology': 'New York Institute of Technology',
-            'university of delaware': 'University of Delaware',
-            'cyto therapeutics pty limited': 'Cyto Therapeutics Pty Limited',
-            'university of bergen': 'University of Bergen',
-            'neuralight': 'NeuraLight',
-            'zeng changhao': 'Zeng Changhao',
-            'abbvie': 'AbbVie Inc.',
-            'abbott laboratories': 'AbbVie Inc.',
-            'bayer': 'Bayer AG',
-            'bayer healthcare': 'Bayer AG',
-            'amgen': 'Amgen Inc.',
-            'bms': 'Bristol Myers Squibb',
-            'bristol-myers squibb': 'Bristol Myers Squibb',
-            'bristol myers': 'Bristol Myers Squibb',
-            'genentech': 'Genentech, Inc.',
-            'genentech usa': 'Genentech, Inc.',
-        }
+        return _CANONICAL_ALIASES
+    
+    def canonicalize_names(self, names: pd.Series) -> pd.Series:
+        """Map a column of raw names to canonical names (NaN where no alias matches)"""
+        return names.fillna('').astype(str).str.lower().str.strip().map(CANONICAL_ALIASES_SERIES)
     
     def normalize_entity_name(self, name: str) -> str:
         """Normalize entity name for matching"""
         if pd.isna(name) or not name:
             return ""
         
-        # Check cache first
-        if name in self.normalize_cache:
-            return self.normalize_cache[name]
-        
-        # Convert to lowercase and strip whitespace
-        normalized = str(name).lower().strip()
+        # Convert to lowercase and strip whitespace - the result depends only on this key
+        return self._normalize_lowered(str(name).lower().strip())
+    
+    def _resolve_normalized_name(self, normalized: str) -> str:
+        """Resolve a lowercased, stripped name to its canonical form (memoized per instance)"""
+        # Names already resolved in bulk by warm_normalize_cache
+        if normalized in self.normalize_cache:
+            return self.normalize_cache[normalized]
         
         # Check canonical aliases first
         if normalized in self.canonical_aliases:
-            result = self.canonical_aliases[normalized]
-            self.normalize_cache[name] = result
-            return result
-        
-        # Also check if the original name (proper case) is in canonical aliases
-        original_name = str(name).strip()
-        if original_name in self.canonical_aliases:
-            result = self.canonical_aliases[original_name]
-            self.normalize_cache[name] = result
-            return result
+            return sys.intern(self.canonical_aliases[normalized])
         
         # Apply fuzzy matching for non-canonical names
-        result = self._fuzzy_match_name(normalized)
-        self.normalize_cache[name] = result
-        return result
+        # (interned: the name is reused as node id, edge endpoint and dict key across the graph)
+        return sys.intern(self._fuzzy_match_name(normalized))
+    
+    def warm_normalize_cache(self, names) -> None:
+        """Normalize many raw names at once, scoring every fuzzy candidate in one rapidfuzz batch"""
+        if process is None:
+            return
+        
+        pending = set()
+        for name in names:
+            if pd.isna(name) or not name:
+                continue
+            normalized = str(name).lower().strip()
+            if normalized and normalized not in self.canonical_aliases and normalized not in self.normalize_cache:
+                pending.add(normalized)
+        
+        if not pending:
+            return
+        
+        # n x m similarity matrix over all pending names and aliases (multi-threaded, below-cutoff scores are 0)
+        candidates = list(pending)
+        scores = process.cdist(candidates, self._alias_keys, scorer=JaroWinkler.similarity, score_cutoff=0.93, workers=-1)
+        best = scores.argmax(axis=1)
+        for i, normalized in enumerate(candidates):
+            self.normalize_cache[normalized] = sys.intern(self._alias_vals[best[i]] if scores[i, best[i]] > 0 else normalized.title())
+    
+    def _raw_entity_names(self, df: pd.DataFrame) -> np.ndarray:
+        """Distinct raw sponsor and collaborator names as parse_collaborators would see them"""
+        name_columns = []
+        if 'leadSponsor' in df.columns:
+            name_columns.append(df['leadSponsor'])
+        if 'collaborators' in df.columns:
+            name_columns.append(df['collaborators'].dropna().astype(str).str.split(r'[,;|]').explode().str.strip())
+        if not name_columns:
+            return np.array([], dtype=object)
+        return pd.concat(name_columns).unique()
     
     def _fuzzy_match_name(self, name: str) -> str:
         """Apply fuzzy matching to find similar names"""
         if not name:
             return ""
         
-        # Check for exact matches in canonical aliases
-        for alias, canonical in self.canonical_aliases.items():
-            if name == alias:
-                return canonical
+        # Check for exact matches in canonical aliases (hash lookup, no scan)
+        canonical = self.canonical_aliases.get(name)
+        if canonical is not None:
+            return canonical
         
         # Apply Jaro-Winkler similarity for fuzzy matching
+        if process is not None:
+            match = process.extractOne(name, self._alias_keys, scorer=JaroWinkler.similarity, score_cutoff=0.93)
+            return self._alias_vals[match[2]] if match else name.title()
+        
         best_match = None
         best_score = 0
         
-        for alias, canonical in self.canonical_aliases.items():
-            score = self._jaro_winkler_similarity(name, alias)
+        # The Winkler bonus depends only on the shared prefix, which the trie gives per alias;
+        # bound every alias at once and only score those whose length and prefix can reach the threshold
+        prefix_lengths = np.array(self._alias_prefix_lengths(name), dtype=np.int64)
+        upper_bounds = self._jaro_winkler_upper_bounds(len(name), self._alias_lengths, prefix_lengths)
+        for idx in np.flatnonzero(upper_bounds >= 0.93 - 1e-9):
+            alias, canonical = self._alias_keys[idx], self._alias_vals[idx]
+            score = self._jaro_winkler_similarity(name, alias, score_cutoff=0.93)
             if score >= 0.93 and score > best_score:
                 best_match = canonical
                 best_score = score
         
         return best_match if best_match else name.title()
     
-    def _jaro_winkler_similarity(self, s1: str, s2: str) -> float:
-        """Calculate Jaro-Winkler similarity between two strings"""
+    def _jaro_winkler_similarity(self, s1: str, s2: str, score_cutoff: float = 0.0) -> float:
+        """Calculate Jaro-Winkler similarity between two strings (rapidfuzz when installed)"""
         if not s1 or not s2:
             return 0.0
+        if s1 == s2:
+            return 1.0
+        
+        if JaroWinkler is not None:
+            # Scores below score_cutoff come back as 0, letting rapidfuzz exit early
+            return JaroWinkler.similarity(s1, s2, prefix_weight=0.1, score_cutoff=score_cutoff)
         
         # Jaro distance
         match_distance = max(len(s1), len(s2)) // 2 - 1
@@ -271,24 +385,26 @@ class NetworkService:
         
         s1_matches = []
         s2_matches = []
+        s2_taken = [False] * len(s2)
         
         for i, char in enumerate(s1):
             start = max(0, i - match_distance)
             end = min(len(s2), i + match_distance + 1)
             
             for j in range(start, end):
-                if j not in s2_matches and s2[j] == char:
+                if not s2_taken[j] and s2[j] == char:
                     s1_matches.append(char)
                     s2_matches.append(j)
+                    s2_taken[j] = True
                     break
         
         if not s1_matches:
             return 0.0
         
-        # Count transpositions
+        # Count transpositions: matched characters compared in order on both sides
         transpositions = 0
-        for i in range(len(s1_matches)):
-            if s1_matches[i] != s2[s2_matches[i]]:
+        for char, j in zip(s1_matches, sorted(s2_matches)):
+            if char != s2[j]:
                 transpositions += 1
         
         # Jaro distance
@@ -296,23 +412,57 @@ class NetworkService:
         t = transpositions // 2
         jaro = (m / len(s1) + m / len(s2) + (m - t) / m) / 3
         
-        # Winkler modification
-        prefix = 0
-        for i in range(min(4, len(s1), len(s2))):
-            if s1[i] == s2[i]:
-                prefix += 1
-            else:
-                break
+        # Winkler modification (only above the usual 0.7 boost threshold, as rapidfuzz does)
+        score = jaro
+        if jaro > 0.7:
+            prefix = 0
+            for i in range(min(4, len(s1), len(s2))):
+                if s1[i] == s2[i]:
+                    prefix += 1
+                else:
+                    break
+            score = jaro + 0.1 * prefix * (1 - jaro)
         
-        return jaro + 0.1 * prefix * (1 - jaro)
+        return score if score >= score_cutoff else 0.0
+    
+    def _jaro_winkler_upper_bounds(self, length: int, alias_lengths: np.ndarray, prefix_lengths: np.ndarray) -> np.ndarray:
+        """Best Jaro-Winkler score a string of this length could reach against each alias"""
+        if not length:
+            return np.zeros(len(alias_lengths))
+        m = np.minimum(length, alias_lengths)
+        jaro = (m / length + m / alias_lengths + 1) / 3
+        return jaro + 0.1 * np.minimum(prefix_lengths, m) * (1 - jaro)
+    
+    def _build_alias_trie(self, aliases: List[str], depth: int = 4) -> Dict:
+        """Build a dict-of-dicts trie over the first characters of each alias"""
+        # Each node keeps the positions of the aliases below it under the None key
+        trie = {None: list(range(len(aliases)))}
+        for idx, alias in enumerate(aliases):
+            node = trie
+            for char in alias[:depth]:
+                node = node.setdefault(char, {None: []})
+                node[None].append(idx)
+        return trie
+    
+    def _alias_prefix_lengths(self, name: str, depth: int = 4) -> List[int]:
+        """Length of the prefix (up to depth) each alias shares with name, in alias order"""
+        prefix_lengths = [0] * len(self._alias_keys)
+        node = self._alias_trie
+        for length, char in enumerate(name[:depth], 1):
+            node = node.get(char)
+            if node is None:
+                break
+            for idx in node[None]:
+                prefix_lengths[idx] = length
+        return prefix_lengths
     
     def parse_collaborators(self, collaborators_str: str) -> List[str]:
         """Parse collaborators string into list of organizations"""
         if pd.isna(collaborators_str) or not collaborators_str:
             return []
         
-        # Split on common delimiters
-        collaborators = re.split(r'[,;|]', str(collaborators_str))
+        # Split on common delimiters (plain str ops - no regex engine needed for single characters)
+        collaborators = str(collaborators_str).replace(';', ',').replace('|', ',').split(',')
         
         # Clean and normalize each collaborator
         normalized = []
@@ -323,7 +473,9 @@ class NetworkService:
                 if normalized_name:
                     normalized.append(normalized_name)
         
-        return list(set(normalized))  # Remove duplicates
+        if len(normalized) <= 1:
+            return normalized
+        return list(dict.fromkeys(normalized))  # Remove duplicates, keeping first-seen order
     
     def parse_officials(self, officials_str: str) -> List[Dict]:
         """Parse officials string into list of investigator dictionaries"""
@@ -333,7 +485,7 @@ class NetworkService:
         officials = []
         
         # Split on common delimiters
-        official_entries = re.split(r'[,;]', str(officials_str))
+        official_entries = str(officials_str).replace(';', ',').split(',')
         
         for entry in official_entries:
             entry = entry.strip()
@@ -367,29 +519,38 @@ class NetworkService:
     def build_network_graph(self, df: pd.DataFrame, filters: Dict = None, weighting_mode: str = "established_network", top_k: int = None) -> Dict:
         """Build collaboration network graph from trial data"""
         
-        # Create cache key
-        cache_key = f"{hash(str(filters))}_{weighting_mode}_{top_k}_{len(df)}"
+        # Create cache key (deterministic; the date is included because timeframes and decay are relative to now)
+        cache_key = (tuple(sorted((filters or {}).items())), weighting_mode, top_k, len(df), id(df), date.today())
         if cache_key in self.graph_cache:
-            return self.graph_cache[cache_key]
+            # Shallow copy so callers can reassign 'nodes'/'edges' without touching the cached graph
+            return dict(self.graph_cache[cache_key])
         
         # Apply filters if provided
         if filters:
             df = self._apply_filters(df, filters)
         
+        # Resolve every sponsor/collaborator name up front in one batch
+        if process is not None:
+            self.warm_normalize_cache(self._raw_entity_names(df))
+        
         # Initialize graph structure
         nodes = {}
         edges = {}
         
-        # Process each trial
-        for _, trial in df.iterrows():
-            nct_id = str(trial['nctId'])
-            lead_sponsor = self.normalize_entity_name(trial.get('leadSponsor', ''))
-            collaborators = self.parse_collaborators(trial.get('collaborators', ''))
-            officials = self.parse_officials(trial.get('officials', ''))
-            start_date = pd.to_datetime(trial.get('startDate', ''), errors='coerce')
-            phase = trial.get('phases', '')
-            condition = trial.get('conditions', '')
-            country = trial.get('country', 'Unknown')
+        # Process each trial (plain column lists instead of a Series per row)
+        # Edges are collected column-wise (parallel lists indexed by edge position) and only turned
+        # into response dicts once their weights are known
+        edge_index = {}
+        edge_source, edge_target, edge_nct_ids = [], [], []
+        edge_phases, edge_conditions, edge_countries = [], [], []
+        edge_first_seen, edge_last_seen = [], []
+        trial_rows = self._iter_trial_columns(df, NETWORK_TRIAL_COLUMNS)
+        for (nct_id, lead_sponsor, collaborators, officials, phase, condition,
+             country, brief_title, status), start_date in zip(trial_rows, self._parse_start_dates(df)):
+            nct_id = str(nct_id)
+            lead_sponsor = self.normalize_entity_name(lead_sponsor)
+            collaborators = self.parse_collaborators(collaborators)
+            officials = self.parse_officials(officials)
             
             # Add sponsor node
             if lead_sponsor:
@@ -410,9 +571,9 @@ class NetworkService:
                 
                 nodes[lead_sponsor]['trials'].append({
                     'nctId': nct_id,
-                    'title': trial.get('briefTitle', ''),
+                    'title': brief_title,
                     'phase': phase,
-                    'status': trial.get('overallStatus', ''),
+                    'status': status,
                     'startDate': str(start_date) if pd.notna(start_date) else '',
                     'condition': condition,
                     'country': country
@@ -439,43 +600,59 @@ class NetworkService:
                     # Add edge between sponsor and collaborator
                     if lead_sponsor:
                         edge_id = f"{lead_sponsor}__{collaborator}"
-                        if edge_id not in edges:
-                            edges[edge_id] = {
-                                'id': edge_id,
-                                'source': lead_sponsor,
-                                'target': collaborator,
-                                'weight': 0,
-                                'meta': {
-                                    'nctIds': [],
-                                    'firstSeen': str(start_date) if pd.notna(start_date) else '',
-                                    'lastSeen': str(start_date) if pd.notna(start_date) else '',
-                                    'phases': [],
-                                    'conditions': [],
-                                    'countries': []
-                                }
-                            }
+                        idx = edge_index.get(edge_id)
+                        if idx is None:
+                            idx = edge_index[edge_id] = len(edge_source)
+                            edge_source.append(lead_sponsor)
+                            edge_target.append(collaborator)
+                            edge_nct_ids.append([])
+                            edge_phases.append([])
+                            edge_conditions.append([])
+                            edge_countries.append([])
+                            edge_first_seen.append(start_date)
+                            edge_last_seen.append(start_date)
                         
                         # Update edge metadata
-                        edges[edge_id]['meta']['nctIds'].append(nct_id)
+                        edge_nct_ids[idx].append(nct_id)
                         if phase:
-                            edges[edge_id]['meta']['phases'].append(phase)
+                            edge_phases[idx].append(phase)
                         if condition:
-                            edges[edge_id]['meta']['conditions'].append(condition)
+                            edge_conditions[idx].append(condition)
                         if country:
-                            edges[edge_id]['meta']['countries'].append(country)
+                            edge_countries[idx].append(country)
                         
                         # Update first/last seen dates
                         if pd.notna(start_date):
-                            if not edges[edge_id]['meta']['firstSeen'] or start_date < pd.to_datetime(edges[edge_id]['meta']['firstSeen']):
-                                edges[edge_id]['meta']['firstSeen'] = str(start_date)
-                            if not edges[edge_id]['meta']['lastSeen'] or start_date > pd.to_datetime(edges[edge_id]['meta']['lastSeen']):
-                                edges[edge_id]['meta']['lastSeen'] = str(start_date)
+                            if pd.isna(edge_first_seen[idx]) or start_date < edge_first_seen[idx]:
+                                edge_first_seen[idx] = start_date
+                            if pd.isna(edge_last_seen[idx]) or start_date > edge_last_seen[idx]:
+                                edge_last_seen[idx] = start_date
             
             # Note: Investigator nodes removed since they're not present in the data
             # If you have officials data in the future, you can uncomment this section
         
-        # Calculate edge weights and node metrics
-        self._calculate_edge_weights(edges, weighting_mode)
+        # Calculate edge weights straight from the collected dates, then build the edge records
+        first_seen = pd.Series(edge_first_seen, dtype='datetime64[ns]')
+        weights = self._scaled_edge_weights(
+            first_seen, first_seen.notna().to_numpy(), np.array([len(ids) for ids in edge_nct_ids], dtype=float), weighting_mode
+        )
+        for edge_id, idx in edge_index.items():
+            edges[edge_id] = {
+                'id': edge_id,
+                'source': edge_source[idx],
+                'target': edge_target[idx],
+                'weight': weights[idx],
+                'meta': {
+                    'nctIds': edge_nct_ids[idx],
+                    'firstSeen': str(edge_first_seen[idx]) if pd.notna(edge_first_seen[idx]) else '',
+                    'lastSeen': str(edge_last_seen[idx]) if pd.notna(edge_last_seen[idx]) else '',
+                    'phases': edge_phases[idx],
+                    'conditions': edge_conditions[idx],
+                    'countries': edge_countries[idx]
+                }
+            }
+        
+        # Calculate node metrics
         self._calculate_node_metrics(nodes, edges)
         
         # Filter to top K strongest connections per node if specified
@@ -489,39 +666,36 @@ class NetworkService:
         
         # Cache the result (limit cache size to prevent memory issues)
         if len(self.graph_cache) > 50:
-            # Clear oldest entries
-            oldest_keys = list(self.graph_cache.keys())[:10]
-            for key in oldest_keys:
-                del self.graph_cache[key]
+            # Evict the oldest entry
+            self.graph_cache.popitem(last=False)
         
         self.graph_cache[cache_key] = result
         
-        # Clear cache for debugging
-        self.graph_cache.clear()
-        
-        return result
+        return dict(result)
+    
+    def _iter_trial_columns(self, df: pd.DataFrame, columns: Dict[str, object]):
+        """Iterate rows as tuples of the given columns, using the default for missing columns"""
+        values = [
+            df[column].tolist() if column in df.columns else [default] * len(df)
+            for column, default in columns.items()
+        ]
+        return zip(*values)
+    
+    def _parse_start_dates(self, df: pd.DataFrame) -> List:
+        """Parse the startDate column in one pass (each value parsed on its own, bad values -> NaT)"""
+        if 'startDate' not in df.columns:
+            return [pd.NaT] * len(df)
+        return pd.to_datetime(df['startDate'], errors='coerce', format='mixed').tolist()
     
     def _apply_filters(self, df: pd.DataFrame, filters: Dict) -> pd.DataFrame:
         """Apply filters to the dataframe"""
-        filtered_df = df.copy()
-        
-        # Filter by therapeutic area
-        if filters.get('therapeutic_area'):
-            filtered_df = filtered_df[
-                filtered_df['conditions'].fillna('').str.contains(filters['therapeutic_area'], case=False, na=False)
-            ]
-        
-        # Filter by phase
-        if filters.get('phase'):
-            filtered_df = filtered_df[
-                filtered_df['phases'].fillna('').str.contains(filters['phase'], case=False, na=False)
-            ]
-        
-        # Filter by country
-        if filters.get('country'):
-            filtered_df = filtered_df[
-                filtered_df['country'].fillna('').str.contains(filters['country'], case=False, na=False)
-            ]
+        # Combine per-filter masks (cached per frame) and select rows once
+        mask = np.ones(len(df), dtype=bool)
+        
+        # Filter by therapeutic area, phase and country
+        for filter_key, column in (('therapeutic_area', 'conditions'), ('phase', 'phases'), ('country', 'country')):
+            if filters.get(filter_key):
+                mask &= self._contains_mask(df, column, filters[filter_key])
         
         # Filter by date range
         if filters.get('timeframe'):
@@ -536,99 +710,105 @@ class NetworkService:
                 cutoff = now - timedelta(days=365)  # Default to 1 year
             
             if cutoff:
-                filtered_df = filtered_df[
-                    pd.to_datetime(filtered_df['startDate'], errors='coerce') >= cutoff
-                ]
+                mask &= (self._parsed_start_dates(df) >= cutoff).to_numpy()
         
-        return filtered_df
+        return df[mask]
+    
+    def _frame_cache_get(self, df: pd.DataFrame, key: Tuple, build):
+        """Memoize a per-row array derived from df (keyed by frame identity, cleared when it grows)"""
+        cache_key = (id(df), len(df)) + key
+        if cache_key not in self._filter_mask_cache:
+            if len(self._filter_mask_cache) > 256:
+                self._filter_mask_cache.clear()
+            self._filter_mask_cache[cache_key] = build()
+        return self._filter_mask_cache[cache_key]
+    
+    def _contains_mask(self, df: pd.DataFrame, column: str, pattern: str) -> np.ndarray:
+        """Case-insensitive substring/regex mask over a column"""
+        return self._frame_cache_get(
+            df, ('contains', column, pattern),
+            lambda: df[column].fillna('').str.contains(pattern, case=False, na=False).to_numpy(dtype=bool)
+        )
+    
+    def _normalized_sponsors(self, df: pd.DataFrame) -> np.ndarray:
+        """leadSponsor normalized through normalize_entity_name (each distinct name resolved once)"""
+        def build():
+            sponsors = df['leadSponsor']
+            # Exact alias hits resolve column-wise; only the remaining distinct names go through
+            # normalize_entity_name (and its fuzzy matching)
+            canonical = self.canonicalize_names(sponsors)
+            unresolved = sponsors[canonical.isna()].dropna().unique()
+            resolved = {name: self.normalize_entity_name(name) for name in unresolved}
+            return canonical.fillna(sponsors.map(resolved)).fillna('').to_numpy(dtype=object)
+        return self._frame_cache_get(df, ('leadSponsor_norm',), build)
+    
+    def _parsed_start_dates(self, df: pd.DataFrame) -> pd.Series:
+        """startDate parsed to datetimes (unparseable -> NaT)"""
+        return self._frame_cache_get(df, ('startDate',), lambda: pd.to_datetime(df['startDate'], errors='coerce'))
     
-    def _calculate_edge_weights(self, edges: Dict, weighting_mode: str = "established_network"):
-        """Calculate edge weights using different weighting modes"""
+    def _scaled_edge_weights(self, start_dates: pd.Series, has_date: np.ndarray, trial_counts: np.ndarray,
+                             weighting_mode: str = "established_network") -> List[float]:
+        """Edge weights rescaled to 0-10 from each edge's first-seen date and trial count"""
         now = datetime.now()
         
-        # Define weighting mode parameters
-        weighting_configs = {
-            "fresh_collaborations": {
-                "decay_rate": 0.99,
-                "recency_boost_factor": 1.0,
-                "boost_cutoff_months": 6,
-                "min_edge_weight_to_show": 1.4
-            },
-            "established_network": {
-                "decay_rate": 0.985,
-                "recency_boost_factor": 0.4,
-                "boost_cutoff_months": 3,
-                "min_edge_weight_to_show": 1.0
-            },
-            "only_recent": {
-                "decay_rate": 0.97,
-                "recency_boost_factor": 1.2,
-                "boost_cutoff_months": 12,  # Default to 12 months
-                "min_edge_weight_to_show": 1.6
-            }
-        }
-        
-        config = weighting_configs.get(weighting_mode, weighting_configs["established_network"])
+        config = _WEIGHTING_CONFIGS.get(weighting_mode, _WEIGHTING_CONFIGS["established_network"])
         
         # Calculate raw weights first
-        raw_weights = []
-        for edge in edges.values():
-            weight = 0
-            for nct_id in edge['meta']['nctIds']:
-                # Find the trial start date
-                start_date_str = edge['meta']['firstSeen']
-                if start_date_str:
-                    try:
-                        start_date = pd.to_datetime(start_date_str)
-                        months_since = (now - start_date).days / 30
-                        
-                        # Calculate trial weight based on weighting mode
-                        if weighting_mode == "only_recent" and months_since > config["boost_cutoff_months"]:
-                            # Drop trials outside the range entirely
-                            trial_weight = 0
-                        else:
-                            base_weight = config["decay_rate"] ** max(0, months_since)
-                            
-                            if months_since <= config["boost_cutoff_months"]:
-                                # Apply recency boost
-                                trial_weight = base_weight * (1 + config["recency_boost_factor"])
-                            else:
-                                trial_weight = base_weight
-                        
-                        weight += trial_weight
-                    except:
-                        weight += 1  # Default weight for trials without valid dates
-            
-            raw_weights.append(weight)
-            edge['weight'] = weight  # Store raw weight temporarily
+        months_since = (pd.Timestamp(now) - start_dates).dt.days.to_numpy(dtype=float) / 30
+        
+        # Calculate trial weight based on weighting mode
+        base_weight = np.power(config["decay_rate"], np.maximum(0, months_since))
+        trial_weight = np.where(
+            months_since <= config["boost_cutoff_months"],
+            base_weight * (1 + config["recency_boost_factor"]),  # Apply recency boost
+            base_weight
+        )
+        if weighting_mode == "only_recent":
+            # Drop trials outside the range entirely
+            trial_weight = np.where(months_since > config["boost_cutoff_months"], 0, trial_weight)
+        
+        # Default weight of 1 per trial for dates that don't parse, nothing for edges without a date
+        trial_weight = np.where(np.isnan(months_since), 1.0, trial_weight)
+        weights = np.where(has_date, trial_weight * trial_counts, 0.0)
         
         # Rescale weights to 0-10 range for better visualization
-        if raw_weights:
-            w_min = min(raw_weights)
-            w_max = max(raw_weights)
+        if len(weights):
+            w_min = weights.min()
+            w_max = weights.max()
             
             if w_max > w_min:  # Avoid division by zero
-                for edge in edges.values():
-                    # Rescale to 0-10 range with a floor of 0.5 for visibility
-                    scaled_w = ((edge['weight'] - w_min) / (w_max - w_min)) * 10
-                    edge['weight'] = max(0.5, round(scaled_w, 2))
+                # Rescale to 0-10 range with a floor of 0.5 for visibility
+                scaled = np.maximum(0.5, np.round((weights - w_min) / (w_max - w_min) * 10, 2))
             else:
                 # If all weights are the same, set them to a middle value
-                for edge in edges.values():
-                    edge['weight'] = 5.0
+                scaled = np.full(len(weights), 5.0)
+            return scaled.tolist()
+        return []
     
     def _calculate_node_metrics(self, nodes: Dict, edges: Dict):
         """Calculate node metrics (degree, weighted degree, etc.)"""
         # Count connections for each node
         node_connections = defaultdict(list)
         
-        for edge in edges.values():
+        # Recent activity (edges updated in last 12 months), counted per endpoint in one pass over edges
+        now = datetime.now()
+        last_seen = pd.to_datetime(
+            pd.Series([edge['meta']['lastSeen'] or None for edge in edges.values()], dtype=object),
+            errors='coerce', format='mixed'
+        )
+        is_recent = ((now - last_seen).dt.days <= 365).tolist()
+        recent_counts = Counter()
+        
+        for edge, recent in zip(edges.values(), is_recent):
             source = edge['source']
             target = edge['target']
             weight = edge['weight']
             
             node_connections[source].append((target, weight))
             node_connections[target].append((source, weight))
+            if recent:
+                recent_counts[source] += 1
+                recent_counts[target] += 1
         
         # Calculate metrics for each node
         for node_id, node in nodes.items():
@@ -641,19 +821,7 @@ class NetworkService:
             node['metrics']['weighted_degree'] = sum(weight for _, weight in connections)
             
             # Recent activity (edges updated in last 12 months)
-            recent_count = 0
-            for edge in edges.values():
-                if edge['source'] == node_id or edge['target'] == node_id:
-                    last_seen = edge['meta']['lastSeen']
-                    if last_seen:
-                        try:
-                            last_date = pd.to_datetime(last_seen)
-                            if (datetime.now() - last_date).days <= 365:
-                                recent_count += 1
-                        except:
-                            pass
-            
-            node['metrics']['recent_activity'] = recent_count
+            node['metrics']['recent_activity'] = recent_counts[node_id]
     
     def get_investigator_rankings(self, df: pd.DataFrame, filters: Dict = None) -> List[Dict]:
         """Get ranked list of investigators by success score"""
@@ -662,10 +830,9 @@ class NetworkService:
         
         investigators = {}
         
-        for _, trial in df.iterrows():
-            officials = self.parse_officials(trial.get('officials', ''))
-            phase = trial.get('phases', '')
-            start_date = pd.to_datetime(trial.get('startDate', ''), errors='coerce')
+        trial_rows = self._iter_trial_columns(df, INVESTIGATOR_TRIAL_COLUMNS)
+        for (nct_id, officials, phase, brief_title), start_date in zip(trial_rows, self._parse_start_dates(df)):
+            officials = self.parse_officials(officials)
             
             for official in officials:
                 if official['name'] and official['affiliation']:
@@ -690,8 +857,8 @@ class NetworkService:
                     # Add recent trial
                     if pd.notna(start_date):
                         investigators[investigator_id]['recent_trials'].append({
-                            'nctId': str(trial['nctId']),
-                            'title': trial.get('briefTitle', ''),
+                            'nctId': str(nct_id),
+                            'title': brief_title,
                             'phase': phase,
                             'startDate': str(start_date)
                         })
@@ -721,29 +888,23 @@ class NetworkService:
     
     def get_sponsor_profile(self, sponsor_name: str, df: pd.DataFrame) -> Dict:
         """Get detailed profile for a specific sponsor"""
-        sponsor_trials = df[df['leadSponsor'].fillna('').str.contains(sponsor_name, case=False, na=False)]
+        # Exact match on normalized sponsor names (sponsor ids are normalized node names; no regex scan)
+        sponsor_trials = df[self._normalized_sponsors(df) == self.normalize_entity_name(sponsor_name)]
         
-        # Get active trials
-        active_trials = sponsor_trials[
-            sponsor_trials['overallStatus'].fillna('').str.contains('RECRUITING', case=False, na=False)
-        ]
+        # Count active trials
+        active_trial_count = int(
+            sponsor_trials['overallStatus'].fillna('').str.contains('RECRUITING', case=False, na=False).sum()
+        )
         
-        # Get top collaborators
-        collaborators = []
-        for _, trial in sponsor_trials.iterrows():
-            trial_collaborators = self.parse_collaborators(trial.get('collaborators', ''))
-            collaborators.extend(trial_collaborators)
+        # One pass over the collaborator/condition columns
+        rows = list(self._iter_trial_columns(sponsor_trials, {'collaborators': '', 'conditions': None}))
         
-        collaborator_counts = Counter(collaborators)
+        # Get top collaborators
+        collaborator_counts = Counter(chain.from_iterable(self.parse_collaborators(collab) for collab, _ in rows))
         top_collaborators = [{'name': name, 'count': count} for name, count in collaborator_counts.most_common(10)]
         
         # Get top conditions
-        conditions = []
-        for _, trial in sponsor_trials.iterrows():
-            if trial.get('conditions'):
-                conditions.append(trial['conditions'])
-        
-        condition_counts = Counter(conditions)
+        condition_counts = Counter(cond for _, cond in rows if cond)
         top_conditions = [{'condition': cond, 'count': count} for cond, count in condition_counts.most_common(5)]
         
         # Get top countries
@@ -753,7 +914,7 @@ class NetworkService:
         return {
             'name': sponsor_name,
             'total_trials': len(sponsor_trials),
-            'active_trials': len(active_trials),
+            'active_trials': active_trial_count,
             'top_collaborators': top_collaborators,
             'top_conditions': top_conditions,
             'top_countries': top_countries,
@@ -762,30 +923,23 @@ class NetworkService:
     
     def _filter_top_k_connections(self, nodes: Dict, edges: Dict, top_k: int) -> Dict:
         """Filter edges to show only top K strongest connections per node"""
-        # Group edges by source node
+        # Group edges (by position) under both endpoints
         node_connections = defaultdict(list)
         
-        for edge in edges.values():
-            source = edge['source']
-            target = edge['target']
+        for edge_idx, edge in enumerate(edges.values()):
             weight = edge['weight']
-            
-            node_connections[source].append((edge['id'], weight))
-            node_connections[target].append((edge['id'], weight))
+            node_connections[edge['source']].append((edge_idx, weight))
+            node_connections[edge['target']].append((edge_idx, weight))
         
-        # Keep only top K edges per node
-        edges_to_keep = set()
+        # Keep only top K edges per node (flag per edge position)
+        edges_to_keep = bytearray(len(edges))
         
         for node_id, connections in node_connections.items():
-            # Sort connections by weight (descending) and take top K
-            sorted_connections = sorted(connections, key=lambda x: x[1], reverse=True)
-            top_connections = sorted_connections[:top_k]
-            
-            # Add edge IDs to keep
-            for edge_id, _ in top_connections:
-                edges_to_keep.add(edge_id)
+            # Top K connections by weight - same result and tie order as a stable descending sort
+            for edge_idx, _ in heapq.nlargest(top_k, connections, key=itemgetter(1)):
+                edges_to_keep[edge_idx] = 1
         
         # Filter edges
-        filtered_edges = {edge_id: edge for edge_id, edge in edges.items() if edge_id in edges_to_keep}
+        filtered_edges = {edge_id: edge for (edge_id, edge), keep in zip(edges.items(), edges_to_keep) if keep}
         
         return filtered_edges
@@ -1,7 +1,78 @@
+import os
 import pandas as pd
 import json
 import re
 from typing import Dict, List
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from types import MappingProxyType
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    json_loads = json.loads
+
+# Country name mappings (lowercased variant -> standard name), built once at import
+COUNTRY_MAPPINGS = MappingProxyType({
+    'united states': 'United States',
+    'usa': 'United States',
+    'us': 'United States',
+    'united states of america': 'United States',
+    'united kingdom': 'United Kingdom',
+    'uk': 'United Kingdom',
+    'great britain': 'United Kingdom',
+    'england': 'United Kingdom',
+    'korea, republic of': 'South Korea',
+    'korea': 'South Korea',
+    'republic of korea': 'South Korea',
+    'taiwan, province of china': 'Taiwan',
+    'taiwan': 'Taiwan',
+    'russian federation': 'Russia',
+    'russia': 'Russia',
+    'czech republic': 'Czech Republic',
+    'czechia': 'Czech Republic',
+    'netherlands': 'Netherlands',
+    'holland': 'Netherlands',
+    'switzerland': 'Switzerland',
+    'sweden': 'Sweden',
+    'norway': 'Norway',
+    'denmark': 'Denmark',
+    'finland': 'Finland',
+    'australia': 'Australia',
+    'japan': 'Japan',
+    'china': 'China',
+    'india': 'India',
+    'brazil': 'Brazil',
+    'mexico': 'Mexico',
+    'argentina': 'Argentina',
+    'south africa': 'South Africa',
+    'poland': 'Poland',
+    'austria': 'Austria',
+    'belgium': 'Belgium',
+    'portugal': 'Portugal',
+    'greece': 'Greece',
+    'hungary': 'Hungary',
+    'romania': 'Romania',
+    'bulgaria': 'Bulgaria',
+    'croatia': 'Croatia',
+    'slovenia': 'Slovenia',
+    'slovakia': 'Slovakia',
+    'estonia': 'Estonia',
+    'latvia': 'Latvia',
+    'lithuania': 'Lithuania',
+    'canada': 'Canada',
+    'germany': 'Germany',
+    'france': 'France',
+    'italy': 'Italy',
+    'spain': 'Spain'
+})
+
+# Parse locations across worker processes once there are enough distinct strings to pay for them
+PARALLEL_MIN_LOCATIONS = 50_000
+PARALLEL_CHUNKSIZE = 10_000
+
+# Keep date columns as raw text so the pyarrow reader doesn't infer date objects
+TEXT_DATE_COLUMNS = ('startDate', 'completionDate')
 
 def standardize_country_name(country: str) -> str:
     """
@@ -12,69 +83,14 @@ def standardize_country_name(country: str) -> str:
     
     country_lower = str(country).lower().strip()
     
-    # Country name mappings
-    country_mappings = {
-        'united states': 'United States',
-        'usa': 'United States',
-        'us': 'United States',
-        'united states of america': 'United States',
-        'united kingdom': 'United Kingdom',
-        'uk': 'United Kingdom',
-        'great britain': 'United Kingdom',
-        'england': 'United Kingdom',
-        'korea, republic of': 'South Korea',
-        'korea': 'South Korea',
-        'republic of korea': 'South Korea',
-        'taiwan, province of china': 'Taiwan',
-        'taiwan': 'Taiwan',
-        'russian federation': 'Russia',
-        'russia': 'Russia',
-        'czech republic': 'Czech Republic',
-        'czechia': 'Czech Republic',
-        'netherlands': 'Netherlands',
-        'holland': 'Netherlands',
-        'switzerland': 'Switzerland',
-        'sweden': 'Sweden',
-        'norway': 'Norway',
-        'denmark': 'Denmark',
-        'finland': 'Finland',
-        'australia': 'Australia',
-        'japan': 'Japan',
-        'china': 'China',
-        'india': 'India',
-        'brazil': 'Brazil',
-        'mexico': 'Mexico',
-        'argentina': 'Argentina',
-        'south africa': 'South Africa',
-        'poland': 'Poland',
-        'austria': 'Austria',
-        'belgium': 'Belgium',
-        'portugal': 'Portugal',
-        'greece': 'Greece',
-        'hungary': 'Hungary',
-        'romania': 'Romania',
-        'bulgaria': 'Bulgaria',
-        'croatia': 'Croatia',
-        'slovenia': 'Slovenia',
-        'slovakia': 'Slovakia',
-        'estonia': 'Estonia',
-        'latvia': 'Latvia',
-        'lithuania': 'Lithuania',
-        'canada': 'Canada',
-        'germany': 'Germany',
-        'france': 'France',
-        'italy': 'Italy',
-        'spain': 'Spain'
-    }
-    
-    return country_mappings.get(country_lower, country)
+    return COUNTRY_MAPPINGS.get(country_lower, country)
 
-def parse_location_json(location_str: str) -> Dict:
+def extract_location_country(location_str: str) -> str:
     """
-    Parse location JSON and extract standardized country
+    Extract the standardized country from a location JSON string
     """
     if pd.isna(location_str) or location_str == 'Unknown':
-        return {'country': 'Unknown'}
+        return 'Unknown'
     
     try:
         # Handle multiple locations separated by |
@@ -83,40 +99,89 @@ def parse_location_json(location_str: str) -> Dict:
             countries = []
             for loc in locations:
                 try:
-                    loc_data = json.loads(loc.strip())
+                    loc_data = json_loads(loc)
                     country = loc_data.get('country', 'Unknown')
                     countries.append(standardize_country_name(country))
-                except:
+                except (ValueError, AttributeError):
+                    # Malformed JSON or a non-object value
                     continue
             # Return the most common country, or first if all unique
             if countries:
-                return {'country': max(set(countries), key=countries.count)}
+                return Counter(countries).most_common(1)[0][0]
             else:
-                return {'country': 'Unknown'}
+                return 'Unknown'
         else:
             # Single location
-            loc_data = json.loads(location_str.strip())
+            loc_data = json_loads(location_str)
             country = loc_data.get('country', 'Unknown')
-            return {'country': standardize_country_name(country)}
-    except:
-        return {'country': 'Unknown'}
+            return standardize_country_name(country)
+    except (ValueError, AttributeError, TypeError):
+        # Malformed JSON, a non-object value, or a non-string cell
+        return 'Unknown'
+
+def parse_location_json(location_str: str) -> Dict:
+    """
+    Parse location JSON and extract standardized country
+    """
+    return {'country': extract_location_country(location_str)}
+
+def extract_location_countries(locations: pd.Series, max_workers: int = None) -> List[str]:
+    """
+    Extract standardized countries for a whole column, parsing each distinct string once
+    """
+    codes, uniques = pd.factorize(locations, use_na_sentinel=False)
+    if len(uniques) >= PARALLEL_MIN_LOCATIONS and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            countries = list(executor.map(extract_location_country, uniques, chunksize=PARALLEL_CHUNKSIZE))
+    else:
+        countries = [extract_location_country(location_str) for location_str in uniques]
+    return [countries[code] for code in codes]
 
-def standardize_locations_in_csv(input_file: str, output_file: str):
+def read_trials_csv(input_file: str) -> pd.DataFrame:
     """
-    Standardize location names in the CSV file
+    Read a trials CSV with the multithreaded pyarrow engine, falling back to the default parser
+    """
+    try:
+        return pd.read_csv(
+            input_file,
+            engine='pyarrow',
+            dtype={col: str for col in TEXT_DATE_COLUMNS}
+        )
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        print(f"⚠️  pyarrow CSV engine unavailable ({e}), using default parser")
+        return pd.read_csv(input_file)
+
+def write_trials_csv(df: pd.DataFrame, output_file: str):
+    """
+    Write a trials CSV with pyarrow's multithreaded writer, falling back to pandas
+    """
+    try:
+        import pyarrow as pa
+        from pyarrow import csv as pacsv
+        pacsv.write_csv(
+            pa.Table.from_pandas(df, preserve_index=False),
+            output_file,
+            write_options=pacsv.WriteOptions(quoting_style='needed')
+        )
+    except Exception as e:
+        print(f"⚠️  pyarrow CSV writer unavailable ({e}), using pandas writer")
+        df.to_csv(output_file, index=False)
+
+def standardize_locations_in_csv(input_file: str, output_file: str, write_parquet: bool = True):
+    """
+    Standardize location names in the CSV file (plus a Parquet copy for faster reloads)
     """
     print(f"Loading data from {input_file}...")
-    df = pd.read_csv(input_file)
+    df = read_trials_csv(input_file)
     
     print(f"Original data shape: {df.shape}")
     print(f"Processing {len(df)} rows...")
     
-    # Parse locations and extract standardized countries
+    # Parse locations and add the standardized country column
     print("Parsing location JSON and standardizing country names...")
-    location_data = df['locations'].apply(parse_location_json)
-    
-    # Add standardized country column
-    df['country'] = location_data.apply(lambda x: x.get('country', 'Unknown'))
+    df['country'] = extract_location_countries(df['locations'])
     
     # Show before/after comparison
     print("\nCountry name standardization results:")
@@ -126,7 +191,14 @@ def standardize_locations_in_csv(input_file: str, output_file: str):
     
     # Save standardized data
     print(f"\nSaving standardized data to {output_file}...")
-    df.to_csv(output_file, index=False)
+    write_trials_csv(df, output_file)
+    if write_parquet:
+        parquet_file = os.path.splitext(output_file)[0] + '.parquet'
+        try:
+            df.to_parquet(parquet_file, compression='zstd', index=False)
+            print(f"✅ Wrote Parquet copy to {parquet_file}")
+        except Exception as e:
+            print(f"⚠️  Could not write Parquet copy ({e}), CSV output only")
     print("✅ Location standardization complete!")
     
     return df
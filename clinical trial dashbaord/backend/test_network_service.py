@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Pin sponsor name fuzzy matching; rapidfuzz and the pure-Python fallback must agree
+"""
+
+import sys
+import os
+
+import pytest
+
+# Make the backend packages importable when run from the repo root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services import network_service
+from services.network_service import NetworkService
+
+
+@pytest.fixture(params=['fallback', 'rapidfuzz'])
+def service(request, monkeypatch):
+    """NetworkService on each Jaro-Winkler implementation (rapidfuzz skipped when not installed)"""
+    if request.param == 'fallback':
+        monkeypatch.setattr(network_service, 'process', None)
+        monkeypatch.setattr(network_service, 'JaroWinkler', None)
+    else:
+        pytest.importorskip('rapidfuzz')
+        if network_service.process is None:
+            pytest.skip('network_service was imported without rapidfuzz')
+    return NetworkService()
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('yale', 'Yale University'),            # exact alias
+    ('stanfrod', 'Stanford University'),    # transposition, still above the cutoff
+    ('stnaford', 'Stanford University'),
+    ('yael', 'Yale University'),            # scores 0.933, just above 0.93
+    ('ayle', 'Ayle'),                       # transposition without a shared prefix: 0.917, no match
+    ('acme biotech', 'Acme Biotech'),       # no alias close enough, title-cased
+])
+def test_fuzzy_match_name(service, name, expected):
+    assert service._fuzzy_match_name(name) == expected
+
+
+@pytest.mark.parametrize('s1, s2, expected', [
+    ('martha', 'marhta', 0.9611),           # one transposition
+    ('dixon', 'dicksonx', 0.8133),
+    ('abcdef', 'abxyzw', 0.5556),           # shared prefix, but Jaro below 0.7 gets no boost
+    ('abc', 'xyz', 0.0),
+])
+def test_jaro_winkler_similarity(service, s1, s2, expected):
+    assert service._jaro_winkler_similarity(s1, s2) == pytest.approx(expected, abs=1e-4)
+
+
+def test_jaro_winkler_score_cutoff(service):
+    assert service._jaro_winkler_similarity('martha', 'marhta', score_cutoff=0.97) == 0.0
+
+
+def test_normalize_entity_name(service):
+    service.warm_normalize_cache(['Ayle', 'Stanfrod'])
+    assert service.normalize_entity_name('Ayle') == 'Ayle'
+    assert service.normalize_entity_name('Stanfrod') == 'Stanford University'
+    assert service.normalize_entity_name('  YALE ') == 'Yale University'
@@ -1,6 +1,10 @@
 from typing import Dict, List
 import pandas as pd
 import numpy as np
+from utils.statistics import filter_enrollment_outliers
+
+# Country buckets that don't identify a real market
+UNSEGMENTED_COUNTRIES = frozenset(('Unknown', 'Other'))
 
 def calculate_robust_enrollment_metrics(data: pd.DataFrame) -> Dict:
     """
@@ -10,23 +14,21 @@ def calculate_robust_enrollment_metrics(data: pd.DataFrame) -> Dict:
     if data.empty:
         return {"median_enrollment": 0, "enrollment_change": 0, "trials_affected": 0}
     
-    # Remove top 5% outliers
-    enrollment_sorted = data['enrollmentCount'].sort_values(ascending=False)
-    outlier_threshold = enrollment_sorted.quantile(0.95)
-    filtered_data = data[data['enrollmentCount'] <= outlier_threshold]
+    # Remove top 5% outliers (missing counts never pass the cutoff)
+    filtered_enrollments = filter_enrollment_outliers(data['enrollmentCount'].to_numpy(dtype=np.float64, na_value=np.nan))
     
-    if filtered_data.empty:
+    if len(filtered_enrollments) == 0:
         return {"median_enrollment": 0, "enrollment_change": 0, "trials_affected": 0}
     
     # Calculate median enrollment
-    median_enrollment = filtered_data['enrollmentCount'].median()
+    median_enrollment = np.median(filtered_enrollments)
     
     # Calculate change (if we have baseline data)
     # For now, return current median
     return {
         "median_enrollment": median_enrollment,
         "enrollment_change": 0,  # Will be calculated in comparison
-        "trials_affected": len(filtered_data)
+        "trials_affected": len(filtered_enrollments)
     }
 
 def generate_biotech_insights(analytics_data: Dict, window: str) -> List[Dict]:
@@ -54,24 +56,27 @@ def generate_biotech_insights(analytics_data: Dict, window: str) -> List[Dict]:
     
     # 1. Market Momentum Insight - Trial Starts
     trial_starts_data = metrics.get('trial_starts', {})
-    if abs(trial_starts_data.get('delta_pct', 0)) > TRIAL_STARTS_THRESHOLD:
-        trend = "up" if trial_starts_data.get('delta_pct', 0) > 0 else "down"
-        top_sponsor = list(top_sponsors.keys())[0] if top_sponsors else "leading sponsors"
-        top_condition = list(top_conditions.keys())[0] if top_conditions else "neurology"
+    starts_delta = trial_starts_data.get('delta_pct', 0)
+    starts_abs_delta = abs(starts_delta)
+    if starts_abs_delta > TRIAL_STARTS_THRESHOLD:
+        trend = "up" if starts_delta > 0 else "down"
+        top_sponsor = next(iter(top_sponsors), "leading sponsors")
+        top_condition = next(iter(top_conditions), "neurology")
         
         insight_1 = {
-            "headline": f"Clinical trial starts {trend} {abs(trial_starts_data['delta_pct']):.0f}% in last {window}",
+            "headline": f"Clinical trial starts {trend} {starts_abs_delta:.0f}% in last {window}",
             "context": f"Driven by {top_sponsor} and {len(top_sponsors)} active sponsors, with {top_condition} leading therapeutic areas.",
             "category": "Market Momentum",
-            "significance": abs(trial_starts_data['delta_pct']),
-            "confidence": "High confidence" if abs(trial_starts_data.get('delta_pct', 0)) > 25 else "Moderate confidence"
+            "significance": starts_abs_delta,
+            "confidence": "High confidence" if starts_abs_delta > 25 else "Moderate confidence"
         }
         insights.append(insight_1)
     
     # 2. Risk Signals Insight - Withdrawals
-    total_trials = sum(status_transitions.values()) if status_transitions else 0
-    withdrawal_rate = (status_transitions.get('Withdrawn', 0) / total_trials * 100) if total_trials > 0 else 0
-    termination_count = status_transitions.get('Terminated', 0)
+    status_counts = pd.Series(status_transitions, dtype='int64')
+    total_trials = int(status_counts.sum())
+    withdrawal_rate = (status_counts.get('Withdrawn', 0) / total_trials * 100) if total_trials > 0 else 0
+    termination_count = int(status_counts.get('Terminated', 0))
     
     if withdrawal_rate > WITHDRAWAL_THRESHOLD or termination_count > 5:
         insight_2 = {
@@ -85,50 +90,55 @@ def generate_biotech_insights(analytics_data: Dict, window: str) -> List[Dict]:
     
     # 3. Regulatory/Competitive Shifts Insight - Geographic Activity
     if geo_distribution:
-        # Filter out "Unknown" countries and find real leaders
-        valid_countries = [g for g in geo_distribution if g.get('country') not in ['Unknown', 'Other']]
-        if valid_countries:
-            top_country = max(valid_countries, key=lambda x: x.get('trial_count', 0))
-            if top_country.get('trial_count', 0) > GEO_ACTIVITY_THRESHOLD:
+        # Filter out "Unknown" countries and find real leaders in a single pass
+        valid_countries = (g for g in geo_distribution if g.get('country') not in UNSEGMENTED_COUNTRIES)
+        top_country = max(valid_countries, key=lambda x: x.get('trial_count', 0), default=None)
+        if top_country is not None:
+            country_trials = top_country.get('trial_count', 0)
+            if country_trials > GEO_ACTIVITY_THRESHOLD:
                 insight_3 = {
                     "headline": f"{top_country['country']} leads trial activity with {top_country['trial_count']} studies",
                     "context": f"Average enrollment of {top_country.get('avg_enrollment', 0):.0f} participants per trial, with quality scores averaging {top_country.get('avg_quality', 0):.1f}.",
                     "category": "Regulatory/Competitive Shifts",
-                    "significance": top_country.get('trial_count', 0),
-                    "confidence": "High confidence" if top_country.get('trial_count', 0) > 30 else "Moderate confidence"
+                    "significance": country_trials,
+                    "confidence": "High confidence" if country_trials > 30 else "Moderate confidence"
                 }
                 insights.append(insight_3)
     
     # 4. Market Momentum Insight - Enrollment Trends (segmented)
     if len(insights) < 3:
         enrollment_data = metrics.get('enrollment', {})
-        if abs(enrollment_data.get('delta_pct', 0)) > ENROLLMENT_THRESHOLD:
-            trend = "up" if enrollment_data.get('delta_pct', 0) > 0 else "down"
+        enrollment_delta = enrollment_data.get('delta_pct', 0)
+        enrollment_abs_delta = abs(enrollment_delta)
+        if enrollment_abs_delta > ENROLLMENT_THRESHOLD:
+            trend = "up" if enrollment_delta > 0 else "down"
             
             # Get segmentation data for context
-            top_condition = list(top_conditions.keys())[0] if top_conditions else "neurology"
+            top_condition = next(iter(top_conditions), "neurology")
             top_phase = "Phase II"  # Default, could be enhanced with phase analysis
             
             insight_enrollment = {
-                "headline": f"Median enrollment in {top_condition} {top_phase} trials {trend} {abs(enrollment_data.get('delta_pct', 0)):.0f}%",
+                "headline": f"Median enrollment in {top_condition} {top_phase} trials {trend} {enrollment_abs_delta:.0f}%",
                 "context": f"Outlier-adjusted median {'surged to' if trend == 'up' else 'declined to'} {enrollment_data.get('current_value', 0):.0f} participants in last {window}, reflecting {'larger' if trend == 'up' else 'smaller'} targeted studies.",
                 "category": "Market Momentum",
-                "significance": abs(enrollment_data.get('delta_pct', 0)),
-                "confidence": "High confidence" if abs(enrollment_data.get('delta_pct', 0)) > 50 else "Moderate confidence"
+                "significance": enrollment_abs_delta,
+                "confidence": "High confidence" if enrollment_abs_delta > 50 else "Moderate confidence"
             }
             insights.append(insight_enrollment)
     
     # 5. Quality Intelligence Insight (if we still need more)
     if len(insights) < 3:
         quality_data = metrics.get('quality_score', {})
-        if abs(quality_data.get('delta_pct', 0)) > 10:
-            trend = "improved" if quality_data.get('delta_pct', 0) > 0 else "declined"
+        quality_delta = quality_data.get('delta_pct', 0)
+        quality_abs_delta = abs(quality_delta)
+        if quality_abs_delta > 10:
+            trend = "improved" if quality_delta > 0 else "declined"
             insight_quality = {
-                "headline": f"Trial quality scores {trend} {abs(quality_data.get('delta_pct', 0)):.0f}% in last {window}",
+                "headline": f"Trial quality scores {trend} {quality_abs_delta:.0f}% in last {window}",
                 "context": f"Current average quality score of {quality_data.get('current_value', 0):.1f}, indicating {'stronger' if trend == 'improved' else 'weaker'} study designs.",
                 "category": "Risk Signals" if trend == "declined" else "Market Momentum",
-                "significance": abs(quality_data.get('delta_pct', 0)),
-                "confidence": "High confidence" if abs(quality_data.get('delta_pct', 0)) > 20 else "Moderate confidence"
+                "significance": quality_abs_delta,
+                "confidence": "High confidence" if quality_abs_delta > 20 else "Moderate confidence"
             }
             insights.append(insight_quality)
     
@@ -1,70 +1,97 @@
+import re
 import pandas as pd
 import numpy as np
 from typing import Dict, List
 
+# Common country patterns, checked in order - first substring match wins
+COUNTRIES = [
+    'United States', 'USA', 'US', 'Canada', 'United Kingdom', 'UK', 'Germany',
+    'France', 'Italy', 'Spain', 'Netherlands', 'Switzerland', 'Sweden', 'Norway',
+    'Denmark', 'Finland', 'Australia', 'Japan', 'China', 'India', 'Brazil',
+    'Mexico', 'Argentina', 'South Africa', 'Russia', 'Poland', 'Czech Republic',
+    'Austria', 'Belgium', 'Portugal', 'Greece', 'Hungary', 'Romania', 'Bulgaria',
+    'Croatia', 'Slovenia', 'Slovakia', 'Estonia', 'Latvia', 'Lithuania'
+]
+
+# (lowercase name, name) pairs in the same order, lowercased once at import
+COUNTRIES_LOWER = tuple((country.lower(), country) for country in COUNTRIES)
+
+# (lowercase substrings, standardized label) rules in priority order
+COUNTRY_RULES = [([country_lower], country) for country_lower, country in COUNTRIES_LOWER]
+
+# Fallback country labels indexed by "location is Unknown"
+DEFAULT_COUNTRY_LABELS = np.array(['Other', 'Unknown'], dtype=object)
+
+PHASE_RULES = [
+    (['phase 1', 'phase1'], 'Phase 1'),
+    (['phase 2', 'phase2'], 'Phase 2'),
+    (['phase 3', 'phase3'], 'Phase 3'),
+    (['phase 4', 'phase4'], 'Phase 4'),
+    (['early'], 'Early Phase'),
+]
+
+STATUS_RULES = [
+    (['recruiting'], 'Recruiting'),
+    (['completed'], 'Completed'),
+    (['terminated'], 'Terminated'),
+    (['suspended'], 'Suspended'),
+    (['withdrawn'], 'Withdrawn'),
+    (['not yet recruiting'], 'Not Yet Recruiting'),
+    (['active'], 'Active'),
+]
+
+def _first_match_label(value_lower: str, rules: List) -> str:
+    """Scalar form of the first-match-wins rule tables (None when no rule matches)"""
+    for patterns, label in rules:
+        if any(pattern in value_lower for pattern in patterns):
+            return label
+    return None
+
 def extract_country(location_str: str) -> str:
     """Extract country from location string"""
     if pd.isna(location_str) or location_str == 'Unknown':
         return 'Unknown'
     
-    # Common country patterns
-    countries = [
-        'United States', 'USA', 'US', 'Canada', 'United Kingdom', 'UK', 'Germany',
-        'France', 'Italy', 'Spain', 'Netherlands', 'Switzerland', 'Sweden', 'Norway',
-        'Denmark', 'Finland', 'Australia', 'Japan', 'China', 'India', 'Brazil',
-        'Mexico', 'Argentina', 'South Africa', 'Russia', 'Poland', 'Czech Republic',
-        'Austria', 'Belgium', 'Portugal', 'Greece', 'Hungary', 'Romania', 'Bulgaria',
-        'Croatia', 'Slovenia', 'Slovakia', 'Estonia', 'Latvia', 'Lithuania'
-    ]
-    
-    location_lower = location_str.lower()
-    for country in countries:
-        if country.lower() in location_lower:
-            return country
-    
-    return 'Other'
+    return _first_match_label(location_str.lower(), COUNTRY_RULES) or 'Other'
+
+def _first_match_labels(values: pd.Series, rules: List, default: pd.Series) -> pd.Series:
+    """Vectorized first-match-wins substring labelling over a lowercased column"""
+    lowered = values.astype(str).str.lower()
+    result = default.to_numpy(dtype=object).copy()
+    
+    # Each rule only scans the rows no earlier rule claimed
+    pending = np.arange(len(lowered))
+    for patterns, label in rules:
+        if not len(pending):
+            break
+        remaining = lowered.iloc[pending]
+        hit = np.zeros(len(pending), dtype=bool)
+        for pattern in patterns:
+            hit |= remaining.str.contains(pattern, regex=False).to_numpy(dtype=bool)
+        result[pending[hit]] = label
+        pending = pending[~hit]
+    return pd.Series(result, index=values.index)
+
+def _map_distinct_labels(values: pd.Series, rules: List, missing: str) -> pd.Series:
+    """Label each distinct value once, then map the labels back onto the column"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    distinct = pd.Series(uniques, dtype=object)
+    labels = _first_match_labels(distinct, rules, distinct.where(distinct.notna(), missing))
+    return pd.Series(labels.to_numpy(dtype=object)[codes], index=values.index)
 
 def standardize_phase(phase: str) -> str:
     """Standardize phase values"""
     if pd.isna(phase):
         return 'N/A'
     
-    phase_lower = str(phase).lower()
-    if 'phase 1' in phase_lower or 'phase1' in phase_lower:
-        return 'Phase 1'
-    elif 'phase 2' in phase_lower or 'phase2' in phase_lower:
-        return 'Phase 2'
-    elif 'phase 3' in phase_lower or 'phase3' in phase_lower:
-        return 'Phase 3'
-    elif 'phase 4' in phase_lower or 'phase4' in phase_lower:
-        return 'Phase 4'
-    elif 'early' in phase_lower:
-        return 'Early Phase'
-    else:
-        return phase
+    return _first_match_label(str(phase).lower(), PHASE_RULES) or phase
 
 def standardize_status(status: str) -> str:
     """Standardize status values"""
     if pd.isna(status):
         return 'Unknown'
     
-    status_lower = str(status).lower()
-    if 'recruiting' in status_lower:
-        return 'Recruiting'
-    elif 'completed' in status_lower:
-        return 'Completed'
-    elif 'terminated' in status_lower:
-        return 'Terminated'
-    elif 'suspended' in status_lower:
-        return 'Suspended'
-    elif 'withdrawn' in status_lower:
-        return 'Withdrawn'
-    elif 'not yet recruiting' in status_lower:
-        return 'Not Yet Recruiting'
-    elif 'active' in status_lower:
-        return 'Active'
-    else:
-        return status
+    return _first_match_label(str(status).lower(), STATUS_RULES) or status
 
 def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
     """Preprocess the clinical trials data"""
@@ -72,39 +99,44 @@ def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
     median_enrollment = df['enrollmentCount'].median()
     df['enrollmentCount'] = df['enrollmentCount'].fillna(median_enrollment)
     
-    # Convert dates - handle data quality issues
-    def safe_date_parse(date_str):
-        if pd.isna(date_str):
-            return pd.NaT
-        try:
-            # Try to parse as datetime
-            parsed = pd.to_datetime(date_str, errors='coerce')
-            if pd.isna(parsed):
-                return pd.NaT
-            return parsed
-        except:
-            return pd.NaT
-    
-    df['startDate'] = df['startDate'].apply(safe_date_parse)
-    df['completionDate'] = df['completionDate'].apply(safe_date_parse)
-    
-    # Clean phases
-    df['phases'] = df['phases'].fillna('N/A')
+    # Convert dates - handle data quality issues (each value parsed on its own, bad values -> NaT)
+    df['startDate'] = pd.to_datetime(df['startDate'], errors='coerce', format='mixed')
+    df['completionDate'] = pd.to_datetime(df['completionDate'], errors='coerce', format='mixed')
     
     # Clean locations
     df['locations'] = df['locations'].fillna('Unknown')
     
     # Extract country from locations
-    df['country'] = df['locations'].apply(lambda x: extract_country(str(x)))
+    is_unknown = df['locations'].eq('Unknown')
+    # Label cells reference one shared string per label, so downstream hashing/equality stays cheap
+    default_country = pd.Series(DEFAULT_COUNTRY_LABELS[is_unknown.to_numpy(dtype=np.intp)], index=df.index)
+    df['country'] = _first_match_labels(df['locations'], COUNTRY_RULES, default_country).mask(is_unknown, 'Unknown')
     
-    # Standardize phases
-    df['phases'] = df['phases'].apply(standardize_phase)
+    # Standardize phases (missing phases become 'N/A')
+    df['phases'] = _map_distinct_labels(df['phases'], PHASE_RULES, 'N/A')
     
     # Standardize status
-    df['overallStatus'] = df['overallStatus'].apply(standardize_status)
+    df['overallStatus'] = _map_distinct_labels(df['overallStatus'], STATUS_RULES, 'Unknown')
     
     return df
 
+# Low-cardinality descriptive columns that are only read, never grouped or served as counts
+LOW_CARDINALITY_COLUMNS = ['studyType', 'allocation', 'masking', 'ipdSharing']
+
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast integer columns and store low-cardinality text columns as categories"""
+    for col in df.select_dtypes(include='integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    
+    for col in LOW_CARDINALITY_COLUMNS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype('category')
+    
+    return df
+
+# Sentence boundaries for summary extraction
+SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+
 def extract_summary(text: str, max_sentences: int = 2) -> str:
     """Extract key sentences from trial summary"""
     if not text or pd.isna(text):
@@ -116,9 +148,7 @@ def extract_summary(text: str, max_sentences: int = 2) -> str:
         return text
     
     # Fallback: simple sentence extraction
-    import re
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
+    sentences = [s for s in (part.strip() for part in SENTENCE_SPLIT_RE.split(text)) if len(s) > 20]
     if sentences:
         return ". ".join(sentences[:max_sentences]) + "."
     
@@ -4,6 +4,11 @@ from scipy import stats
 from typing import Dict, List
 from datetime import datetime, timedelta
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to the NumPy kernel
+    njit = None
+
 def calculate_change_metrics(current_data: pd.DataFrame, baseline_data: pd.DataFrame, metric: str, quality_scores_cache: Dict = None) -> Dict:
     """
     Calculate change metrics between current and baseline periods.
@@ -20,13 +25,17 @@ def calculate_change_metrics(current_data: pd.DataFrame, baseline_data: pd.DataF
             current_value = len(current_data)
             baseline_value = len(baseline_data)
         elif metric == "enrollment":
-            # Use median enrollment with outlier filtering
-            current_value = calculate_robust_enrollment_median(current_data)
-            baseline_value = calculate_robust_enrollment_median(baseline_data)
+            # Use median enrollment with outlier filtering - the filtered values also feed the t-test
+            current_enrollments = robust_enrollment_values(current_data)
+            baseline_enrollments = robust_enrollment_values(baseline_data)
+            current_value = np.median(current_enrollments) if len(current_enrollments) > 0 else 0
+            baseline_value = np.median(baseline_enrollments) if len(baseline_enrollments) > 0 else 0
         elif metric == "quality_score":
             if quality_scores_cache:
-                current_value = calculate_quality_score(current_data, quality_scores_cache)
-                baseline_value = calculate_quality_score(baseline_data, quality_scores_cache)
+                # Flatten the cache once and share it between both periods
+                score_series = build_quality_score_series(quality_scores_cache)
+                current_value = calculate_quality_score(current_data, score_series)
+                baseline_value = calculate_quality_score(baseline_data, score_series)
             else:
                 current_value = 0
                 baseline_value = 0
@@ -43,27 +52,19 @@ def calculate_change_metrics(current_data: pd.DataFrame, baseline_data: pd.DataF
         # Calculate p-value for statistical significance
         try:
             p_value = 1.0  # Initialize p_value
-            if metric == "trial_starts" or metric == "total_trials":
+            if abs(delta_pct) < 1.0:
+                # No practical change - skip the significance test
+                p_value = 1.0
+            elif metric == "trial_starts" or metric == "total_trials":
                 # Poisson test for count data
                 if baseline_value > 0 and current_value > 0:
                     p_value = stats.poisson.cdf(current_value, baseline_value)
                 else:
                     p_value = 1.0
             elif metric == "enrollment":
-                # T-test for continuous data (enrollment)
-                if len(current_data) > 0 and len(baseline_data) > 0:
-                    current_enrollments = current_data['enrollmentCount'].dropna()
-                    baseline_enrollments = baseline_data['enrollmentCount'].dropna()
-                    if len(current_enrollments) > 0 and len(baseline_enrollments) > 0:
-                        # Apply outlier filtering
-                        current_filtered = filter_enrollment_outliers(current_enrollments)
-                        baseline_filtered = filter_enrollment_outliers(baseline_enrollments)
-                        if len(current_filtered) > 0 and len(baseline_filtered) > 0:
-                            t_stat, p_value = stats.ttest_ind(current_filtered, baseline_filtered)
-                        else:
-                            p_value = 1.0
-                    else:
-                        p_value = 1.0
+                # T-test for continuous data (enrollment), on the already outlier-filtered values
+                if len(current_enrollments) > 0 and len(baseline_enrollments) > 0:
+                    t_stat, p_value = stats.ttest_ind(current_enrollments, baseline_enrollments)
                 else:
                     p_value = 1.0
             else:
@@ -91,25 +92,35 @@ def calculate_change_metrics(current_data: pd.DataFrame, baseline_data: pd.DataF
             "confidence": "Moderate confidence"
         }
 
-def calculate_quality_score(data: pd.DataFrame, quality_scores_cache: Dict) -> float:
+def build_quality_score_series(quality_scores_cache: Dict) -> pd.Series:
+    """
+    Flatten a quality scores cache into an nctId -> total_score Series.
+    """
+    frame = getattr(quality_scores_cache, 'frame', None)
+    if frame is not None and 'total_score' in frame.columns:
+        return frame['total_score']
+    return pd.Series(
+        {nct_id: scores.get('total_score', 0) for nct_id, scores in quality_scores_cache.items()},
+        dtype='float64'
+    )
+
+def calculate_quality_score(data: pd.DataFrame, quality_scores_cache) -> float:
     """
-    Calculate average quality score for the given data using the quality scores cache.
+    Calculate average quality score for the given data using the quality scores cache
+    (a cache dict or a Series from build_quality_score_series).
     """
     if data.empty:
         return 0
     
     # First try to get scores from the quality_scores_cache
-    if quality_scores_cache:
-        scores = []
-        for _, row in data.iterrows():
-            nct_id = str(row['nctId'])
-            if nct_id in quality_scores_cache:
-                score = quality_scores_cache[nct_id].get('total_score', 0)
-                if score > 0:  # Only include valid scores
-                    scores.append(score)
+    if len(quality_scores_cache):
+        if not isinstance(quality_scores_cache, pd.Series):
+            quality_scores_cache = build_quality_score_series(quality_scores_cache)
+        scores = data['nctId'].astype(str).map(quality_scores_cache)
+        scores = scores[scores > 0]  # Only include valid scores
         
-        if scores:
-            return sum(scores) / len(scores)
+        if len(scores):
+            return scores.mean()
     
     # Fallback: try to get scores directly from the dataframe columns
     if 'total_quality_score' in data.columns:
@@ -124,36 +135,95 @@ def calculate_quality_score(data: pd.DataFrame, quality_scores_cache: Dict) -> f
     
     return 0
 
-def calculate_robust_enrollment_median(data: pd.DataFrame) -> float:
+def enrollment_outlier_threshold(enrollments: np.ndarray) -> float:
     """
-    Calculate median enrollment excluding top 5% outliers.
+    Get the top-5% outlier cutoff for non-missing enrollment counts
+    (np.quantile selects with np.partition, so no full sort is needed).
+    """
+    return np.quantile(enrollments, 0.95)
+
+def _robust_median_kernel(enrollments: np.ndarray) -> float:
+    """
+    Compiled robust median: NaN when nothing is left after filtering.
+    """
+    # Compact non-NaN values into a scratch buffer
+    values = np.empty(len(enrollments))
+    n = 0
+    for value in enrollments:
+        if not np.isnan(value):
+            values[n] = value
+            n += 1
+    if n == 0:
+        return np.nan
+    values = values[:n]
+    
+    # 95th percentile with np.quantile's linear interpolation, same float steps
+    virtual_index = (n - 1) * 0.95
+    lower_index = int(np.floor(virtual_index))
+    upper_index = min(lower_index + 1, n - 1)
+    gamma = virtual_index - lower_index
+    partitioned = np.partition(values, upper_index)
+    upper = partitioned[upper_index]
+    lower = partitioned[:upper_index].max() if lower_index < upper_index else upper
+    diff = upper - lower
+    threshold = upper - diff * (1.0 - gamma) if gamma >= 0.5 else lower + diff * gamma
+    
+    kept = values[values <= threshold]
+    if len(kept) == 0:
+        return np.nan
+    return np.median(kept)
+
+if njit is not None:
+    _robust_median_kernel = njit(cache=True)(_robust_median_kernel)
+    # Compile at import so the first request doesn't pay for it
+    _robust_median_kernel(np.array([1.0, np.nan, 2.0]))
+else:
+    _robust_median_kernel = None
+
+def robust_enrollment_values(data: pd.DataFrame) -> np.ndarray:
+    """
+    Non-missing enrollment counts with the top 5% outliers removed.
     """
     if data.empty or 'enrollmentCount' not in data.columns:
-        return 0
+        return np.empty(0)
     
-    # Filter out NaN values
-    enrollments = data['enrollmentCount'].dropna()
-    if len(enrollments) == 0:
-        return 0
+    return filter_enrollment_outliers(data['enrollmentCount'].to_numpy(dtype=np.float64, na_value=np.nan))
+
+def robust_enrollment_median(enrollments: np.ndarray) -> float:
+    """
+    Median of a float enrollment array, ignoring NaN and the top 5% outliers.
+    """
+    if _robust_median_kernel is not None:
+        median = _robust_median_kernel(np.ascontiguousarray(enrollments, dtype=np.float64))
+        return 0 if np.isnan(median) else median
     
-    # Remove top 5% outliers
-    outlier_threshold = enrollments.quantile(0.95)
-    filtered_enrollments = enrollments[enrollments <= outlier_threshold]
+    # Filter out NaN values and top 5% outliers
+    filtered_enrollments = filter_enrollment_outliers(enrollments)
     
     if len(filtered_enrollments) == 0:
         return 0
     
-    return filtered_enrollments.median()
+    return np.median(filtered_enrollments)
 
-def filter_enrollment_outliers(enrollments: pd.Series) -> pd.Series:
+def calculate_robust_enrollment_median(data: pd.DataFrame) -> float:
     """
-    Filter out top 5% enrollment outliers.
+    Calculate median enrollment excluding top 5% outliers.
     """
+    if data.empty or 'enrollmentCount' not in data.columns:
+        return 0
+    
+    return robust_enrollment_median(data['enrollmentCount'].to_numpy(dtype=np.float64, na_value=np.nan))
+
+def filter_enrollment_outliers(enrollments: np.ndarray) -> np.ndarray:
+    """
+    Filter out missing values and top 5% enrollment outliers.
+    """
+    enrollments = np.ascontiguousarray(enrollments, dtype=np.float64)
+    enrollments = enrollments[~np.isnan(enrollments)]
     if len(enrollments) == 0:
         return enrollments
     
-    outlier_threshold = enrollments.quantile(0.95)
-    return enrollments[enrollments <= outlier_threshold]
+    return enrollments[enrollments <= enrollment_outlier_threshold(enrollments)]
 
 def get_enrollment_segmentation(data: pd.DataFrame) -> Dict:
     """
@@ -163,21 +233,28 @@ def get_enrollment_segmentation(data: pd.DataFrame) -> Dict:
         return {}
     
     segments = {}
+    enrollments = data['enrollmentCount'].to_numpy(dtype=np.float64, na_value=np.nan)
     
-    # Segment by phase
+    # Segment by phase - match each distinct phase string once, then map back through the codes.
+    # Matches overlap on purpose ('Phase I' is also a substring of 'Phase II')
+    phase_codes, phase_values = pd.factorize(data['phase'].str.lower())
     for phase in ['Phase I', 'Phase II', 'Phase III', 'Phase IV']:
-        phase_data = data[data['phase'].str.contains(phase, case=False, na=False)]
-        if len(phase_data) > 0:
-            segments[f'{phase}_enrollment'] = calculate_robust_enrollment_median(phase_data)
-            segments[f'{phase}_trials'] = len(phase_data)
+        phase_lower = phase.lower()
+        # Trailing False catches the -1 code of missing phases
+        matches = np.array([phase_lower in value for value in phase_values] + [False], dtype=bool)
+        phase_mask = matches[phase_codes]
+        phase_trials = int(phase_mask.sum())
+        if phase_trials > 0:
+            segments[f'{phase}_enrollment'] = robust_enrollment_median(enrollments[phase_mask])
+            segments[f'{phase}_trials'] = phase_trials
     
-    # Segment by therapeutic area (using condition)
+    # Segment by therapeutic area (using condition) - one hash pass assigns rows to the top conditions
     top_conditions = data['condition'].value_counts().head(5)
-    for condition, count in top_conditions.items():
+    condition_codes = top_conditions.index.get_indexer(data['condition'])
+    for code, (condition, count) in enumerate(top_conditions.items()):
         if count >= 5:  # Only include if ≥5 trials
-            condition_data = data[data['condition'] == condition]
-            segments[f'{condition}_enrollment'] = calculate_robust_enrollment_median(condition_data)
-            segments[f'{condition}_trials'] = len(condition_data)
+            segments[f'{condition}_enrollment'] = robust_enrollment_median(enrollments[condition_codes == code])
+            segments[f'{condition}_trials'] = int(count)
     
     return segments
 
@@ -194,15 +271,14 @@ def get_time_window_days(window: str) -> int:
 def split_data_by_period(df: pd.DataFrame, window: str) -> tuple:
     """Split data into current and baseline periods"""
     # Filter out rows with invalid dates and convert to datetime
-    df_copy = df.copy()
-    
-    # Convert startDate to datetime if it's not already
-    if 'startDate' in df_copy.columns:
-        df_copy['startDate'] = pd.to_datetime(df_copy['startDate'], errors='coerce')
+    df_copy = df
     
-    # Convert completionDate to datetime if it's not already
-    if 'completionDate' in df_copy.columns:
-        df_copy['completionDate'] = pd.to_datetime(df_copy['completionDate'], errors='coerce')
+    # Convert date columns to datetime if they're not already (preprocess_data parses them up front)
+    for date_col in ('startDate', 'completionDate'):
+        if date_col in df_copy.columns and not pd.api.types.is_datetime64_any_dtype(df_copy[date_col]):
+            if df_copy is df:
+                df_copy = df.copy()
+            df_copy[date_col] = pd.to_datetime(df_copy[date_col], errors='coerce')
     
     valid_dates_df = df_copy[df_copy['startDate'].notna()]
     
@@ -223,30 +299,18 @@ def split_data_by_period(df: pd.DataFrame, window: str) -> tuple:
     baseline_start = current_start - timedelta(days=window_days_count)
     
     # Split data into current and baseline periods for trial starts (flow metric)
-    current_trial_starts = valid_dates_df[
-        (valid_dates_df['startDate'] >= current_start)
-    ]
-    
-    baseline_trial_starts = valid_dates_df[
-        (valid_dates_df['startDate'] >= baseline_start) & 
-        (valid_dates_df['startDate'] < current_start)
-    ]
-    
-    # For total trials (stock metric), include all trials that are active in the current period
-    # This means trials that started before the current period but are still ongoing
-    # For simplicity, we'll use the same data but this could be enhanced to check completion dates
-    current_total_trials = valid_dates_df[
-        (valid_dates_df['startDate'] >= current_start) | 
-        ((valid_dates_df['startDate'] < current_start) & 
-         ((valid_dates_df['completionDate'].isna()) | 
-          (valid_dates_df['completionDate'] >= current_start)))
-    ]
-    
-    baseline_total_trials = valid_dates_df[
-        (valid_dates_df['startDate'] >= baseline_start) | 
-        ((valid_dates_df['startDate'] < baseline_start) & 
-         ((valid_dates_df['completionDate'].isna()) | 
-          (valid_dates_df['completionDate'] >= baseline_start)))
-    ]
+    start_dates = valid_dates_df['startDate']
+    if start_dates.is_monotonic_increasing:
+        # Date-sorted input: both periods are contiguous slices
+        sorted_starts = start_dates.to_numpy()
+        baseline_pos = np.searchsorted(sorted_starts, pd.Timestamp(baseline_start).to_datetime64(), side='left')
+        current_pos = np.searchsorted(sorted_starts, pd.Timestamp(current_start).to_datetime64(), side='left')
+        current_trial_starts = valid_dates_df.iloc[current_pos:]
+        baseline_trial_starts = valid_dates_df.iloc[baseline_pos:current_pos]
+    else:
+        in_current = (start_dates >= current_start).to_numpy()
+        in_baseline = (start_dates >= baseline_start).to_numpy() & ~in_current
+        current_trial_starts = valid_dates_df[in_current]
+        baseline_trial_starts = valid_dates_df[in_baseline]
     
     return current_trial_starts, baseline_trial_starts, current_start, baseline_start
@@ -2,32 +2,58 @@
 """
 Process all interventional studies from parkinson_trials_2010.csv
 Calculate scores and update quality_scores.json
-Save detailed breakdowns and log errors to failed_apis.json
+Save detailed breakdowns and log errors to failed_apis.jsonl
 """
 
 import json
-import pandas as pd
 import sys
 import os
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from proper_csv_scorer import ProperCSVScorer, print_detailed_breakdown
+from proper_csv_scorer import ProperCSVScorer, TrialScore, print_detailed_breakdown, json_line, MAX_WORKERS
 
-def get_interventional_trials():
-    """Get all interventional trials from CSV"""
-    csv_path = '../data/parkinson_trials_2010.csv'
-    df = pd.read_csv(csv_path)
-    
-    # Filter for interventional studies
-    interventional_trials = df[df['studyType'] == 'INTERVENTIONAL']
-    
-    print(f"Found {len(interventional_trials)} interventional trials")
-    return interventional_trials['nctId'].tolist()
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+try:
+    from tqdm import tqdm
+except ImportError:  # tqdm is optional; fall back to periodic progress lines
+    tqdm = None
+
+log = logging.getLogger(__name__)
+
+# Without tqdm, print one progress line per this many trials
+PROGRESS_EVERY = 100
+
+def track_progress(iterable, total: int):
+    """Wrap an iterable with a tqdm progress bar, or print a progress line every PROGRESS_EVERY items"""
+    if tqdm is not None:
+        yield from tqdm(iterable, total=total, desc="Scoring")
+        return
+    for i, item in enumerate(iterable, 1):
+        if i % PROGRESS_EVERY == 0 or i == total:
+            print(f"⏳ Scored {i}/{total} trials")
+        yield item
 
-def save_detailed_breakdown(nct_id: str, score, breakdown_file: str):
-    """Save detailed breakdown without interpretation"""
+def score_from_entry(nct_id: str, entry: dict) -> TrialScore:
+    """Rebuild a TrialScore from a saved quality_scores.json entry"""
+    return TrialScore(
+        nct_id=nct_id,
+        **entry['components'],
+        **entry['bonuses'],
+        **entry['penalties']
+    )
+
+def save_detailed_breakdown(nct_id: str, score, breakdown_fp, timestamp: str = None) -> dict:
+    """Save detailed breakdown without interpretation (returns the breakdown record)"""
     breakdown = {
         'nct_id': nct_id,
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': timestamp or datetime.now().isoformat(),
         'base_components': {
             'outcome_evidence': score.outcome_evidence,
             'phase_prior': score.phase_prior,
@@ -54,21 +80,38 @@ def save_detailed_breakdown(nct_id: str, score, breakdown_file: str):
         }
     }
     
-    # Append to breakdown file
+    # Append to the (buffered) breakdown file
     try:
-        with open(breakdown_file, 'a') as f:
-            f.write(json.dumps(breakdown) + '\n')
+        breakdown_fp.write(json_line(breakdown))
     except Exception as e:
         print(f"Warning: Could not save breakdown for {nct_id}: {e}")
+    
+    return breakdown
+
+def write_scores_atomically(scores: dict, scores_file: str):
+    """Write scores to a temp file and swap it in, so a crash never leaves a truncated file"""
+    tmp_file = scores_file + '.tmp'
+    try:
+        if orjson is not None:
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(scores, option=orjson.OPT_INDENT_2))
+        else:
+            with open(tmp_file, 'w') as f:
+                json.dump(scores, f, indent=2)
+        os.replace(tmp_file, scores_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
 
-def main():
+def main(force: bool = False):
     print("🚀 Starting comprehensive trial scoring...")
     
     # Initialize scorer
     scorer = ProperCSVScorer()
     
     # Get all interventional trials
-    trial_ids = get_interventional_trials()
+    trial_ids = scorer.interventional_nct_ids()
+    print(f"Found {len(trial_ids)} interventional trials")
     
     # Load existing scores
     scores_file = '../data/quality_scores.json'
@@ -80,66 +123,82 @@ def main():
     
     # Setup output files
     breakdown_file = '../data/detailed_breakdowns.jsonl'
-    failed_file = '../data/failed_apis.json'
+    failed_file = '../data/failed_apis.jsonl'
     
-    # Clear breakdown file
-    with open(breakdown_file, 'w') as f:
-        f.write('')  # Clear file
+    # All trials scored in this run share one timestamp
+    run_timestamp = datetime.now().isoformat()
     
     # Process each trial
     processed_count = 0
+    skipped_count = 0
     error_count = 0
+    lock = threading.Lock()
     
     print(f"\n📊 Processing {len(trial_ids)} interventional trials...")
     
-    for i, nct_id in enumerate(trial_ids, 1):
+    def process_trial(item):
+        nonlocal processed_count, skipped_count, error_count
+        i, nct_id = item
         try:
-            print(f"\n[{i}/{len(trial_ids)}] Processing {nct_id}...")
+            # Skip trials that are already scored, unless their CSV row changed since
+            # (entries without a row hash - older saves or API failures - are re-scored)
+            row_hash = scorer.trial_row_hash(nct_id)
+            with lock:
+                entry = None if force else existing_scores.get(nct_id)
+            if entry and row_hash is not None and entry.get('row_hash') == row_hash:
+                with lock:
+                    save_detailed_breakdown(nct_id, score_from_entry(nct_id, entry), breakdown_fp,
+                                            entry.get('timestamp', run_timestamp))
+                    skipped_count += 1
+                return
+            
+            log.debug("[%d/%d] Processing %s...", i, len(trial_ids), nct_id)
             
             # Calculate score
             score = scorer.calculate_trial_score(nct_id)
             
-            if score:
-                # Save to quality_scores.json
+            if not score:
+                with lock:
+                    error_count += 1
+                print(f"❌ {nct_id}: Trial not found in CSV")
+                return
+            
+            # A failed API call may have zeroed the publication bonus; keep the score but
+            # leave out the row hash so the next run scores this trial again
+            if scorer.had_api_failure(nct_id):
+                row_hash = None
+            
+            with lock:
+                # Save detailed breakdown
+                breakdown = save_detailed_breakdown(nct_id, score, breakdown_fp, run_timestamp)
+                
+                # Save to quality_scores.json, sharing the breakdown's component dicts
                 existing_scores[nct_id] = {
                     'base_score': score.base_score,
                     'total_score': score.total_score,
-                    'components': {
-                        'outcome_evidence': score.outcome_evidence,
-                        'phase_prior': score.phase_prior,
-                        'sponsor_track_record': score.sponsor_track_record,
-                        'study_design_integrity': score.study_design_integrity,
-                        'enrollment_fulfillment': score.enrollment_fulfillment,
-                        'external_validity': score.external_validity
-                    },
-                    'bonuses': {
-                        'regulatory_acceleration_bonus': score.regulatory_acceleration_bonus,
-                        'high_impact_publication_bonus': score.high_impact_publication_bonus,
-                        'data_sharing_bonus': score.data_sharing_bonus
-                    },
-                    'penalties': {
-                        'termination_penalty': score.termination_penalty
-                    },
-                    'timestamp': datetime.now().isoformat()
+                    'components': breakdown['base_components'],
+                    'bonuses': breakdown['bonuses'],
+                    'penalties': breakdown['penalties'],
+                    'row_hash': row_hash,
+                    'timestamp': run_timestamp
                 }
                 
-                # Save detailed breakdown
-                save_detailed_breakdown(nct_id, score, breakdown_file)
-                
                 processed_count += 1
                 
-            else:
-                error_count += 1
-                print(f"❌ {nct_id}: Trial not found in CSV")
-                
         except Exception as e:
-            error_count += 1
+            with lock:
+                error_count += 1
             print(f"❌ {nct_id}: Error - {e}")
     
+    # One long-lived, buffered handle for all breakdowns (truncates the previous run's file)
+    with open(breakdown_file, 'wb', buffering=1 << 20) as breakdown_fp:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            for _ in track_progress(executor.map(process_trial, enumerate(trial_ids, 1)), len(trial_ids)):
+                pass
+    
     # Save updated scores
     try:
-        with open(scores_file, 'w') as f:
-            json.dump(existing_scores, f, indent=2)
+        write_scores_atomically(existing_scores, scores_file)
         print(f"\n✅ Updated {scores_file}")
     except Exception as e:
         print(f"❌ Error saving scores: {e}")
@@ -151,10 +210,16 @@ def main():
     # Final summary
     print(f"\n🎯 PROCESSING COMPLETE")
     print(f"📊 Trials processed: {processed_count}")
+    print(f"⏭️  Unchanged trials skipped: {skipped_count}")
     print(f"❌ Errors encountered: {error_count}")
     print(f"📁 Detailed breakdowns: {breakdown_file}")
     print(f"📁 Failed APIs logged: {failed_file}")
     print(f"📁 Updated scores: {scores_file}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Score all interventional trials")
+    parser.add_argument('--force', action='store_true', help="Re-score trials that already have a saved score")
+    parser.add_argument('--verbose', action='store_true', help="Log per-trial progress")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    main(force=args.force) 
\ No newline at end of file
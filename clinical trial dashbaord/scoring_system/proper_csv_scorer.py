@@ -1,14 +1,93 @@
+import os
+import sys
 import json
+import logging
+import hashlib
+import sqlite3
 import requests
+import threading
 import time
 import re
 import pandas as pd
-import random
-from dataclasses import dataclass
+import numpy as np
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from dataclasses import dataclass, field, fields
 from typing import Dict, Optional, List, Tuple
 from datetime import datetime
 
-@dataclass
+log = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional; fall back to the stdlib XML parser
+    import xml.etree.ElementTree as etree
+
+# Columns the scorer reads from the trials CSV (missing ones are skipped)
+SCORING_COLUMNS = [
+    'nctId', 'studyType', 'overallStatus', 'phases', 'leadSponsor', 'allocation',
+    'masking', 'primaryOutcomes', 'enrollmentCount', 'eligibilityCriteria',
+    'interventions', 'keywords', 'briefSummary', 'ipdSharing', 'ipdDescription',
+    'whyStopped', 'terminationReason'
+]
+
+# Parquet copy of the scoring columns; the schema tag invalidates it when SCORING_COLUMNS changes
+SCORING_CACHE_SCHEMA = 'v1:' + ','.join(SCORING_COLUMNS)
+
+# Phase prior scores (first matching phase keyword wins)
+PHASE_PRIOR_SCORES = (
+    ('PHASE4', 1.2),    # Phase 4 - Post-marketing
+    ('PHASE3', 0.9),    # Phase 3 - Pivotal trial
+    ('PHASE2', 0.6),    # Phase 2 - Efficacy trial
+    ('PHASE1/2', 0.3),  # Phase 1/2 - Safety + early efficacy
+    ('PHASE12', 0.3),
+    ('PHASE1', 0.2),    # Phase 1 - Safety trial only
+)
+UNKNOWN_PHASE_PRIOR = 0.1
+
+# Phase-adjusted minimum enrollment (first matching phase wins) and fulfillment score bands
+PHASE_MIN_ENROLLMENT = (('PHASE1', 20), ('PHASE2', 100), ('PHASE3', 300), ('PHASE4', 500))
+DEFAULT_MIN_ENROLLMENT = 100  # Unknown phase
+ENROLLMENT_RATIO_SCORES = ((1.00, 0.6), (0.75, 0.4), (0.50, 0.2))  # ≥100%, 75-99%, 50-74%
+LOW_ENROLLMENT_SCORE = 0.1  # <50% or unknown enrollment
+
+# Citation parsing: journal-name patterns tried in order, one fused cleanup pass, and the year check
+JOURNAL_NAME_PATTERNS = [
+    re.compile(r'([A-Z][a-z\s&]+)\.\s*\d{4}', re.IGNORECASE),  # Journal name followed by period and year (e.g., "Lancet Neurol. 2015")
+    re.compile(r'([A-Z][a-z\s&]+)\s+\d{4}', re.IGNORECASE),  # Journal name followed by year
+    re.compile(r'published in\s+([^,]+)', re.IGNORECASE),
+    re.compile(r'journal:\s*([^,]+)', re.IGNORECASE),
+]
+FILE_FORMAT_NAMES = frozenset({'epub', 'pdf', 'html'})  # Publication strings that are only a file format
+JOURNAL_SUFFIX_RE = re.compile(r'\s+(?:et al\.?|Epub.*|doi.*|\d{4}.*)')  # et al., Epub/doi tails, year and everything after
+YEAR_RE = re.compile(r'\d{4}')
+
+# Columns searched for safety/futility reasons when a trial was terminated
+TERMINATION_REASON_COLUMNS = ('whyStopped', 'terminationReason', 'briefSummary')
+
+# NCBI allows 3 requests/second without an API key
+PUBMED_MIN_INTERVAL = 0.34
+
+# Trials are scored concurrently; the work is dominated by HTTP round-trips
+MAX_WORKERS = 8
+
+# Parsed ClinicalTrials.gov / PubMed responses are kept on disk between runs
+API_CACHE_PATH = '../data/api_cache.sqlite'
+API_CACHE_EXPIRY = 30 * 24 * 3600  # 30 days
+
+
+def compile_keywords(keywords: List[str]) -> re.Pattern:
+    """Compile a keyword list into one alternation so a single search replaces any(k in text ...)"""
+    return re.compile('|'.join(map(re.escape, keywords)))
+
+@dataclass(slots=True, frozen=True)
 class TrialScore:
     nct_id: str
     outcome_evidence: float
@@ -21,9 +100,15 @@ class TrialScore:
     high_impact_publication_bonus: float
     data_sharing_bonus: float
     termination_penalty: float
+    # Derived scores, computed once in __post_init__
+    base_score: float = field(init=False, repr=False)
+    total_score: float = field(init=False, repr=False)
     
-    @property
-    def base_score(self) -> float:
+    def __post_init__(self):
+        object.__setattr__(self, 'base_score', self._calculate_base_score())
+        object.__setattr__(self, 'total_score', self._calculate_total_score())
+    
+    def _calculate_base_score(self) -> float:
         """Calculate base score (max 5.0 points)"""
         base = (
             self.outcome_evidence +
@@ -35,8 +120,7 @@ class TrialScore:
         )
         return round(min(5.0, base), 2)
     
-    @property
-    def total_score(self) -> float:
+    def _calculate_total_score(self) -> float:
         """Calculate total score with bonuses and penalties"""
         bonuses = (
             self.regulatory_acceleration_bonus +
@@ -62,17 +146,174 @@ class TrialScore:
         else:
             return "HIGHLY RISKY"
 
+# Constructor fields of TrialScore, in order (also the column order of score_all)
+TRIAL_SCORE_FIELDS = [f.name for f in fields(TrialScore) if f.init]
+
+# Components summed (in this order) into the base score and the capped bonus total
+BASE_SCORE_FIELDS = (
+    'outcome_evidence', 'phase_prior', 'sponsor_track_record',
+    'study_design_integrity', 'enrollment_fulfillment', 'external_validity',
+)
+BONUS_FIELDS = ('regulatory_acceleration_bonus', 'high_impact_publication_bonus', 'data_sharing_bonus')
+
+# Packed per-trial layout of the CSV-derived components (everything but nct_id and the
+# API-backed publication bonus); float64 so the rounded scores match TrialScore exactly
+SCORE_DTYPE = np.dtype([
+    (name, 'f8') for name in TRIAL_SCORE_FIELDS
+    if name not in ('nct_id', 'high_impact_publication_bonus')
+])
+
+def read_scoring_csv(csv_path: str) -> pd.DataFrame:
+    """Read the scoring columns of a trials CSV into Arrow-backed columns, falling back to the default parser"""
+    header = pd.read_csv(csv_path, nrows=0).columns
+    usecols = [col for col in SCORING_COLUMNS if col in header]
+    try:
+        return pd.read_csv(
+            csv_path,
+            usecols=usecols,
+            engine='pyarrow',
+            dtype_backend='pyarrow',
+            dtype={'enrollmentCount': 'int32[pyarrow]'}
+        )
+    except Exception as e:
+        print(f"⚠️  pyarrow CSV engine unavailable ({e}), using default parser")
+        return pd.read_csv(csv_path, usecols=usecols, dtype={'enrollmentCount': 'Int32'}, memory_map=True)
+
+
+def load_scoring_frame(csv_path: str) -> pd.DataFrame:
+    """Load the scoring columns, preferring a fresh Parquet copy next to the CSV and writing one otherwise"""
+    prep_path = os.path.splitext(csv_path)[0] + '.prep.parquet'
+    if os.path.exists(prep_path) and os.path.getmtime(prep_path) >= os.path.getmtime(csv_path):
+        try:
+            import pyarrow.parquet as pq
+            metadata = pq.read_schema(prep_path).metadata or {}
+            if metadata.get(b'scoring_schema') == SCORING_CACHE_SCHEMA.encode():
+                return pd.read_parquet(prep_path, dtype_backend='pyarrow')
+        except Exception as e:
+            print(f"⚠️  Could not read scoring Parquet cache ({e}), using CSV")
+    
+    df = read_scoring_csv(csv_path)
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'scoring_schema'] = SCORING_CACHE_SCHEMA.encode()
+        pq.write_table(table.replace_schema_metadata(metadata), prep_path, compression='zstd')
+    except Exception as e:
+        print(f"⚠️  Could not write scoring Parquet cache ({e})")
+    return df
+
+
+def json_line(record: Dict) -> bytes:
+    """Encode a record as one newline-terminated JSON line, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+    return (json.dumps(record) + '\n').encode()
+
+
+def parse_response_json(response: requests.Response):
+    """Decode a JSON API response, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+def parse_journal_titles(xml_content: bytes) -> Dict[str, Optional[str]]:
+    """Map each PMID in a PubMed efetch XML document to its journal title"""
+    root = etree.fromstring(xml_content)
+    titles = {}
+    for article in root.iterfind('.//PubmedArticle'):
+        pmid = (article.findtext('MedlineCitation/PMID') or '').strip()
+        if not pmid:
+            continue
+        # PubMed articles carry the title under Article/Journal; PMC-style records use journal-title
+        title = article.findtext('MedlineCitation/Article/Journal/Title') or article.findtext('.//journal-title')
+        titles[pmid] = title.strip() if title and title.strip() else None
+    return titles
+
+
+class APICache:
+    """Persistent SQLite cache of parsed API responses keyed by (api_type, key)"""
+    
+    def __init__(self, path: str, expire: float = API_CACHE_EXPIRY):
+        self.expire = expire
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS api_cache ('
+                'api_type TEXT, key TEXT, value TEXT, fetched_at REAL, '
+                'PRIMARY KEY (api_type, key))'
+            )
+    
+    def get(self, api_type: str, key: str) -> Tuple[bool, object]:
+        """Return (hit, value); expired entries count as misses"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, fetched_at FROM api_cache WHERE api_type = ? AND key = ?',
+                (api_type, key)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.expire:
+            return False, None
+        return True, json.loads(row[0])
+    
+    def set(self, api_type: str, key: str, value):
+        """Store an already-parsed, JSON-serializable value"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO api_cache (api_type, key, value, fetched_at) VALUES (?, ?, ?, ?)',
+                (api_type, key, json.dumps(value), time.time())
+            )
+
+
 class ProperCSVScorer:
     """Clinical trial scorer that uses CSV data to calculate all components"""
     
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = API_CACHE_PATH):
         # Load CSV data
         self.csv_path = '../data/parkinson_trials_2010.csv'
-        self.df = pd.read_csv(self.csv_path)
+        self.df = load_scoring_frame(self.csv_path)
+        
+        # Row position of each trial for O(1) lookups (first occurrence wins, like a boolean filter)
+        self._row_positions = {nct_id: pos for pos, nct_id in reversed(list(enumerate(self.df['nctId'].tolist())))}
+        
+        # CSV-derived scores (base components, CSV bonuses, penalty) for every row as a
+        # SCORE_DTYPE array, computed in one vectorized pass on first use
+        self._csv_score_values = None
+        self._csv_score_lock = threading.Lock()  # Worker threads must not each rebuild the table
+        
+        # Completed scores by NCT ID, so repeated lookups skip the API round trips
+        self._score_cache: Dict[str, TrialScore] = {}
         
         # Initialize failed API tracking
-        self.failed_apis = []
-        self.failed_file = '../data/failed_apis.json'
+        # Failures are streamed to failed_file; only per-API counts stay in memory
+        self.failed_counts = Counter()
+        # Trials with a failed API call this run, so their scores are not memoized or trusted.
+        # Grows with the number of failing trials (IDs only; full entries go to failed_file)
+        self._failed_nct_ids = set()
+        self.failed_file = '../data/failed_apis.jsonl'
+        self._failed_fp = None  # Opened (and truncated) on the first failure of this run
+        self._failed_lock = threading.Lock()
+        
+        # Shared HTTP session so connections are reused across trials and threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                              max_retries=Retry(total=3, backoff_factor=0.3))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # PubMed calls are spaced globally, whichever thread makes them
+        self._pubmed_lock = threading.Lock()
+        self._pubmed_next_call = 0.0
+        
+        # Persistent API response cache (None disables it)
+        self.api_cache = None
+        if cache_path:
+            try:
+                self.api_cache = APICache(cache_path)
+            except sqlite3.Error as e:
+                print(f"Warning: Could not open API cache {cache_path}: {e}")
         
         # High-impact journals with actual impact factors
         self.high_impact_journals = {
@@ -122,39 +363,78 @@ class ProperCSVScorer:
             'frontiers': 5.0
         }
         
+        # Journal matchers: one alternation for "known name inside the journal name" and a
+        # newline-joined blob for "journal name inside a known name"
+        self._high_impact_re = compile_keywords(list(self.high_impact_journals))
+        self._high_impact_names = '\n'.join(self.high_impact_journals)
+        self._non_high_impact_re = compile_keywords(list(self.non_high_impact_journals))
+        self._non_high_impact_names = '\n'.join(self.non_high_impact_journals)
+        
         # FDA-approved drugs
-        self.fda_approved_drugs = [
+        self.fda_approved_drugs = frozenset([
             'levodopa', 'carbidopa', 'selegiline', 'rasagiline', 
             'pramipexole', 'ropinirole', 'rotigotine', 'apomorphine',
             'amantadine', 'trihexyphenidyl', 'benztropine', 
             'entacapone', 'tolcapone', 'istradefylline', 
             'safinamide', 'opicapone', 'duodopa', 'duopa',
             'xadago', 'northera', 'gocovri', 'ingrezza',
-            'austedo', 'nuplazid', 'nuplazid', 'ingrezza'
-        ]
-        
-        # Top-tier sponsors
-        self.top_tier_sponsors = [
-            "pfizer", "novartis", "roche", "johnson & johnson", "merck", 
-            "sanofi", "astrazeneca", "bristol-myers squibb", "eli lilly",
-            "biogen", "amgen", "gilead", "national institutes of health", 
-            "nih", "mayo clinic", "stanford university", "harvard", "johns hopkins"
-        ]
-        
-        self.mid_tier_sponsors = [
+            'austedo', 'nuplazid'
+        ])
+        
+        # Top-tier sponsors (0.8 pts)
+        self.top_tier_sponsors = frozenset([
+            'pfizer', 'roche', 'novartis', 'merck', 'johnson & johnson', 
+            'astrazeneca', 'sanofi', 'eli lilly', 'bristol-myers squibb', 
+            'abbvie', 'gilead', 'amgen', 'biogen', 'nih', 'mayo clinic', 
+            'stanford', 'harvard', 'johns hopkins'
+        ])
+        
+        # Mid-tier sponsors (0.5 pts)
+        self.mid_tier_sponsors = frozenset([
             "university of", "medical center", "hospital", "medical school",
             "research institute", "foundation", "association"
-        ]
+        ])
+        
+        # Keyword scans used by the component calculations, compiled once
+        self._ongoing_status_re = compile_keywords(['recruiting', 'active', 'ongoing'])
+        self._failed_status_re = compile_keywords(['withdrawn', 'suspended', 'safety', 'futility'])
+        self._safety_futility_re = compile_keywords(['safety', 'futility'])
+        self._double_triple_re = compile_keywords(['double', 'triple'])
+        # 'female' contains 'male', so "both, or male and female" is just "both or female"
+        self._both_sexes_re = compile_keywords(['both', 'female'])
+        self._top_tier_re = compile_keywords(sorted(self.top_tier_sponsors))
+        self._mid_tier_re = compile_keywords(sorted(self.mid_tier_sponsors))
+        self._phase_priors: Dict[str, float] = {}  # Upper-cased phases string -> phase prior
+        self._hard_endpoints_re = compile_keywords(['survival', 'death', 'hospitalization', 'mortality'])
+        self._age_span_re = compile_keywords(['18-65', '18-75', '18-80', '21-65', '21-75', '21-80'])
+        self._strict_filters_re = compile_keywords(['hla', 'genetic', 'biomarker', 'mutation'])
+        self._breakthrough_re = compile_keywords(['breakthrough', 'fast-track', 'rmat', 'regenerative medicine'])
+        self._orphan_re = compile_keywords(['orphan', 'rare disease', 'orphan drug', 'rare neurological', 'very rare'])
+        self._termination_reason_re = compile_keywords([
+            'safety', 'adverse events', 'toxicity', 'harm',  # Safety
+            'futility', 'lack of efficacy', 'ineffective'  # Futility
+        ])
 
     def get_trial_data(self, nct_id: str) -> Optional[Dict]:
         """Get trial data from CSV"""
-        trial = self.df[self.df['nctId'] == nct_id]
-        if trial.empty:
+        pos = self._row_positions.get(nct_id)
+        if pos is None:
             return None
-        return trial.iloc[0].to_dict()
+        return self.df.iloc[pos].to_dict()
+
+    def interventional_nct_ids(self) -> List[str]:
+        """NCT IDs of all interventional trials in the loaded CSV data"""
+        return self.df.loc[self.df['studyType'].eq('INTERVENTIONAL'), 'nctId'].tolist()
+
+    def trial_row_hash(self, nct_id: str) -> Optional[str]:
+        """Stable hash of a trial's CSV row, used to skip re-scoring unchanged trials"""
+        trial_data = self.get_trial_data(nct_id)
+        if trial_data is None:
+            return None
+        return hashlib.sha1(json.dumps(trial_data, sort_keys=True, default=str).encode()).hexdigest()
 
     def log_failed_api(self, nct_id: str, api_type: str, error: str, details: Dict = None):
-        """Log failed API calls to failed_apis.json for later fixing"""
+        """Log failed API calls to failed_apis.jsonl for later fixing"""
         failed_entry = {
             'nct_id': nct_id,
             'api_type': api_type,
@@ -163,232 +443,51 @@ class ProperCSVScorer:
             'details': details or {}
         }
         
-        self.failed_apis.append(failed_entry)
-        
-        # Save to file immediately
-        try:
-            with open(self.failed_file, 'w') as f:
-                json.dump(self.failed_apis, f, indent=2)
-        except Exception as e:
-            print(f"Warning: Could not save failed API log: {e}")
-
-    def calculate_outcome_evidence(self, trial_data: Dict) -> float:
-        """Calculate outcome evidence score (0-1.2 pts)"""
-        status = str(trial_data.get('overallStatus', '')).lower()
-        
-        if 'completed' in status and 'positive' in str(trial_data.get('primaryOutcomes', '')).lower():
-            return 1.2  # Completed + Positive Results
-        elif 'completed' in status:
-            return 0.8  # Completed + No Results Posted
-        elif any(word in status for word in ['recruiting', 'active', 'ongoing']):
-            return 0.6  # Ongoing Trial
-        elif 'terminated' in status and 'safety' not in status and 'futility' not in status:
-            return 0.3  # Terminated (Other Reasons)
-        elif any(word in status for word in ['withdrawn', 'suspended', 'safety', 'futility']):
-            return 0.0  # Failed Trial
-        else:
-            return 0.3  # Default for unknown status
-
-    def calculate_phase_prior(self, trial_data: Dict) -> float:
-        """Calculate phase prior score (0-1.2 pts)"""
-        phase = str(trial_data.get('phases', '')).upper()
-        
-        if 'PHASE4' in phase:
-            return 1.2  # Phase 4 - Post-marketing
-        elif 'PHASE3' in phase:
-            return 0.9  # Phase 3 - Pivotal trial
-        elif 'PHASE2' in phase:
-            return 0.6  # Phase 2 - Efficacy trial
-        elif 'PHASE1/2' in phase or 'PHASE12' in phase:
-            return 0.3  # Phase 1/2 - Safety + early efficacy
-        elif 'PHASE1' in phase:
-            return 0.2  # Phase 1 - Safety trial only
-        else:
-            return 0.1  # Unknown phase
-
-    def calculate_sponsor_track_record(self, trial_data: Dict) -> float:
-        """Calculate sponsor track record score (0-0.8 pts)"""
-        sponsor = str(trial_data.get('leadSponsor', '')).lower()
-        
-        # Top-Tier sponsors (0.8 pts)
-        top_tier = [
-            'pfizer', 'roche', 'novartis', 'merck', 'johnson & johnson', 
-            'astrazeneca', 'sanofi', 'eli lilly', 'bristol-myers squibb', 
-            'abbvie', 'gilead', 'amgen', 'biogen', 'nih', 'mayo clinic', 
-            'stanford', 'harvard', 'johns hopkins'
-        ]
-        
-        # Mid-Tier sponsors (0.5 pts)
-        mid_tier_keywords = [
-            'university of', 'medical center', 'hospital', 'medical school',
-            'research institute', 'foundation', 'association'
-        ]
-        
-        if any(top in sponsor for top in top_tier):
-            return 0.8  # Top-Tier
-        elif any(keyword in sponsor for keyword in mid_tier_keywords):
-            return 0.5  # Mid-Tier
-        else:
-            return 0.2  # Unknown/New sponsor
-
-    def calculate_study_design_integrity(self, trial_data: Dict) -> float:
-        """Calculate study design integrity score (0-0.8 pts)"""
-        allocation = str(trial_data.get('allocation', '')).lower()
-        masking = str(trial_data.get('masking', '')).lower()
-        primary_outcomes = str(trial_data.get('primaryOutcomes', '')).lower()
-        
-        score = 0.0
-        
-        # Allocation & Model (0-0.3 pts)
-        if 'randomized' in allocation and 'parallel' in allocation:
-            score += 0.3  # Randomized parallel design
-        elif 'randomized' in allocation:
-            score += 0.20  # Other randomized design
-        else:
-            score += 0.1  # Non-randomized
-        
-        # Blinding (0-0.2 pts)
-        if 'double' in masking or 'triple' in masking:
-            score += 0.2  # Double/Triple blinding
-        elif 'single' in masking:
-            score += 0.10  # Single blinding
-        else:
-            score += 0.05  # No blinding
-        
-        # Hard Endpoints (0-0.3 pts)
-        hard_endpoints = ['survival', 'death', 'hospitalization', 'mortality']
-        if any(endpoint in primary_outcomes for endpoint in hard_endpoints):
-            score += 0.3  # Hard endpoints
-        else:
-            score += 0.1  # Other endpoints
-        
-        return round(score, 2)
-
-    def calculate_enrollment_fulfillment(self, trial_data: Dict) -> float:
-        """Calculate enrollment fulfillment score (0-0.6 pts)"""
-        try:
-            enrollment = trial_data.get('enrollmentCount', 0)
-            if pd.isna(enrollment) or enrollment == 0:
-                return 0.1  # Unknown enrollment
+        with self._failed_lock:
+            self.failed_counts[api_type] += 1
+            self._failed_nct_ids.add(nct_id)
             
-            enrollment = int(enrollment)
-            phase = str(trial_data.get('phases', '')).upper()
-            
-            # Phase-adjusted minimum requirements
-            if 'PHASE1' in phase:
-                min_required = 20
-            elif 'PHASE2' in phase:
-                min_required = 100
-            elif 'PHASE3' in phase:
-                min_required = 300
-            elif 'PHASE4' in phase:
-                min_required = 500
-            else:
-                min_required = 100  # Default for unknown phase
-            
-            ratio = enrollment / min_required
-            
-            if ratio >= 1.00:
-                return 0.6  # ≥100%
-            elif ratio >= 0.75:
-                return 0.4  # 75-99%
-            elif ratio >= 0.50:
-                return 0.2  # 50-74%
-            else:
-                return 0.1  # <50%
-                
-        except Exception as e:
-            return 0.1  # Default for errors
+            # Append to file immediately
+            try:
+                if self._failed_fp is None:
+                    self._failed_fp = open(self.failed_file, 'wb')
+                self._failed_fp.write(json_line(failed_entry))
+                self._failed_fp.flush()
+            except Exception as e:
+                print(f"Warning: Could not save failed API log: {e}")
 
-    def calculate_external_validity(self, trial_data: Dict) -> float:
-        """Calculate external validity score (0-0.4 pts)"""
-        eligibility = str(trial_data.get('eligibilityCriteria', '')).lower()
-        
-        score = 0.0
-        
-        # Age span ≥30 years (0.1 pts)
-        age_keywords = ['18-65', '18-75', '18-80', '21-65', '21-75', '21-80']
-        if any(age_range in eligibility for age_range in age_keywords):
-            score += 0.1
-        
-        # Both sexes included (0.15 pts)
-        if 'both' in eligibility or 'male' in eligibility and 'female' in eligibility:
-            score += 0.15
-        
-        # ≥3 countries/≥10 sites (0.1 pts)
-        # Note: Site info not available in current CSV, default to 0
-        # score += 0.1  # Would need additional data
-        
-        # No strict biomarker filter (0.05 pts)
-        strict_filters = ['hla', 'genetic', 'biomarker', 'mutation']
-        if not any(filter_term in eligibility for filter_term in strict_filters):
-            score += 0.05
-        
-        return round(score, 2)
+    def had_api_failure(self, nct_id: str) -> bool:
+        """True if an API call for this trial failed during this run"""
+        with self._failed_lock:
+            return nct_id in self._failed_nct_ids
 
-    def calculate_regulatory_acceleration_bonus(self, trial_data: Dict, outcome_score: float) -> float:
-        """Calculate regulatory acceleration bonus (0-0.3 pts)"""
-        # Check CSV data first
-        interventions = str(trial_data.get('interventions', '')).lower()
-        keywords = str(trial_data.get('keywords', '')).lower()
-        brief_summary = str(trial_data.get('briefSummary', '')).lower()
-        
-        score = 0.0
-        
-        # Breakthrough/Fast-Track/RMAT (0.2 pts)
-        breakthrough_keywords = ['breakthrough', 'fast-track', 'rmat', 'regenerative medicine']
-        all_text = f"{interventions} {keywords} {brief_summary}"
-        if any(keyword in all_text for keyword in breakthrough_keywords):
-            score += 0.2
-        
-        # Orphan Drug (0.1 pts)
-        orphan_keywords = ['orphan', 'rare disease', 'orphan drug', 'rare neurological', 'very rare']
-        if any(keyword in all_text for keyword in orphan_keywords):
-            score += 0.1
-        
-        return min(score, 0.3)  # Cap at 0.3
+    def wait_for_pubmed_slot(self):
+        """Block until at least PUBMED_MIN_INTERVAL has passed since the previous PubMed call"""
+        with self._pubmed_lock:
+            now = time.monotonic()
+            if self._pubmed_next_call > now:
+                time.sleep(self._pubmed_next_call - now)
+                now = self._pubmed_next_call
+            self._pubmed_next_call = now + PUBMED_MIN_INTERVAL
 
-    def calculate_data_sharing_bonus(self, trial_data: Dict) -> float:
-        """Calculate data sharing bonus (0-0.2 pts)"""
-        ipd_sharing = str(trial_data.get('ipdSharing', '')).lower()
-        ipd_description = str(trial_data.get('ipdDescription', '')).lower()
+    def calculate_phase_prior(self, trial_data: Dict) -> float:
+        """Calculate phase prior score (0-1.2 pts)"""
+        phase = str(trial_data.get('phases', '')).upper()
         
-        # Check for IPD plan present
-        if 'yes' in ipd_sharing or 'available' in ipd_sharing or 'plan' in ipd_description:
-            return 0.2  # IPD plan present
-        else:
-            return 0.0  # No IPD plan
-
+        # Only a handful of distinct phase strings exist, so this is a lookup table filled on first sight
+        score = self._phase_priors.get(phase)
+        if score is None:
+            score = next((prior for keyword, prior in PHASE_PRIOR_SCORES if keyword in phase), UNKNOWN_PHASE_PRIOR)
+            self._phase_priors[phase] = score
+        return score
 
-
-    def calculate_termination_penalty(self, trial_data: Dict) -> float:
-        """Calculate termination penalty (-1.0 to 0.0) from CSV data"""
-        try:
-            overall_status = trial_data.get('overallStatus', '').upper()
-            
-            if overall_status == 'TERMINATED':
-                # Check for safety or futility reasons
-                trial_text = str(trial_data).lower()
-                safety_keywords = ['safety', 'adverse events', 'toxicity', 'harm']
-                futility_keywords = ['futility', 'lack of efficacy', 'ineffective']
-                
-                if any(keyword in trial_text for keyword in safety_keywords + futility_keywords):
-                    return -1.0  # Safety or futility termination
-                else:
-                    return -0.8  # Unknown termination reason
-            
-            elif overall_status == 'WITHDRAWN':
-                return -0.8
-            
-            elif overall_status == 'SUSPENDED':
-                return -0.5
-            
-            else:
-                return 0.0
-                
-        except Exception as e:
-            print(f"Warning: Error calculating termination penalty: {e}")
-            return 0.0
+    def _matches_journal(self, journal_lower: str, pattern: re.Pattern, names: str) -> bool:
+        """True if a known name occurs in journal_lower or journal_lower occurs in a known name"""
+        if pattern.search(journal_lower):
+            return True
+        if '\n' in journal_lower:
+            return any(journal_lower in name for name in names.split('\n'))
+        return journal_lower in names
 
     def validate_journal_impact(self, journal_name: str) -> bool:
         """Validate if journal is high-impact"""
@@ -397,12 +496,14 @@ class ProperCSVScorer:
         
         journal_lower = journal_name.lower().strip()
         
-        # Check against known high-impact journals
-        for high_impact_journal, impact_factor in self.high_impact_journals.items():
-            if (high_impact_journal in journal_lower or 
-                journal_lower in high_impact_journal or
-                journal_lower == high_impact_journal):
-                return True
+        # Check against known high-impact journals (exact name first)
+        if journal_lower in self.high_impact_journals:
+            return True
+        if self._matches_journal(journal_lower, self._high_impact_re, self._high_impact_names):
+            return True
+        
+        if not self._matches_journal(journal_lower, self._non_high_impact_re, self._non_high_impact_names):
+            return False
         
         # Check against known non-high-impact journals
         for non_high_journal, impact_factor in self.non_high_impact_journals.items():
@@ -414,8 +515,31 @@ class ProperCSVScorer:
         # For unknown journals, be conservative
         return False
 
+    def get_cached_response(self, api_type: str, key: str) -> Tuple[bool, object]:
+        """Look up a parsed API response in the persistent cache"""
+        if self.api_cache is None:
+            return False, None
+        try:
+            return self.api_cache.get(api_type, key)
+        except sqlite3.Error as e:
+            print(f"Warning: API cache read failed for {api_type} {key}: {e}")
+            return False, None
+
+    def cache_response(self, api_type: str, key: str, value):
+        """Store a parsed API response in the persistent cache"""
+        if self.api_cache is None:
+            return
+        try:
+            self.api_cache.set(api_type, key, value)
+        except sqlite3.Error as e:
+            print(f"Warning: API cache write failed for {api_type} {key}: {e}")
+
     def fetch_clinicaltrials_publications(self, nct_id: str) -> List[str]:
         """Fetch publication information from ClinicalTrials.gov v2 API"""
+        hit, cached = self.get_cached_response('clinicaltrials_publications', nct_id)
+        if hit:
+            return cached
+        
         publications = []
         
         try:
@@ -427,10 +551,10 @@ class ProperCSVScorer:
                 'format': 'json'
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             
-            data = response.json()
+            data = parse_response_json(response)
             if 'studies' in data and data['studies']:
                 study = data['studies'][0]
                 
@@ -444,6 +568,8 @@ class ProperCSVScorer:
                             if journal_name:
                                 publications.append(journal_name)
             
+            self.cache_response('clinicaltrials_publications', nct_id, publications)
+            
         except Exception as e:
             # Log the failed API call for later fixing
             self.log_failed_api(
@@ -461,9 +587,6 @@ class ProperCSVScorer:
         publications = []
         
         try:
-            # Add delay to respect PubMed API rate limits
-            time.sleep(random.uniform(0.3, 0.5))  # 300-500ms delay
-            
             # Search PubMed for publications related to this NCT ID
             url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
             params = {
@@ -473,18 +596,27 @@ class ProperCSVScorer:
                 'retmax': 10
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            if 'esearchresult' in data and 'idlist' in data['esearchresult']:
-                pmid_list = data['esearchresult']['idlist']
+            hit, pmid_list = self.get_cached_response('pubmed_search', nct_id)
+            if not hit:
+                # Respect PubMed API rate limits
+                self.wait_for_pubmed_slot()
+                
+                response = self.session.get(url, params=params, timeout=10)
+                response.raise_for_status()
                 
-                # Fetch details for each publication
-                for pmid in pmid_list[:5]:  # Limit to 5 publications
-                    journal_name = self.fetch_pubmed_journal(pmid)
-                    if journal_name:
-                        publications.append(journal_name)
+                data = parse_response_json(response)
+                pmid_list = []
+                if 'esearchresult' in data and 'idlist' in data['esearchresult']:
+                    pmid_list = data['esearchresult']['idlist']
+                self.cache_response('pubmed_search', nct_id, pmid_list)
+            
+            # Fetch details for all publications in one efetch call
+            pmids = pmid_list[:5]  # Limit to 5 publications
+            journals = self.fetch_pubmed_journals(pmids, nct_id)
+            for pmid in pmids:
+                journal_name = journals.get(pmid)
+                if journal_name:
+                    publications.append(journal_name)
             
         except Exception as e:
             # Log the failed API call for later fixing
@@ -498,70 +630,70 @@ class ProperCSVScorer:
         
         return publications
 
-    def fetch_pubmed_journal(self, pmid: str) -> Optional[str]:
-        """Fetch journal name from PubMed"""
+    def fetch_pubmed_journals(self, pmids: List[str], nct_id: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """Fetch journal names for several PMIDs from PubMed with a single efetch call"""
+        journals = {}
+        missing = []
+        for pmid in pmids:
+            hit, cached = self.get_cached_response('pubmed_journal', pmid)
+            if hit:
+                journals[pmid] = cached
+            else:
+                missing.append(pmid)
+        
+        if not missing:
+            return journals
+        
         try:
-            # Add delay to respect PubMed API rate limits
-            time.sleep(random.uniform(0.3, 0.5))  # 300-500ms delay
+            # Respect PubMed API rate limits
+            self.wait_for_pubmed_slot()
             
             url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
             params = {
                 'db': 'pubmed',
-                'id': pmid,
+                'id': ','.join(missing),
                 'retmode': 'xml'
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
             
-            # Parse XML response to extract journal name
-            content = response.text.lower()
-            
-            # Extract journal name
-            journal_match = re.search(r'<journal-title>(.*?)</journal-title>', content)
-            journal_name = journal_match.group(1) if journal_match else ""
-            
-            return journal_name if journal_name else None
+            # Parse XML response to extract journal names
+            titles = parse_journal_titles(response.content)
+            for pmid in missing:
+                journals[pmid] = titles.get(pmid)
+                self.cache_response('pubmed_journal', pmid, journals[pmid])
             
         except Exception as e:
             # Log the failed API call for later fixing
+            # Logged against the trial that asked for the PMIDs, so its score is not trusted
             self.log_failed_api(
-                nct_id=f"PMID_{pmid}",  # Use PMID as identifier
+                nct_id=nct_id or f"PMID_{','.join(missing)}",
                 api_type='pubmed_journal',
                 error=str(e),
-                details={'url': url, 'params': params, 'pmid': pmid}
+                details={'url': url, 'params': params, 'pmids': missing}
             )
-            print(f"Warning: Error fetching PubMed details for PMID {pmid}: {e}")
-            return None
+            print(f"Warning: Error fetching PubMed details for PMIDs {', '.join(missing)}: {e}")
+        
+        return journals
 
     def parse_publication_string(self, pub_string: str) -> Optional[str]:
         """Parse publication string from ClinicalTrials.gov"""
         try:
             # Skip if it's just a file format like "Epub"
-            if pub_string.lower().strip() in ['epub', 'pdf', 'html']:
+            if pub_string.lower().strip() in FILE_FORMAT_NAMES:
                 return None
             
             # If the string looks like it's already a journal name (no year, no authors, etc.)
-            if len(pub_string.split()) <= 5 and not re.search(r'\d{4}', pub_string):
+            if len(pub_string.split()) <= 5 and not YEAR_RE.search(pub_string):
                 return pub_string.strip()
             
             # Look for journal name patterns in full citations
-            journal_patterns = [
-                r'([A-Z][a-z\s&]+)\.\s*\d{4}',  # Journal name followed by period and year (e.g., "Lancet Neurol. 2015")
-                r'([A-Z][a-z\s&]+)\s+\d{4}',  # Journal name followed by year
-                r'published in\s+([^,]+)',
-                r'journal:\s*([^,]+)',
-            ]
-            
-            for pattern in journal_patterns:
-                match = re.search(pattern, pub_string, re.IGNORECASE)
+            for pattern in JOURNAL_NAME_PATTERNS:
+                match = pattern.search(pub_string)
                 if match:
-                    journal_name = match.group(1).strip()
                     # Clean up common suffixes
-                    journal_name = re.sub(r'\s+et al\.?', '', journal_name)
-                    journal_name = re.sub(r'\s+Epub.*', '', journal_name)
-                    journal_name = re.sub(r'\s+doi.*', '', journal_name)
-                    journal_name = re.sub(r'\s+\d{4}.*', '', journal_name)  # Remove year and everything after
+                    journal_name = JOURNAL_SUFFIX_RE.sub('', match.group(1).strip())
                     return journal_name.strip()
             
         except Exception as e:
@@ -569,7 +701,7 @@ class ProperCSVScorer:
         
         return None
 
-    def calculate_high_impact_publication_bonus(self, trial_data: Dict, nct_id: str) -> float:
+    def calculate_high_impact_publication_bonus(self, trial_data: Optional[Dict], nct_id: str) -> float:
         """Calculate high-impact publication bonus (0-0.5 pts)"""
         try:
             # Fetch publications from ClinicalTrials.gov
@@ -599,33 +731,249 @@ class ProperCSVScorer:
         except Exception as e:
             return 0.0  # Default for errors
 
+    def _text_column(self, df: pd.DataFrame, column: str, upper: bool = False) -> pd.Series:
+        """Get a column as lower/upper-cased strings ('' when the column is missing, like dict.get)"""
+        if column not in df.columns:
+            return pd.Series('', index=df.index, dtype=object)
+        text = df[column].astype(str)
+        return text.str.upper() if upper else text.str.lower()
+
+    def _text_categories(self, df: pd.DataFrame, column: str, upper: bool = False) -> Tuple[np.ndarray, pd.Series]:
+        """Split a low-cardinality column into per-row codes and its distinct lower/upper-cased strings
+        
+        Status, phase and sponsor repeat across many trials, so string matching runs once per
+        distinct value and the result is broadcast back with names_mask[codes].
+        """
+        if column not in df.columns:
+            return np.zeros(len(df), dtype=np.intp), pd.Series([''], dtype=object)
+        codes, uniques = pd.factorize(df[column], use_na_sentinel=False)
+        names = pd.Series(uniques, dtype=object).astype(str)
+        return codes, (names.str.upper() if upper else names.str.lower())
+
+    def _contains_any(self, text: pd.Series, pattern: re.Pattern) -> np.ndarray:
+        """Vectorized pattern.search over a string column"""
+        return text.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+
+    def _round_scores(self, scores: np.ndarray) -> np.ndarray:
+        """Round scores to 2 decimals exactly like the builtin round(), once per distinct value"""
+        distinct, inverse = np.unique(scores, return_inverse=True)
+        return np.array([round(value, 2) for value in distinct.tolist()], dtype=np.float64)[inverse]
+
+    def calculate_base_components(self, df: pd.DataFrame = None) -> pd.DataFrame:
+        """Calculate the six base component scores for every trial in df (defaults to the whole CSV)"""
+        if df is None:
+            df = self.df
+        
+        status_codes, status = self._text_categories(df, 'overallStatus')
+        phase_codes, phase = self._text_categories(df, 'phases', upper=True)
+        sponsor_codes, sponsor = self._text_categories(df, 'leadSponsor')
+        allocation = self._text_column(df, 'allocation')
+        masking = self._text_column(df, 'masking')
+        primary_outcomes = self._text_column(df, 'primaryOutcomes')
+        eligibility = self._text_column(df, 'eligibilityCriteria')
+        
+        def has(text: pd.Series, keyword: str) -> np.ndarray:
+            return text.str.contains(keyword, regex=False).to_numpy(dtype=bool)
+        
+        # Outcome evidence - first matching status rule wins
+        completed = has(status, 'completed')[status_codes]
+        safety_or_futility = self._contains_any(status, self._safety_futility_re)
+        outcome_evidence = np.select(
+            [
+                completed & has(primary_outcomes, 'positive'),
+                completed,
+                self._contains_any(status, self._ongoing_status_re)[status_codes],
+                (has(status, 'terminated') & ~safety_or_futility)[status_codes],
+                self._contains_any(status, self._failed_status_re)[status_codes],
+            ],
+            [1.2, 0.8, 0.6, 0.3, 0.0],  # Completed + positive, completed, ongoing, terminated (other), failed
+            default=0.3  # Unknown status
+        )
+        
+        # Phase prior - the calculate_phase_prior lookup table, applied per distinct phases string
+        phase_prior = np.array(
+            [self.calculate_phase_prior({'phases': name}) for name in phase], dtype=np.float64
+        )[phase_codes]
+        phase1 = has(phase, 'PHASE1')[phase_codes]
+        phase2 = has(phase, 'PHASE2')[phase_codes]
+        phase3 = has(phase, 'PHASE3')[phase_codes]
+        phase4 = has(phase, 'PHASE4')[phase_codes]
+        
+        # Sponsor track record - top tier, then mid tier, else unknown/new;
+        # matched once per distinct sponsor and broadcast back to the trials
+        sponsor_track_record = np.select(
+            [
+                self._contains_any(sponsor, self._top_tier_re),
+                self._contains_any(sponsor, self._mid_tier_re),
+            ],
+            [0.8, 0.5],
+            default=0.2
+        )[sponsor_codes]
+        
+        # Study design integrity - allocation + blinding + endpoints, rounded to 2 places
+        allocation_score = np.select(
+            [has(allocation, 'randomized') & has(allocation, 'parallel'), has(allocation, 'randomized')],
+            [0.3, 0.20],
+            default=0.1
+        )
+        blinding_score = np.select(
+            [self._contains_any(masking, self._double_triple_re), has(masking, 'single')],
+            [0.2, 0.10],
+            default=0.05
+        )
+        endpoint_score = np.where(
+            self._contains_any(primary_outcomes, self._hard_endpoints_re), 0.3, 0.1
+        )
+        study_design_integrity = self._round_scores(0.0 + allocation_score + blinding_score + endpoint_score)
+        
+        # Enrollment fulfillment - enrollment against phase-adjusted minimums
+        if 'enrollmentCount' in df.columns:
+            enrollment = pd.to_numeric(df['enrollmentCount'], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            enrollment = np.zeros(len(df))
+        unknown_enrollment = np.isnan(enrollment) | np.isinf(enrollment) | (enrollment == 0)
+        phase_masks = {'PHASE1': phase1, 'PHASE2': phase2, 'PHASE3': phase3, 'PHASE4': phase4}
+        min_required = np.select(
+            [phase_masks[phase_key] for phase_key, _ in PHASE_MIN_ENROLLMENT],
+            [minimum for _, minimum in PHASE_MIN_ENROLLMENT],
+            default=DEFAULT_MIN_ENROLLMENT
+        )
+        with np.errstate(invalid='ignore'):
+            ratio = np.trunc(enrollment) / min_required
+            enrollment_fulfillment = np.select(
+                [unknown_enrollment] + [ratio >= threshold for threshold, _ in ENROLLMENT_RATIO_SCORES],
+                [LOW_ENROLLMENT_SCORE] + [score for _, score in ENROLLMENT_RATIO_SCORES],
+                default=LOW_ENROLLMENT_SCORE
+            )
+        
+        # External validity - age span + both sexes + no strict biomarker filter, rounded to 2 places
+        age_score = np.where(
+            self._contains_any(eligibility, self._age_span_re), 0.1, 0.0
+        )
+        sexes_score = np.where(
+            self._contains_any(eligibility, self._both_sexes_re), 0.15, 0.0
+        )
+        filter_score = np.where(
+            self._contains_any(eligibility, self._strict_filters_re), 0.0, 0.05
+        )
+        external_validity = self._round_scores(0.0 + age_score + sexes_score + filter_score)
+        
+        return pd.DataFrame({
+            'outcome_evidence': outcome_evidence,
+            'phase_prior': phase_prior,
+            'sponsor_track_record': sponsor_track_record,
+            'study_design_integrity': study_design_integrity,
+            'enrollment_fulfillment': enrollment_fulfillment,
+            'external_validity': external_validity
+        }, index=df.index)
+
+    def calculate_csv_adjustments(self, df: pd.DataFrame = None) -> pd.DataFrame:
+        """Calculate the CSV-only bonuses and the termination penalty for every trial in df (defaults to the whole CSV)"""
+        if df is None:
+            df = self.df
+        
+        def has(text: pd.Series, keyword: str) -> np.ndarray:
+            return text.str.contains(keyword, regex=False).to_numpy(dtype=bool)
+        
+        # Regulatory acceleration - breakthrough/fast-track (0.2) and orphan (0.1) over interventions, keywords and summary
+        all_text = self._text_column(df, 'interventions').str.cat(
+            [self._text_column(df, 'keywords'), self._text_column(df, 'briefSummary')], sep=' '
+        )
+        breakthrough_score = np.where(self._contains_any(all_text, self._breakthrough_re), 0.2, 0.0)
+        orphan_score = np.where(self._contains_any(all_text, self._orphan_re), 0.1, 0.0)
+        regulatory_acceleration_bonus = np.minimum(0.0 + breakthrough_score + orphan_score, 0.3)
+        
+        # Data sharing - IPD plan present
+        ipd_sharing = self._text_column(df, 'ipdSharing')
+        data_sharing_bonus = np.where(
+            has(ipd_sharing, 'yes') | has(ipd_sharing, 'available') | has(self._text_column(df, 'ipdDescription'), 'plan'),
+            0.2, 0.0
+        )
+        
+        # Termination penalty - terminated for safety/futility, other terminations, withdrawn, suspended
+        status_codes, status = self._text_categories(df, 'overallStatus', upper=True)
+        reason_text = self._text_column(df, TERMINATION_REASON_COLUMNS[0]).str.cat(
+            [self._text_column(df, col) for col in TERMINATION_REASON_COLUMNS[1:]], sep=' '
+        )
+        terminated = (status == 'TERMINATED').to_numpy(dtype=bool)[status_codes]
+        termination_penalty = np.select(
+            [
+                terminated & self._contains_any(reason_text, self._termination_reason_re),
+                terminated,
+                (status == 'WITHDRAWN').to_numpy(dtype=bool)[status_codes],
+                (status == 'SUSPENDED').to_numpy(dtype=bool)[status_codes],
+            ],
+            [-1.0, -0.8, -0.8, -0.5],
+            default=0.0
+        )
+        
+        return pd.DataFrame({
+            'regulatory_acceleration_bonus': regulatory_acceleration_bonus,
+            'data_sharing_bonus': data_sharing_bonus,
+            'termination_penalty': termination_penalty
+        }, index=df.index)
+
+    def score_all(self, df: pd.DataFrame = None) -> pd.DataFrame:
+        """Score every trial in df (defaults to the whole CSV) column-wise; only the publication bonus is per trial (fetched concurrently)"""
+        if df is None:
+            df = self.df
+        
+        scores = pd.concat([self.calculate_base_components(df), self.calculate_csv_adjustments(df)], axis=1)
+        scores['nct_id'] = df['nctId'].astype(object)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            scores['high_impact_publication_bonus'] = list(executor.map(
+                lambda nct_id: self.calculate_high_impact_publication_bonus(None, nct_id), scores['nct_id']
+            ))
+        scores = scores[TRIAL_SCORE_FIELDS]
+        scores['base_score'], scores['total_score'] = self.calculate_totals(scores)
+        return scores
+
+    def calculate_totals(self, scores) -> Tuple[np.ndarray, np.ndarray]:
+        """Base and total scores for a batch of trials (a score_all frame or any mapping of component arrays)"""
+        # Same sums, caps and rounding as TrialScore, one vector operation per component
+        base = sum(np.asarray(scores[name], dtype=np.float64) for name in BASE_SCORE_FIELDS)
+        base_score = self._round_scores(np.minimum(base, 5.0))
+        bonuses = np.minimum(sum(np.asarray(scores[name], dtype=np.float64) for name in BONUS_FIELDS), 1.0)
+        final = base_score + bonuses + np.asarray(scores['termination_penalty'], dtype=np.float64)
+        return base_score, self._round_scores(np.maximum(np.minimum(final, 5.0), 0.0))
+
+    def trial_scores(self, scores: pd.DataFrame) -> List[TrialScore]:
+        """Build TrialScore objects for the rows of a score_all result"""
+        return [TrialScore(*row) for row in scores[TRIAL_SCORE_FIELDS].itertuples(index=False, name=None)]
+
     def calculate_trial_score(self, nct_id: str) -> Optional[TrialScore]:
         """Calculate complete trial score from CSV data"""
-        print(f"Calculating score for {nct_id} from CSV data...")
+        cached = self._score_cache.get(nct_id)
+        if cached is not None:
+            return cached
+        log.debug("Calculating score for %s from CSV data...", nct_id)
         
         # Get trial data from CSV
-        trial_data = self.get_trial_data(nct_id)
-        if not trial_data:
+        pos = self._row_positions.get(nct_id)
+        if pos is None:
             print(f"Trial {nct_id} not found in CSV data")
             return None
+        trial_data = self.df.iloc[pos].to_dict()
         
-        # Calculate all components from CSV data
-        outcome_evidence = self.calculate_outcome_evidence(trial_data)
-        phase_prior = self.calculate_phase_prior(trial_data)
-        sponsor_track_record = self.calculate_sponsor_track_record(trial_data)
-        study_design_integrity = self.calculate_study_design_integrity(trial_data)
-        enrollment_fulfillment = self.calculate_enrollment_fulfillment(trial_data)
-        external_validity = self.calculate_external_validity(trial_data)
+        # Everything derived from CSV text comes from the vectorized pass over the whole CSV
+        if self._csv_score_values is None:
+            with self._csv_score_lock:
+                if self._csv_score_values is None:
+                    components = pd.concat(
+                        [self.calculate_base_components(), self.calculate_csv_adjustments()], axis=1
+                    )
+                    values = np.empty(len(components), dtype=SCORE_DTYPE)
+                    for name in SCORE_DTYPE.names:
+                        values[name] = components[name].to_numpy()
+                    self._csv_score_values = values
+        (outcome_evidence, phase_prior, sponsor_track_record,
+         study_design_integrity, enrollment_fulfillment, external_validity,
+         regulatory_acceleration_bonus, data_sharing_bonus, termination_penalty) = self._csv_score_values[pos].item()
         
-        # Calculate bonuses
-        regulatory_acceleration_bonus = self.calculate_regulatory_acceleration_bonus(trial_data, outcome_evidence)
+        # The publication bonus needs the external APIs, so it stays per trial
         high_impact_publication_bonus = self.calculate_high_impact_publication_bonus(trial_data, nct_id)
-        data_sharing_bonus = self.calculate_data_sharing_bonus(trial_data)
         
-        # Calculate penalty
-        termination_penalty = self.calculate_termination_penalty(trial_data)
-        
-        return TrialScore(
+        score = TrialScore(
             nct_id=nct_id,
             outcome_evidence=outcome_evidence,
             phase_prior=phase_prior,
@@ -638,54 +986,65 @@ class ProperCSVScorer:
             data_sharing_bonus=data_sharing_bonus,
             termination_penalty=termination_penalty
         )
+        # A failed API call may have zeroed the publication bonus, so leave that trial
+        # uncached and let the next lookup retry it
+        if not self.had_api_failure(nct_id):
+            self._score_cache[nct_id] = score
+        return score
 
     def get_failed_api_summary(self):
         """Get summary of failed API calls"""
-        if not self.failed_apis:
+        if not self.failed_counts:
             return "✅ No failed API calls"
         
-        # Group by API type
-        api_counts = {}
-        for entry in self.failed_apis:
-            api_type = entry['api_type']
-            api_counts[api_type] = api_counts.get(api_type, 0) + 1
-        
-        summary = f"⚠️  Failed API calls: {len(self.failed_apis)} total\n"
-        for api_type, count in api_counts.items():
-            summary += f"  • {api_type}: {count} failures\n"
-        
-        summary += f"\n📁 Failed APIs saved to: {self.failed_file}"
-        return summary
+        # Most frequent API type first
+        lines = [f"⚠️  Failed API calls: {sum(self.failed_counts.values())} total"]
+        lines.extend(f"  • {api_type}: {count} failures" for api_type, count in self.failed_counts.most_common())
+        lines.append(f"\n📁 Failed APIs saved to: {self.failed_file}")
+        return '\n'.join(lines)
+
+# Layout of print_detailed_breakdown, filled from the TrialScore fields in one go
+BREAKDOWN_TEMPLATE = """
+{rule}
+DETAILED BREAKDOWN: {nct_id}
+{rule}
+
+📊 BASE COMPONENTS:
+  • Outcome Evidence: {outcome_evidence:.2f}/1.2
+  • Phase Prior: {phase_prior:.2f}/1.2
+  • Sponsor Track Record: {sponsor_track_record:.2f}/0.8
+  • Study Design Integrity: {study_design_integrity:.2f}/0.8
+  • Enrollment Fulfillment: {enrollment_fulfillment:.2f}/0.6
+  • External Validity: {external_validity:.2f}/0.4
+
+🎯 BONUSES:
+  • Regulatory Acceleration: {regulatory_acceleration_bonus:.2f}/0.3
+  • High-Impact Publication: {high_impact_publication_bonus:.2f}/0.5
+  • Data Sharing: {data_sharing_bonus:.2f}/0.2
+
+⚠️  PENALTIES:
+  • Termination Penalty: {termination_penalty:.2f}
+
+📈 SCORE CALCULATION:
+  • Base Score: {base_score:.2f}/5.0
+  • Total Bonuses: {total_bonuses:.2f}
+  • Final Score: {total_score:.2f}/5.0
+  • Interpretation: {interpretation}
+
+{rule}
+""".replace('{rule}', '=' * 60)  # Constant banner baked in once
+# Every TrialScore field the template reads, resolved once from the dataclass schema
+BREAKDOWN_FIELDS = tuple(f.name for f in fields(TrialScore))
 
 def print_detailed_breakdown(nct_id: str, score: TrialScore):
     """Print detailed breakdown of trial score"""
-    print(f"\n{'='*60}")
-    print(f"DETAILED BREAKDOWN: {nct_id}")
-    print(f"{'='*60}")
-    
-    print(f"\n📊 BASE COMPONENTS:")
-    print(f"  • Outcome Evidence: {score.outcome_evidence:.2f}/1.2")
-    print(f"  • Phase Prior: {score.phase_prior:.2f}/1.2")
-    print(f"  • Sponsor Track Record: {score.sponsor_track_record:.2f}/0.8")
-    print(f"  • Study Design Integrity: {score.study_design_integrity:.2f}/0.8")
-    print(f"  • Enrollment Fulfillment: {score.enrollment_fulfillment:.2f}/0.6")
-    print(f"  • External Validity: {score.external_validity:.2f}/0.4")
-    
-    print(f"\n🎯 BONUSES:")
-    print(f"  • Regulatory Acceleration: {score.regulatory_acceleration_bonus:.2f}/0.3")
-    print(f"  • High-Impact Publication: {score.high_impact_publication_bonus:.2f}/0.5")
-    print(f"  • Data Sharing: {score.data_sharing_bonus:.2f}/0.2")
-    
-    print(f"\n⚠️  PENALTIES:")
-    print(f"  • Termination Penalty: {score.termination_penalty:.2f}")
-    
-    print(f"\n📈 SCORE CALCULATION:")
-    print(f"  • Base Score: {score.base_score:.2f}/5.0")
-    print(f"  • Total Bonuses: {score.regulatory_acceleration_bonus + score.high_impact_publication_bonus + score.data_sharing_bonus:.2f}")
-    print(f"  • Final Score: {score.total_score:.2f}/5.0")
-    print(f"  • Interpretation: {score.interpretation}")
-    
-    print(f"\n{'='*60}")
+    values = {name: getattr(score, name) for name in BREAKDOWN_FIELDS}
+    values.update(
+        nct_id=nct_id,
+        total_bonuses=score.regulatory_acceleration_bonus + score.high_impact_publication_bonus + score.data_sharing_bonus,
+        interpretation=score.interpretation,
+    )
+    sys.stdout.write(BREAKDOWN_TEMPLATE.format_map(values))
 
 if __name__ == "__main__":
     scorer = ProperCSVScorer()
@@ -697,10 +1056,13 @@ if __name__ == "__main__":
         'NCT03011723',  # Another study
     ]
     
+    # Score the test studies in one columnar pass
     for nct_id in test_studies:
-        score = scorer.calculate_trial_score(nct_id)
-        if score:
-            print_detailed_breakdown(nct_id, score)
+        if nct_id not in scorer._row_positions:
+            print(f"Trial {nct_id} not found in CSV data")
+    found = [scorer._row_positions[nct_id] for nct_id in test_studies if nct_id in scorer._row_positions]
+    for score in scorer.trial_scores(scorer.score_all(scorer.df.iloc[found])):
+        print_detailed_breakdown(score.nct_id, score)
     
     # Show failed API summary
     print(f"\n{'='*60}")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Check that a failed PubMed journal fetch is charged to the trial that needed it
+"""
+
+import sys
+import os
+import json
+
+import pandas as pd
+import pytest
+import requests
+
+# Make the scorer importable when run from the repo root
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import proper_csv_scorer
+from proper_csv_scorer import ProperCSVScorer
+
+NCT_ID = 'NCT00000001'
+PMID = '12345'
+EFETCH_XML = f"""<PubmedArticleSet><PubmedArticle><MedlineCitation>
+<PMID>{PMID}</PMID><Article><Journal><Title>Nature</Title></Journal></Article>
+</MedlineCitation></PubmedArticle></PubmedArticleSet>""".encode()
+
+
+class FakeResponse:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeSession:
+    """Answers ClinicalTrials.gov and esearch; efetch fails while efetch_fails is set"""
+
+    def __init__(self):
+        self.efetch_fails = True
+
+    def get(self, url, params=None, timeout=None):
+        if 'clinicaltrials.gov' in url:
+            return FakeResponse(b'{"studies": []}')
+        if 'esearch' in url:
+            return FakeResponse(json.dumps({'esearchresult': {'idlist': [PMID]}}).encode())
+        if self.efetch_fails:
+            raise requests.ConnectionError('efetch unavailable')
+        return FakeResponse(EFETCH_XML)
+
+
+@pytest.fixture
+def scorer(monkeypatch, tmp_path):
+    """Scorer over a one-trial frame, with no API cache and a stubbed HTTP session"""
+    frame = pd.DataFrame([{
+        'nctId': NCT_ID, 'studyType': 'INTERVENTIONAL', 'overallStatus': 'COMPLETED',
+        'phases': 'PHASE2', 'leadSponsor': 'Example Sponsor', 'enrollmentCount': 120,
+    }])
+    monkeypatch.setattr(proper_csv_scorer, 'load_scoring_frame', lambda csv_path: frame)
+    monkeypatch.setattr(proper_csv_scorer, 'PUBMED_MIN_INTERVAL', 0.0)
+    scorer = ProperCSVScorer(cache_path=None)
+    scorer.failed_file = str(tmp_path / 'failed_apis.jsonl')
+    scorer.session = FakeSession()
+    return scorer
+
+
+def test_failed_journal_fetch_marks_trial(scorer):
+    score = scorer.calculate_trial_score(NCT_ID)
+
+    assert score.high_impact_publication_bonus == 0.0
+    assert scorer.had_api_failure(NCT_ID)
+    assert NCT_ID not in scorer._score_cache
+    with open(scorer.failed_file) as f:
+        entry = json.loads(f.readline())
+    assert entry['nct_id'] == NCT_ID
+    assert entry['api_type'] == 'pubmed_journal'
+    assert entry['details']['pmids'] == [PMID]
+
+
+def test_failed_journal_fetch_is_retried(scorer):
+    scorer.calculate_trial_score(NCT_ID)
+
+    # The zeroed bonus was not memoized, so a healthy retry picks up the publication
+    scorer.session.efetch_fails = False
+    assert scorer.calculate_trial_score(NCT_ID).high_impact_publication_bonus == 0.3